@@ -0,0 +1,201 @@
+# blog/answer_uploads.py
+
+"""
+Yazılı imtahan cavab faylları: chunked + resumable upload və hash ilə dedup.
+
+Əvvəl fayllar take_exam-ın əsas multipart POST-u ilə gəlirdi və hər autosave
+cavabın fayllarını silib yenidən yaradırdı. İndi:
+
+- start_upload: yükləmə sessiyası (ExamAnswerUpload). Eyni cavab + ad + ölçü
+  üçün yarımçıq sessiya varsa, o qaytarılır — client received-dən davam edir
+- append_chunk: hissə request stream-indən bloklarla diskə yazılır; offset və
+  ümumi ölçü hər blokda yoxlanılır (yaddaşa bütöv fayl yüklənmir)
+- vaxt bitəndə client submit-dən əvvəl yarımçıq yükləmələri UPLOAD_GRACE_SECONDS
+  qədər gözləyir; chunk endpoint-i də bu müddətdə açıq qalır
+- son hissədə fayl SHA-256 ilə hash-lənir; həmin cavabda eyni hash-li fayl
+  varsa yeni sətir / storage yazısı olmur (attach_file). Başqa cavabda eyni
+  məzmun varsa sətir yaranır, amma blob paylaşılır (blog/storage.py)
+
+Köhnə yarımçıq sessiyalar: manage.py gc_answer_files
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+from datetime import timedelta
+from pathlib import Path
+from typing import Iterable, Optional, Tuple
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files import File
+from django.db import transaction
+from django.utils import timezone
+
+from .models import ExamAnswer, ExamAnswerFile, ExamAnswerUpload
+from .validators import MAX_UPLOAD_SIZE, validate_file_extension
+
+CHUNK_SIZE = 1024 * 1024
+READ_BLOCK = 64 * 1024
+STALE_UPLOAD_HOURS = 24
+# deadline-dan əvvəl başlamış yükləmənin qalan hissələri bu müddətdə qəbul olunur
+UPLOAD_GRACE_SECONDS = getattr(settings, "EXAM_UPLOAD_GRACE_SECONDS", 30)
+
+
+def upload_temp_dir() -> Path:
+    return Path(getattr(settings, "EXAM_UPLOAD_TEMP_DIR", Path(settings.MEDIA_ROOT) / "exam_uploads" / "partial"))
+
+
+def temp_path(upload: ExamAnswerUpload) -> Path:
+    return upload_temp_dir() / f"{upload.id}.part"
+
+
+def file_sha256(blocks: Iterable[bytes]) -> str:
+    digest = hashlib.sha256()
+    for block in blocks:
+        digest.update(block)
+    return digest.hexdigest()
+
+
+def _read_blocks(fh, size: int = READ_BLOCK):
+    while True:
+        block = fh.read(size)
+        if not block:
+            return
+        yield block
+
+
+def attach_file(answer_id: int, django_file: File, sha256: str) -> Tuple[ExamAnswerFile, bool]:
+    """
+    Faylı cavaba bağlayır. Eyni hash artıq varsa mövcud sətri qaytarır (created=False).
+    Model validator-ları burada işləyir (objects.create onları çağırmır).
+    """
+    existing = ExamAnswerFile.objects.filter(answer_id=answer_id, sha256=sha256).first()
+    if existing is not None:
+        return existing, False
+
+    for validator in ExamAnswerFile._meta.get_field("file").validators:
+        django_file.seek(0)
+        validator(django_file)
+    django_file.seek(0)
+
+    # storage (content-addressed) hash-i yenidən hesablamasın
+    django_file.sha256 = sha256
+    name = os.path.basename(django_file.name)
+    obj = ExamAnswerFile(answer_id=answer_id, sha256=sha256, original_name=name)
+    obj.file.save(name, django_file, save=False)
+    obj.save()
+    return obj, True
+
+
+# -------------------------
+# Chunked upload
+# -------------------------
+
+def start_upload(answer: ExamAnswer, filename: str, size: int, sha256: str = "") -> dict:
+    """
+    Ad / ölçü əvvəlcədən yoxlanılır. Client hash göndəribsə və fayl artıq
+    varsa, heç nə yüklənmir: {"complete": True, "file": ...}.
+    """
+    filename = os.path.basename(filename or "").strip()
+    if not filename:
+        raise ValidationError("Fayl adı boşdur.")
+    validate_file_extension(File(None, name=filename))
+    if size <= 0 or size > MAX_UPLOAD_SIZE:
+        raise ValidationError("Fayl maksimum 10MB ola bilər.")
+
+    if sha256:
+        existing = ExamAnswerFile.objects.filter(answer=answer, sha256=sha256.lower()).first()
+        if existing is not None:
+            return {"complete": True, "deduplicated": True, "file": file_payload(existing)}
+
+    upload = (
+        ExamAnswerUpload.objects
+        .filter(answer=answer, filename=filename, size=size)
+        .order_by("-updated_at")
+        .first()
+    )
+    if upload is None or not temp_path(upload).exists():
+        if upload is not None:
+            upload.delete()
+        upload = ExamAnswerUpload.objects.create(answer=answer, filename=filename, size=size)
+        upload_temp_dir().mkdir(parents=True, exist_ok=True)
+        temp_path(upload).touch()
+
+    return {"complete": False, "upload_id": str(upload.id), "offset": upload.received, "chunk_size": CHUNK_SIZE}
+
+
+def append_chunk(upload: ExamAnswerUpload, offset: int, stream, length: Optional[int] = None) -> dict:
+    """
+    offset client-in göndərdiyi mövqedir; received ilə üst-üstə düşməlidirsə
+    ValueError (view 409 qaytarır, client serverin offset-indən davam edir).
+    """
+    if offset != upload.received:
+        raise ValueError("offset uyğun gəlmir")
+
+    path = temp_path(upload)
+    written = 0
+    with open(path, "r+b") as fh:
+        # əvvəlki yarımçıq cəhddən qalan artıq baytlar kəsilir
+        fh.seek(upload.received)
+        fh.truncate()
+        for block in _read_blocks(stream):
+            written += len(block)
+            if upload.received + written > upload.size or written > CHUNK_SIZE:
+                fh.truncate(upload.received)
+                raise ValidationError("Hissə elan olunmuş ölçünü aşır.")
+            fh.write(block)
+
+    if length is not None and written != length:
+        # bağlantı yarıda kəsilib — yazılan hissə qəbul olunmur
+        with open(path, "r+b") as fh:
+            fh.truncate(upload.received)
+        raise ValueError("hissə tam gəlmədi")
+
+    # eyni offset-ə paralel iki request: yalnız biri qəbul olunur
+    moved = (
+        ExamAnswerUpload.objects
+        .filter(id=upload.id, received=upload.received)
+        .update(received=upload.received + written, updated_at=timezone.now())
+    )
+    if not moved:
+        raise ValueError("offset uyğun gəlmir")
+    upload.received += written
+
+    if upload.received < upload.size:
+        return {"complete": False, "offset": upload.received}
+
+    obj, created = finish_upload(upload)
+    return {"complete": True, "offset": upload.received, "deduplicated": not created, "file": file_payload(obj)}
+
+
+def finish_upload(upload: ExamAnswerUpload) -> Tuple[ExamAnswerFile, bool]:
+    path = temp_path(upload)
+    try:
+        with open(path, "rb") as fh:
+            digest = file_sha256(_read_blocks(fh))
+            fh.seek(0)
+            with transaction.atomic():
+                obj, created = attach_file(upload.answer_id, File(fh, name=upload.filename), digest)
+                upload.delete()
+    except ValidationError:
+        upload.delete()
+        raise
+    finally:
+        path.unlink(missing_ok=True)
+    return obj, created
+
+
+def file_payload(obj: ExamAnswerFile) -> dict:
+    return {"id": obj.id, "name": obj.filename(), "url": obj.file.url}
+
+
+def discard_stale_uploads(hours: int = STALE_UPLOAD_HOURS) -> int:
+    """Uzun müddət davam etdirilməyən yarımçıq yükləmələr + müvəqqəti faylları."""
+    cutoff = timezone.now() - timedelta(hours=hours)
+    stale = list(ExamAnswerUpload.objects.filter(updated_at__lt=cutoff))
+    for upload in stale:
+        temp_path(upload).unlink(missing_ok=True)
+    ExamAnswerUpload.objects.filter(id__in=[u.id for u in stale]).delete()
+    return len(stale)
@@ -4,3 +4,9 @@ from django.apps import AppConfig
 class BlogConfig(AppConfig):
     default_auto_field = "django.db.models.BigAutoField"
     name = "blog"
+
+    def ready(self):
+        # sual indeksinin cache invalidation signal-ları
+        from . import question_selection  # noqa: F401
+        # content-addressed cavab faylları: blob ref_count signal-ları
+        from . import blob_refs  # noqa: F401
@@ -0,0 +1,311 @@
+# blog/attempt_autosave.py
+
+"""
+take_exam üçün yüngül JSON autosave (PATCH semantikası).
+
+Əvvəl autosave bütün formanı take_exam-a POST edirdi: hər cavab yenidən yazılır,
+bütün suallar variantları ilə yüklənir, yazılı imtahanda fayllar silinib təkrar
+yüklənirdi. İndi client yalnız dəyişən sualları göndərir:
+
+    {"answers": {"<question_id>": {"options": [<option_id>, ...], "text": "..."}}}
+
+(hər iki açar ixtiyaridir, yalnız göndərilən sahə yazılır)
+
+- attempt sahibliyi + status + deadline bir dəfə yoxlanılır (view-da)
+- yalnız göndərilən sualların cavabları və variant id-ləri oxunur
+- seçimlər / mətn toplu yazılır, correct/wrong bir aggregate ilə sayılır
+- attempt bir UPDATE ilə "draft" olur, autosave_version artır və client-ə qaytarılır
+- eyni yazıcı (save_deltas_bulk) bir neçə attempt-i birlikdə yaza bilir —
+  WebSocket autosave buffer-i belə flush olunur
+
+Fayllar bura daxil deyil — onlar köhnə form POST ilə göndərilir.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+from datetime import timedelta
+from typing import Dict, List, Optional
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Case, Count, F, PositiveIntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import ExamAnswer, ExamAttempt, ExamQuestionOption
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("in_progress", "draft")
+MAX_CHANGES = 500
+MAX_TEXT_LENGTH = 20000
+
+
+def parse_changes(payload) -> Dict[int, dict]:
+    """JSON body -> {question_id: {"options": [id, ...], "text": str}} (açarlar ixtiyari). Səhv formatda ValueError."""
+    if not isinstance(payload, dict) or not isinstance(payload.get("answers"), dict):
+        raise ValueError("answers obyekti tələb olunur")
+
+    raw = payload["answers"]
+    if len(raw) > MAX_CHANGES:
+        raise ValueError("çox sayda dəyişiklik")
+
+    changes: Dict[int, dict] = {}
+    for key, value in raw.items():
+        if not str(key).isdigit() or not isinstance(value, dict):
+            raise ValueError(f"yanlış sual: {key}")
+        change = {}
+        if "options" in value:
+            options = value["options"]
+            if not isinstance(options, list):
+                raise ValueError(f"options siyahı olmalıdır: {key}")
+            ids = []
+            for x in options:
+                if isinstance(x, bool) or not str(x).isdigit():
+                    raise ValueError(f"yanlış variant: {key}")
+                ids.append(int(x))
+            change["options"] = ids
+        if "text" in value:
+            if not isinstance(value["text"], str):
+                raise ValueError(f"text sətir olmalıdır: {key}")
+            change["text"] = value["text"].strip()[:MAX_TEXT_LENGTH]
+        if not change:
+            raise ValueError(f"options və ya text lazımdır: {key}")
+        changes[int(key)] = change
+    return changes
+
+
+def attempt_deadline(attempt: ExamAttempt):
+    minutes = attempt.exam.total_duration_minutes
+    if not minutes or not attempt.started_at:
+        return None
+    return attempt.started_at + timedelta(minutes=minutes)
+
+
+def save_answer_deltas(attempt: ExamAttempt, changes: Dict[int, dict], now=None) -> Optional[int]:
+    """
+    Bir attempt-in dəyişən cavablarını yazır, yeni autosave_version-u qaytarır.
+    Attempt arada bitibsə (submit / sweeper) heç nə yazılmır, None qaytarılır.
+    """
+    return save_deltas_bulk({attempt.id: changes}, now).get(attempt.id)
+
+
+def save_deltas_bulk(changes_by_attempt: Dict[int, Dict[int, dict]], now=None) -> Dict[int, int]:
+    """
+    Bir neçə attempt-in dəyişikliklərini eyni sorğu dəsti ilə yazır
+    (WebSocket buffer-i toplu flush edir, bax: blog/consumers.py).
+    {attempt_id: yeni version} qaytarır — yalnız hələ açıq olan attempt-lər üçün.
+    """
+    now = now or timezone.now()
+    if not changes_by_attempt:
+        return {}
+
+    with transaction.atomic():
+        # açıq attempt-ləri kilidləyirik: paralel finish / expiry bitmiş attempt-ə yazmasın
+        exam_types = dict(
+            ExamAttempt.objects
+            .select_for_update(of=("self",))
+            .filter(id__in=list(changes_by_attempt), status__in=OPEN_STATUSES)
+            .values_list("id", "exam__exam_type")
+        )
+        if not exam_types:
+            return {}
+
+        qids = {qid for aid in exam_types for qid in changes_by_attempt[aid]}
+        answers: List[ExamAnswer] = [
+            ans for ans in (
+                ExamAnswer.objects
+                .filter(attempt_id__in=list(exam_types), question_id__in=list(qids))
+                .select_related("question")
+                .only("id", "attempt_id", "question_id", "question__answer_mode")
+            )
+            if ans.question_id in changes_by_attempt[ans.attempt_id]
+        ]
+
+        option_ids: Dict[int, set] = {}
+        correct_ids: Dict[int, set] = {}
+        test_qids = [a.question_id for a in answers if exam_types[a.attempt_id] == "test"]
+        if test_qids:
+            for opt_id, qid, is_correct in (
+                ExamQuestionOption.objects
+                .filter(question_id__in=test_qids)
+                .values_list("id", "question_id", "is_correct")
+            ):
+                option_ids.setdefault(qid, set()).add(opt_id)
+                if is_correct:
+                    correct_ids.setdefault(qid, set()).add(opt_id)
+
+        Through = ExamAnswer.selected_options.through
+        links = []
+        option_answers = []
+        # yalnız dəyişiklikdə olan sahələr yazılır: variant dəyişikliyi mətni silmir və əksinə
+        by_fields: Dict[tuple, List[ExamAnswer]] = {}
+        for ans in answers:
+            change = changes_by_attempt[ans.attempt_id][ans.question_id]
+            is_option_question = (
+                exam_types[ans.attempt_id] == "test" and ans.question.answer_mode in ("single", "multiple")
+            )
+            fields = []
+
+            if is_option_question and "options" in change:
+                valid = option_ids.get(ans.question_id, set())
+                # göndərilən sıra saxlanılır; single-da yalnız birincisi
+                selected = [x for x in dict.fromkeys(change["options"]) if x in valid]
+                if ans.question.answer_mode == "single":
+                    selected = selected[:1]
+                links.extend(Through(examanswer_id=ans.id, examquestionoption_id=x) for x in selected)
+                option_answers.append(ans.id)
+                correct = correct_ids.get(ans.question_id, set())
+                ans.is_correct = bool(correct) and set(selected) == correct
+                fields.append("is_correct")
+
+            if "text" in change:
+                ans.text_answer = change["text"]
+                fields.append("text_answer")
+                if not is_option_question:
+                    # yazılı cavabı müəllim qiymətləndirir
+                    ans.is_correct = False
+                    fields.append("is_correct")
+
+            if not fields:
+                continue
+            ans.updated_at = now
+            by_fields.setdefault(tuple(fields) + ("updated_at",), []).append(ans)
+
+        if option_answers:
+            Through.objects.filter(examanswer_id__in=option_answers).delete()
+            Through.objects.bulk_create(links)
+        for fields, group in by_fields.items():
+            ExamAnswer.objects.bulk_update(group, list(fields))
+
+        updates = {"status": "draft", "autosave_version": F("autosave_version") + 1}
+        scored = {a.attempt_id for a in answers if exam_types[a.attempt_id] == "test"}
+        if scored:
+            totals = (
+                ExamAnswer.objects
+                .filter(attempt_id__in=scored)
+                .values("attempt_id")
+                .annotate(
+                    correct=Count("id", filter=Q(is_correct=True)),
+                    wrong=Count("id", filter=Q(is_correct=False)),
+                )
+                .values_list("attempt_id", "correct", "wrong")
+            )
+            correct_whens, wrong_whens = [], []
+            for attempt_id, c, w in totals:
+                correct_whens.append(When(id=attempt_id, then=Value(c)))
+                wrong_whens.append(When(id=attempt_id, then=Value(w)))
+            updates["correct_count"] = Case(
+                *correct_whens, default=F("correct_count"), output_field=PositiveIntegerField()
+            )
+            updates["wrong_count"] = Case(
+                *wrong_whens, default=F("wrong_count"), output_field=PositiveIntegerField()
+            )
+
+        ExamAttempt.objects.filter(id__in=list(exam_types)).update(**updates)
+        return dict(
+            ExamAttempt.objects
+            .filter(id__in=list(exam_types))
+            .values_list("id", "autosave_version")
+        )
+
+
+# -------------------------
+# WebSocket buffer (ExamAttemptConsumer)
+# -------------------------
+
+# buffer bu qədər saniyədən bir toplu yazılır
+FLUSH_INTERVAL_SECONDS = getattr(settings, "EXAM_WS_FLUSH_SECONDS", 3)
+
+
+def ws_autosave_enabled() -> bool:
+    return getattr(settings, "EXAM_WS_AUTOSAVE", False)
+
+
+class AutosaveBuffer:
+    """
+    attempt_id -> {question_id: son dəyişiklik}. Eyni suala gələn ardıcıl
+    dəyişikliklər birləşir (debounce), DB-yə yalnız sonuncusu yazılır.
+    Yaddaşda, process başına — flush intervalı qədər data crash-də itə bilər,
+    client isə "saved" gəlməyən sualları HTTP ilə yenidən göndərir.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._pending: Dict[int, Dict[int, dict]] = {}
+
+    def add(self, attempt_id: int, changes: Dict[int, dict]) -> None:
+        with self._lock:
+            current = self._pending.setdefault(attempt_id, {})
+            for qid, change in changes.items():
+                # sahə səviyyəsində: sonrakı "options" əvvəlki "text"-i silmir
+                current[qid] = {**current.get(qid, {}), **change}
+
+    def pop(self, attempt_id: int) -> Dict[int, dict]:
+        with self._lock:
+            return self._pending.pop(attempt_id, {})
+
+    def drain(self) -> Dict[int, Dict[int, dict]]:
+        with self._lock:
+            pending, self._pending = self._pending, {}
+        return pending
+
+    def restore(self, pending: Dict[int, Dict[int, dict]]) -> None:
+        """Uğursuz flush-dan sonra geri qaytarır; arada gələn yeni dəyişikliklər üstündür."""
+        with self._lock:
+            for attempt_id, changes in pending.items():
+                current = self._pending.setdefault(attempt_id, {})
+                for qid, change in changes.items():
+                    current[qid] = {**change, **current.get(qid, {})}
+
+
+buffer = AutosaveBuffer()
+
+
+def flush_buffer(attempt_id: Optional[int] = None) -> Dict[int, int]:
+    """Buffer-i (və ya yalnız bir attempt-i) yazır, {attempt_id: version} qaytarır."""
+    if attempt_id is None:
+        pending = buffer.drain()
+    else:
+        changes = buffer.pop(attempt_id)
+        pending = {attempt_id: changes} if changes else {}
+    try:
+        return save_deltas_bulk(pending)
+    except Exception:
+        buffer.restore(pending)
+        raise
+
+
+def attempt_group(attempt_id: int) -> str:
+    return f"exam_attempt_{attempt_id}"
+
+
+_flusher_task: Optional[asyncio.Task] = None
+
+
+async def _flusher_loop() -> None:
+    from channels.db import database_sync_to_async
+    from channels.layers import get_channel_layer
+
+    layer = get_channel_layer()
+    while True:
+        await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+        try:
+            versions = await database_sync_to_async(flush_buffer)()
+            for attempt_id, version in versions.items():
+                await layer.group_send(attempt_group(attempt_id), {"type": "autosave.saved", "version": version})
+        except Exception:
+            # flusher ölməməlidir; növbəti dövrədə yenidən cəhd edəcək
+            logger.exception("exam autosave flush failed")
+
+
+def ensure_flusher() -> None:
+    """Consumer connect-də çağırılır: bu event loop-da flusher yoxdursa başladır."""
+    global _flusher_task
+    loop = asyncio.get_running_loop()
+    task = _flusher_task
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return
+    _flusher_task = loop.create_task(_flusher_loop())
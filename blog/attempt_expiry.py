@@ -0,0 +1,166 @@
+# blog/attempt_expiry.py
+
+"""
+Vaxtı bitmiş (total_duration_minutes) amma heç vaxt submit olunmamış attempt-lər.
+
+Əvvəllər attempt yalnız tələbə vaxt bitəndən sonra take_exam-a POST edəndə
+"expired" olurdu; tərk edilmiş attempt-lər əbədi "in_progress"/"draft" qalırdı.
+
+expire_overdue_attempts:
+- imtahan müddətlərinin (distinct, az sayda) hər biri üçün started_at həddi
+  hesablanır -> bir sorğu (status + started_at index-i ilə)
+- finished_at = started_at + müddət, duration_seconds = müddət
+- test imtahanlarında correct/wrong bir aggregate sorğu ilə yenidən sayılır
+- hamısı bir UPDATE ilə yazılır; status hələ də açıqdırsa (arada submit olunmayıbsa)
+
+İşlətmək: manage.py expire_attempts (cron) və ya EXAM_EXPIRY_SWEEPER=True ilə
+ASGI process daxilində background task (with_expiry_sweeper).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from typing import Optional
+
+from django.conf import settings
+from django.db.models import Case, Count, DateTimeField, F, PositiveIntegerField, Q, Value, When
+from django.utils import timezone
+
+from .models import Exam, ExamAnswer, ExamAttempt
+
+logger = logging.getLogger(__name__)
+
+OPEN_STATUSES = ("in_progress", "draft")
+
+# son saniyədə göndərilən submit-lər sweeper-dən əvvəl çatsın
+GRACE_SECONDS = getattr(settings, "EXAM_EXPIRY_GRACE_SECONDS", 60)
+SWEEP_INTERVAL_SECONDS = getattr(settings, "EXAM_EXPIRY_SWEEP_SECONDS", 60)
+BATCH_SIZE = 500
+
+
+def overdue_attempts(now=None):
+    now = now or timezone.now()
+    durations = sorted(set(
+        Exam.objects
+        .filter(total_duration_minutes__gt=0)
+        .values_list("total_duration_minutes", flat=True)
+    ))
+    if not durations:
+        return ExamAttempt.objects.none()
+
+    cutoff = now - timedelta(seconds=GRACE_SECONDS)
+    window = Q()
+    for minutes in durations:
+        window |= Q(
+            exam__total_duration_minutes=minutes,
+            started_at__lt=cutoff - timedelta(minutes=minutes),
+        )
+
+    return (
+        ExamAttempt.objects
+        # ən qısa müddətdən köhnə olmayanlar heç vaxt overdue deyil (index üçün)
+        .filter(status__in=OPEN_STATUSES, started_at__lt=cutoff - timedelta(minutes=durations[0]))
+        .filter(window)
+    )
+
+
+def expire_overdue_attempts(now=None, limit: int = BATCH_SIZE) -> int:
+    """Bir batch-i expired edir, yenilənən sayı qaytarır."""
+    rows = list(
+        overdue_attempts(now)
+        .order_by("started_at")
+        .values_list("id", "started_at", "exam__total_duration_minutes", "exam__exam_type")[:limit]
+    )
+    if not rows:
+        return 0
+
+    test_ids = [r[0] for r in rows if r[3] == "test"]
+    scores = {
+        attempt_id: (correct, wrong)
+        for attempt_id, correct, wrong in (
+            ExamAnswer.objects
+            .filter(attempt_id__in=test_ids)
+            .values("attempt_id")
+            .annotate(
+                correct=Count("id", filter=Q(is_correct=True)),
+                wrong=Count("id", filter=Q(is_correct=False)),
+            )
+            .values_list("attempt_id", "correct", "wrong")
+        )
+    }
+
+    finished_at = []
+    duration = []
+    correct = []
+    wrong = []
+    for attempt_id, started_at, minutes, exam_type in rows:
+        finished_at.append(When(id=attempt_id, then=Value(started_at + timedelta(minutes=minutes))))
+        duration.append(When(id=attempt_id, then=Value(minutes * 60)))
+        if exam_type == "test":
+            c, w = scores.get(attempt_id, (0, 0))
+            correct.append(When(id=attempt_id, then=Value(c)))
+            wrong.append(When(id=attempt_id, then=Value(w)))
+
+    return (
+        ExamAttempt.objects
+        .filter(id__in=[r[0] for r in rows], status__in=OPEN_STATUSES)
+        .update(
+            status="expired",
+            finished_at=Case(*finished_at, output_field=DateTimeField()),
+            duration_seconds=Case(*duration, output_field=PositiveIntegerField()),
+            correct_count=Case(*correct, default=F("correct_count"), output_field=PositiveIntegerField()),
+            wrong_count=Case(*wrong, default=F("wrong_count"), output_field=PositiveIntegerField()),
+        )
+    )
+
+
+def expire_all_overdue(now=None, batch_size: int = BATCH_SIZE) -> int:
+    total = 0
+    while True:
+        n = expire_overdue_attempts(now, limit=batch_size)
+        total += n
+        if n < batch_size:
+            return total
+
+
+# -------------------------
+# ASGI background task (optional)
+# -------------------------
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+async def _sweeper_loop() -> None:
+    from channels.db import database_sync_to_async
+
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            await database_sync_to_async(expire_all_overdue)()
+        except Exception:
+            # sweeper ölməməlidir; növbəti dövrədə yenidən cəhd edəcək
+            logger.exception("attempt expiry sweep failed")
+
+
+def ensure_expiry_sweeper() -> None:
+    """Bu event loop-da sweeper yoxdursa başladır (EXAM_EXPIRY_SWEEPER=True olanda)."""
+    global _sweeper_task
+    if not getattr(settings, "EXAM_EXPIRY_SWEEPER", False):
+        return
+    loop = asyncio.get_running_loop()
+    task = _sweeper_task
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return
+    _sweeper_task = loop.create_task(_sweeper_loop())
+
+
+def with_expiry_sweeper(app):
+    """ASGI app wrapper: ilk request-də sweeper-i bu process-in loop-unda başladır."""
+
+    async def wrapper(scope, receive, send):
+        ensure_expiry_sweeper()
+        return await app(scope, receive, send)
+
+    return wrapper
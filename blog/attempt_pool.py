@@ -0,0 +1,147 @@
+# blog/attempt_pool.py
+
+"""
+İmtahan başlanğıcı üçün əvvəlcədən hazırlanmış attempt-lər.
+
+Sinif eyni anda "Başla" basanda hər request sual seçib bulk insert etməsin deyə,
+imtahan aktivləşəndə icazəli tələbələr üçün attempt + sual dəsti arxa fonda
+yaradılır (status="prepared", attempt_number=0). Başlamaq = bir UPDATE ilə
+həmin sətri götürmək (claim).
+
+- prepared attempt-lər ExamAttempt.objects-də görünmür (ExamAttemptManager)
+- unique_together (user, exam, attempt_number) sayəsində user başına ən çox biri olur
+- imtahan deaktiv olanda hazırlanmış attempt-lər silinir
+"""
+
+from __future__ import annotations
+
+import logging
+import threading
+from typing import List, Optional, Set
+
+from django.conf import settings
+from django.db import IntegrityError, close_old_connections, transaction
+from django.db.models import Count
+from django.utils import timezone
+
+from .models import Exam, ExamAnswer, ExamAttempt
+from .question_selection import attempt_seed, exam_question_index, needed_question_count, select_question_ids
+
+logger = logging.getLogger(__name__)
+
+PREPARED = "prepared"
+BATCH_SIZE = 200
+
+
+def prewarm_enabled() -> bool:
+    return getattr(settings, "EXAM_PREWARM_ATTEMPTS", True)
+
+
+def allowed_student_ids(exam: Exam) -> Set[int]:
+    """allowed_users + icazəli qrupların aktiv üzvləri (public imtahanda siyahı yoxdursa boş)."""
+    ids = set(exam.allowed_users.filter(is_active=True).values_list("id", flat=True))
+    ids.update(
+        exam.allowed_groups.filter(students__is_active=True).values_list("students__id", flat=True)
+    )
+    ids.discard(exam.author_id)
+    return ids
+
+
+def exhausted_student_ids(exam: Exam) -> Set[int]:
+    """_start_or_resume_attempt kimi: bitmiş cəhdləri limitə çatanlar yeni attempt başlaya bilməz."""
+    max_attempts = exam.max_attempts_per_user or 1
+    return set(
+        ExamAttempt.objects
+        .filter(exam=exam, status__in=["submitted", "expired"])
+        .values("user_id")
+        .annotate(n=Count("id"))
+        .filter(n__gte=max_attempts)
+        .values_list("user_id", flat=True)
+    )
+
+
+def prewarm_exam(exam_id: int, batch_size: int = BATCH_SIZE, require_active: bool = True) -> int:
+    """
+    İcazəli tələbələr üçün hazırlanmış attempt-lər yaradır. Yaradılan sayı qaytarır.
+    Təkrar çağırmaq təhlükəsizdir: artıq hazırlığı / aktiv attempt-i olanlar və
+    cəhd limitini bitirənlər keçilir.
+    require_active=False: planlı açılışdan əvvəl (scheduler) hazırlamaq üçün.
+    """
+    exam = Exam.objects.filter(id=exam_id).first()
+    if exam is None or (require_active and not exam.is_active):
+        return 0
+
+    index = exam_question_index(exam.id)
+    needed = needed_question_count(exam, index["total"])
+    if not needed:
+        return 0
+
+    busy = set(
+        ExamAttempt.all_objects
+        .filter(exam=exam, status__in=[PREPARED, "draft", "in_progress"])
+        .values_list("user_id", flat=True)
+    )
+    student_ids: List[int] = sorted(allowed_student_ids(exam) - busy - exhausted_student_ids(exam))
+
+    created = 0
+    for start in range(0, len(student_ids), batch_size):
+        chunk = student_ids[start:start + batch_size]
+        try:
+            with transaction.atomic():
+                attempts = ExamAttempt.all_objects.bulk_create([
+                    ExamAttempt(exam=exam, user_id=uid, status=PREPARED, attempt_number=0)
+                    for uid in chunk
+                ])
+                ExamAnswer.objects.bulk_create([
+                    ExamAnswer(attempt=a, question_id=qid)
+                    for a in attempts
+                    for qid in select_question_ids(index, needed, attempt_seed(a))
+                ])
+        except IntegrityError:
+            # paralel prewarm eyni user-i artıq hazırlayıb — bu chunk-ı keçirik
+            logger.info("prewarm chunk skipped for exam %s", exam.id)
+            continue
+        created += len(attempts)
+    return created
+
+
+def prewarm_in_background(exam_id: int) -> None:
+    """Transaction commit olunandan sonra ayrıca thread-də prewarm."""
+
+    def run():
+        try:
+            n = prewarm_exam(exam_id)
+            logger.info("prewarmed %s attempts for exam %s", n, exam_id)
+        except Exception:
+            logger.exception("prewarm failed for exam %s", exam_id)
+        finally:
+            close_old_connections()
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
+
+
+def discard_prepared(exam_id: int) -> int:
+    _, per_model = ExamAttempt.all_objects.filter(exam_id=exam_id, status=PREPARED).delete()
+    return per_model.get(ExamAttempt._meta.label, 0)
+
+
+def claim_prepared_attempt(exam: Exam, user, attempt_number: int) -> Optional[int]:
+    """
+    Hazır attempt varsa onu bir UPDATE ilə "in_progress" edir və id-sini qaytarır.
+    Yarış halında (eyni user iki tab) yalnız biri status=prepared şərtini ödəyir.
+    """
+    attempt_id = (
+        ExamAttempt.all_objects
+        .filter(exam=exam, user=user, status=PREPARED)
+        .values_list("id", flat=True)
+        .first()
+    )
+    if attempt_id is None:
+        return None
+
+    claimed = ExamAttempt.all_objects.filter(id=attempt_id, status=PREPARED).update(
+        status="in_progress",
+        attempt_number=attempt_number,
+        started_at=timezone.now(),
+    )
+    return attempt_id if claimed else None
@@ -0,0 +1,100 @@
+# blog/blob_refs.py
+
+"""
+Content-addressed blob-ların istinad sayı (FileBlob.ref_count) və GC.
+
+- ExamAnswerFile yarananda həmin blob-un ref_count-u +1, silinəndə -1
+  (cascade silinmələr də daxil — post_delete hər sətir üçün gəlir)
+- collect_garbage:
+  1) ref_count=0 olan və GRACE müddətində toxunulmamış blob-lar silinir
+     (şəkillərin kiçildilmiş nüsxələri ilə birlikdə)
+  2) storage-də olub FileBlob sətri olmayan köhnə fayllar (yarımçıq qalmış
+     yazılar) silinir
+  Storage təkrar yükləmədə blob-un mtime-ını yeniləyir, ona görə GC yenicə
+  dedup olunmuş blob-u silmir.
+"""
+
+from __future__ import annotations
+
+import os
+import time
+from datetime import timedelta
+from typing import Dict
+
+from django.db.models import F
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from django.utils import timezone
+
+from .image_renditions import delete_renditions
+from .models import ExamAnswerFile, FileBlob
+from .storage import answer_file_storage
+
+GC_GRACE_HOURS = 1
+
+
+@receiver(post_save, sender=ExamAnswerFile)
+def _answer_file_saved(sender, instance, created, **kwargs):
+    name = instance.file.name
+    if not created or not answer_file_storage.is_blob(name):
+        return
+    FileBlob.objects.get_or_create(
+        name=name,
+        defaults={"sha256": instance.sha256, "size": instance.file.size},
+    )
+    FileBlob.objects.filter(name=name).update(ref_count=F("ref_count") + 1, updated_at=timezone.now())
+
+
+@receiver(post_delete, sender=ExamAnswerFile)
+def _answer_file_deleted(sender, instance, **kwargs):
+    name = instance.file.name
+    if not answer_file_storage.is_blob(name):
+        return
+    FileBlob.objects.filter(name=name, ref_count__gt=0).update(
+        ref_count=F("ref_count") - 1, updated_at=timezone.now()
+    )
+
+
+def _older_than(name: str, cutoff_ts: float) -> bool:
+    try:
+        return os.path.getmtime(answer_file_storage.path(name)) < cutoff_ts
+    except FileNotFoundError:
+        return True
+
+
+def collect_garbage(grace_hours: int = GC_GRACE_HOURS, dry_run: bool = False) -> Dict[str, int]:
+    stats = {"blobs": 0, "orphans": 0, "bytes": 0}
+    cutoff = timezone.now() - timedelta(hours=grace_hours)
+    cutoff_ts = time.time() - grace_hours * 3600
+
+    for blob in FileBlob.objects.filter(ref_count=0, updated_at__lt=cutoff).iterator():
+        if not _older_than(blob.name, cutoff_ts):
+            continue
+        if dry_run:
+            deleted = 1
+        else:
+            # arada yeni istinad yaranıbsa ref_count artıq 0 deyil
+            deleted, _ = FileBlob.objects.filter(id=blob.id, ref_count=0).delete()
+            if deleted:
+                answer_file_storage.delete(blob.name)
+                delete_renditions(blob.name)
+        if deleted:
+            stats["blobs"] += 1
+            stats["bytes"] += blob.size
+
+    root = answer_file_storage.path(answer_file_storage.prefix)
+    for dirpath, _, filenames in os.walk(root):
+        for filename in filenames:
+            full = os.path.join(dirpath, filename)
+            name = os.path.relpath(full, answer_file_storage.location).replace(os.sep, "/")
+            if not _older_than(name, cutoff_ts):
+                continue
+            if FileBlob.objects.filter(name=name).exists() or ExamAnswerFile.objects.filter(file=name).exists():
+                continue
+            stats["orphans"] += 1
+            stats["bytes"] += os.path.getsize(full)
+            if not dry_run:
+                answer_file_storage.delete(name)
+                delete_renditions(name)
+
+    return stats
@@ -0,0 +1,169 @@
+# blog/consumers.py
+
+"""
+İmtahan attempt-i üçün WebSocket (optional: EXAM_WS_AUTOSAVE=True).
+
+- client dəyişən cavabları göndərir: {"type": "answers", "answers": {...}}
+  (format: blog/attempt_autosave.parse_changes). Cavablar yaddaşdakı buffer-ə
+  düşür, flusher bütün attempt-ləri toplu yazır və {"type": "saved"} göndərir
+- server qalan vaxtı özü hesablayır və periodik göndərir: {"type": "time"}
+- deadline çatanda buffer yazılır, attempt "expired" olur: {"type": "finished"}
+- HTTP yolu (form POST + JSON autosave) fallback kimi qalır
+Group: exam_attempt_<id>
+"""
+
+from __future__ import annotations
+
+import asyncio
+import math
+from typing import Any, Dict, Optional
+
+from channels.db import database_sync_to_async
+from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from django.urls import reverse
+from django.utils import timezone
+
+from blogApp.metrics import instrument_event
+
+from .attempt_autosave import (
+    OPEN_STATUSES,
+    attempt_deadline,
+    attempt_group,
+    buffer,
+    ensure_flusher,
+    flush_buffer,
+    parse_changes,
+    ws_autosave_enabled,
+)
+from .models import ExamAttempt
+
+
+class ExamAttemptConsumer(AsyncJsonWebsocketConsumer):
+
+    # qalan vaxt bu intervalla yenidən göndərilir (client saatı sürüşməsin)
+    TIME_SYNC_SECONDS = 30
+
+    attempt_id: Optional[int] = None
+    deadline = None
+    _timer: Optional[asyncio.Task] = None
+
+    @instrument_event
+    async def connect(self):
+        user = self.scope.get("user")
+        if not ws_autosave_enabled() or user is None or not user.is_authenticated:
+            await self.close()
+            return
+
+        info = await self._load_attempt(int(self.scope["url_route"]["kwargs"]["attempt_id"]), user.id)
+        if info is None:
+            await self.close()
+            return
+
+        self.attempt_id = info["id"]
+        self.deadline = info["deadline"]
+        self.result_url = info["result_url"]
+        self.group_name = attempt_group(self.attempt_id)
+
+        await self.channel_layer.group_add(self.group_name, self.channel_name)
+        await self.accept()
+        ensure_flusher()
+
+        await self._send_time()
+        self._timer = asyncio.ensure_future(self._timer_loop())
+
+    async def disconnect(self, close_code):
+        if self.attempt_id is None:
+            return
+        if self._timer is not None:
+            self._timer.cancel()
+        await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        # bu socket-in yazılmamış dəyişiklikləri gözləmədən yazılır
+        await database_sync_to_async(flush_buffer)(self.attempt_id)
+
+    @instrument_event
+    async def receive_json(self, data, **kwargs):
+        msg_type = (data or {}).get("type")
+
+        if msg_type == "answers":
+            if self._remaining_seconds() == 0:
+                await self._finish()
+                return
+            try:
+                changes = parse_changes(data)
+            except ValueError as e:
+                await self.send_json({"type": "error", "message": str(e)})
+                return
+            buffer.add(self.attempt_id, changes)
+            await self.send_json({"type": "queued", "question_ids": list(changes)})
+
+        elif msg_type == "flush":
+            # "Draft kimi saxla" düyməsi: flusher-i gözləmədən
+            versions = await database_sync_to_async(flush_buffer)(self.attempt_id)
+            await self.send_json({"type": "saved", "version": versions.get(self.attempt_id)})
+
+        elif msg_type == "time":
+            await self._send_time()
+
+    async def autosave_saved(self, event):
+        # flusher -> group_send(..., {"type": "autosave.saved", "version": n})
+        await self.send_json({"type": "saved", "version": event.get("version")})
+
+    # -------------------- timer --------------------
+
+    def _remaining_seconds(self) -> Optional[int]:
+        if self.deadline is None:
+            return None
+        return max(0, math.ceil((self.deadline - timezone.now()).total_seconds()))
+
+    async def _send_time(self):
+        await self.send_json({"type": "time", "remaining_seconds": self._remaining_seconds()})
+
+    async def _timer_loop(self):
+        while True:
+            remaining = self._remaining_seconds()
+            if remaining == 0:
+                await self._finish()
+                return
+            wait = self.TIME_SYNC_SECONDS if remaining is None else min(self.TIME_SYNC_SECONDS, remaining)
+            await asyncio.sleep(wait)
+            if self._remaining_seconds() != 0:
+                await self._send_time()
+
+    async def _finish(self):
+        await self._expire_attempt()
+        await self.send_json({"type": "finished", "redirect_url": self.result_url})
+        await self.close()
+
+    # -------------------- DB helpers --------------------
+
+    @database_sync_to_async
+    def _load_attempt(self, attempt_id: int, user_id: int) -> Optional[Dict[str, Any]]:
+        attempt = (
+            ExamAttempt.objects
+            .select_related("exam")
+            .filter(id=attempt_id, user_id=user_id, status__in=OPEN_STATUSES)
+            .first()
+        )
+        if attempt is None:
+            return None
+        return {
+            "id": attempt.id,
+            "deadline": attempt_deadline(attempt),
+            "result_url": reverse("exam_result", kwargs={"slug": attempt.exam.slug, "attempt_id": attempt.id}),
+        }
+
+    @database_sync_to_async
+    def _expire_attempt(self) -> None:
+        """Deadline: buffer-dəki son cavablar yazılır, attempt hələ açıqdırsa bağlanır."""
+        flush_buffer(self.attempt_id)
+        attempt = (
+            ExamAttempt.objects
+            .select_related("exam")
+            .filter(id=self.attempt_id, status__in=OPEN_STATUSES)
+            .first()
+        )
+        if attempt is None:
+            return
+        if attempt.exam.exam_type == "test":
+            attempt.recalculate_score()
+        attempt.mark_finished(status="expired")
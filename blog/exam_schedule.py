@@ -0,0 +1,95 @@
+# blog/exam_schedule.py
+
+"""
+Planlı imtahan pəncərələri (Exam.opens_at / closes_at).
+
+run_schedule() periodik çağırılır (manage.py run_exam_scheduler --loop):
+1) yaxın PREWARM_LEAD_SECONDS ərzində açılacaq imtahanlar üçün sual indeksi və
+   hazırlanmış attempt-lər əvvəlcədən qurulur
+2) vaxtı çatanlar aktiv olur (schedule_state="opened")
+3) bağlanma vaxtı keçənlər deaktiv olur (schedule_state="closed"), hazırlıqlar silinir
+
+schedule_state sayəsində hər addım bir dəfə icra olunur — müəllim pəncərə
+daxilində imtahanı əl ilə söndürsə, scheduler onu yenidən açmır.
+
+Açılışdan sonrakı ilk RAMP_SECONDS ərzində tələbələr user id hash-inə görə
+paylanır (admission_delay) ki, hamı eyni saniyədə attempt yaratmasın.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import math
+from datetime import timedelta
+from typing import Dict
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .attempt_pool import discard_prepared, prewarm_enabled, prewarm_exam
+from .models import Exam
+from .question_selection import exam_question_index
+
+RAMP_SECONDS = getattr(settings, "EXAM_START_RAMP_SECONDS", 60)
+PREWARM_LEAD_SECONDS = getattr(settings, "EXAM_PREWARM_LEAD_SECONDS", 300)
+
+
+def _prewarm(exam_id: int) -> int:
+    exam_question_index(exam_id)
+    if not prewarm_enabled():
+        return 0
+    return prewarm_exam(exam_id, require_active=False)
+
+
+def run_schedule(now=None) -> Dict[str, int]:
+    now = now or timezone.now()
+    stats = {"prewarmed": 0, "opened": 0, "closed": 0}
+
+    upcoming = (
+        Exam.objects
+        .filter(schedule_state="", opens_at__gt=now, opens_at__lte=now + timedelta(seconds=PREWARM_LEAD_SECONDS))
+        .filter(Q(closes_at__isnull=True) | Q(closes_at__gt=now))
+        .values_list("id", flat=True)
+    )
+    for exam_id in upcoming:
+        stats["prewarmed"] += _prewarm(exam_id)
+
+    to_open = list(
+        Exam.objects
+        .filter(schedule_state="", opens_at__lte=now)
+        .filter(Q(closes_at__isnull=True) | Q(closes_at__gt=now))
+        .values_list("id", flat=True)
+    )
+    if to_open:
+        stats["opened"] = Exam.objects.filter(id__in=to_open).update(is_active=True, schedule_state="opened")
+        for exam_id in to_open:
+            stats["prewarmed"] += _prewarm(exam_id)
+
+    to_close = list(
+        Exam.objects
+        .filter(closes_at__lte=now)
+        .exclude(schedule_state="closed")
+        .values_list("id", flat=True)
+    )
+    if to_close:
+        stats["closed"] = Exam.objects.filter(id__in=to_close).update(is_active=False, schedule_state="closed")
+        for exam_id in to_close:
+            discard_prepared(exam_id)
+
+    return stats
+
+
+def admission_delay(exam: Exam, user, now=None) -> int:
+    """
+    Planlı açılışdan sonra bu user neçə saniyə gözləməlidir (0 = indi başlaya bilər).
+    Offset exam + user id-dən çıxır, yəni eyni user üçün sabitdir.
+    """
+    if not exam.opens_at or RAMP_SECONDS <= 0 or user.id == exam.author_id:
+        return 0
+
+    now = now or timezone.now()
+    digest = hashlib.sha1(f"{exam.id}:{user.id}".encode("utf-8")).hexdigest()
+    offset = int(digest[:8], 16) % RAMP_SECONDS
+    wait = (exam.opens_at + timedelta(seconds=offset) - now).total_seconds()
+    return max(0, math.ceil(wait))
@@ -177,6 +177,8 @@ class ExamForm(forms.ModelForm):
             "total_duration_minutes",
             "default_question_time_seconds",
             "max_attempts_per_user",
+            "opens_at",
+            "closes_at",
         ]
         widgets = {
             "title": forms.TextInput(attrs={
@@ -220,6 +222,14 @@ class ExamForm(forms.ModelForm):
                 "class": "form-control",
                 "placeholder": "Məs: 1, 2, 3...",
             }),
+            "opens_at": forms.DateTimeInput(
+                attrs={"class": "form-control", "type": "datetime-local"},
+                format="%Y-%m-%dT%H:%M",
+            ),
+            "closes_at": forms.DateTimeInput(
+                attrs={"class": "form-control", "type": "datetime-local"},
+                format="%Y-%m-%dT%H:%M",
+            ),
         }
         labels = {
             "title": "İmtahan adı",
@@ -233,6 +243,8 @@ class ExamForm(forms.ModelForm):
             "total_duration_minutes": "Ümumi müddət (dəqiqə)",
             "default_question_time_seconds": "Hər sual üçün default vaxt (saniyə)",
             "max_attempts_per_user": "Bir istifadəçi üçün maksimum cəhd sayı",
+            "opens_at": "Avtomatik açılma vaxtı",
+            "closes_at": "Avtomatik bağlanma vaxtı",
         }
 
     def __init__(self, *args, **kwargs):
@@ -269,6 +281,18 @@ class ExamForm(forms.ModelForm):
 
         return code
 
+    def clean(self):
+        cleaned = super().clean()
+        opens_at = cleaned.get("opens_at")
+        closes_at = cleaned.get("closes_at")
+        if opens_at and closes_at and closes_at <= opens_at:
+            self.add_error("closes_at", "Bağlanma vaxtı açılma vaxtından sonra olmalıdır.")
+
+        # pəncərə dəyişibsə scheduler onu yenidən icra etməlidir
+        if {"opens_at", "closes_at"} & set(self.changed_data):
+            self.instance.schedule_state = ""
+        return cleaned
+
 
 class ExamQuestionCreateForm(forms.ModelForm):
     """
@@ -0,0 +1,361 @@
+# blog/image_proxy.py
+
+"""
+Post.image_url üçün fetch-and-cache proxy.
+
+Əvvəl hər ziyarətçinin brauzeri üçüncü tərəf URL-i özü yükləyirdi (ölçüsüz,
+cache-siz, latency bizdən asılı deyil). İndi şəkil bir dəfə serverdə yüklənir:
+
+- yalnız http(s), private / loopback ünvanlar qadağandır (SSRF), redirect-lər
+  əl ilə izlənir ki, hər addım yenidən yoxlansın. Bağlantı yoxlanılmış IP-yə
+  açılır (DNS rebinding: ikinci resolve başqa ünvan qaytara bilməz), TLS
+  sertifikatı isə host adına görə yoxlanılır
+- cavab MAX_REMOTE_BYTES-dan böyükdürsə və ya bütün yükləmə FETCH_DEADLINE-dan
+  uzun çəkirsə dayandırılır
+- Pillow ilə açılır, piksel limiti yoxlanılır, uzun tərəf RENDITION_SIZES["large"]-a
+  qədər kiçildilib WebP kimi default storage-də saxlanılır:
+      remote_images/<ab>/<sha256(url)>.webp
+  ölçülər (thumb/card) blog/image_renditions.py ilə bu fayldan yaradılır
+- köhnəlmiş (REFRESH_HOURS) nüsxə dərhal verilir, yenisi arxa fonda yüklənir
+  (stale-while-revalidate); uğursuz yeniləmə köhnəni saxlayır. Son yoxlama
+  vaxtı cache-də saxlanılır (storage-in mtime-ına toxunulmur)
+- yeni məzmun müvəqqəti adla yazılıb yerinə köçürülür, oxuyan heç vaxt silinmiş
+  və ya yarımçıq fayl görmür
+- ilk yükləmə alınmasa nəticə FAILURE_MINUTES cache-lənir; bu müddətdə (və
+  eyni şəkil başqa request-də yüklənərkən) view orijinal URL-ə yönləndirir
+
+Proxy açıq deyil: view yalnız postun öz image_url-ini yükləyir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import ipaddress
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timezone as dt_timezone
+from typing import Iterator, Optional
+from urllib.parse import urljoin, urlsplit, urlunsplit
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+from .image_renditions import MAX_SOURCE_PIXELS, RENDITION_SIZES, delete_renditions
+
+logger = logging.getLogger(__name__)
+
+PROXY_PREFIX = "remote_images"
+MAX_REMOTE_BYTES = 5 * 1024 * 1024
+MAX_REDIRECTS = 3
+# (connect, read) saniyə
+FETCH_TIMEOUT = (3, 10)
+# bütün yükləmə (redirect-lər və yavaş gələn bədən daxil), saniyə
+FETCH_DEADLINE = 15
+REFRESH_HOURS = 24
+FAILURE_MINUTES = 10
+CACHE_MAX_AGE = 30 * 24 * 3600
+
+# ad -> [lock, istifadəçi sayı]; sonuncu çıxanda silinir
+_locks = {}
+_locks_guard = threading.Lock()
+_refreshing = set()
+
+
+class RemoteImageError(Exception):
+    pass
+
+
+def proxy_enabled() -> bool:
+    return getattr(settings, "IMAGE_PROXY_ENABLED", True)
+
+
+def url_key(url: str) -> str:
+    return hashlib.sha256(url.encode("utf-8")).hexdigest()
+
+
+def cached_name(url: str) -> str:
+    key = url_key(url)
+    return f"{PROXY_PREFIX}/{key[:2]}/{key}.webp"
+
+
+def _refresh_seconds() -> int:
+    return int(getattr(settings, "IMAGE_PROXY_REFRESH_HOURS", REFRESH_HOURS) * 3600)
+
+
+def _failure_seconds() -> int:
+    return int(getattr(settings, "IMAGE_PROXY_FAILURE_MINUTES", FAILURE_MINUTES) * 60)
+
+
+def _checked_key(name: str) -> str:
+    return f"image_proxy:checked:{name}"
+
+
+def _failed_key(url: str) -> str:
+    return f"image_proxy:failed:{url_key(url)}"
+
+
+# -------------------------
+# Fetch + validate
+# -------------------------
+
+def _check_url(url: str) -> str:
+    """URL-i yoxlayır, bağlantının açılacağı (yoxlanılmış) IP-ni qaytarır."""
+    parts = urlsplit(url)
+    if parts.scheme not in ("http", "https") or not parts.hostname:
+        raise RemoteImageError("yalnız http(s) URL")
+    port = parts.port or (443 if parts.scheme == "https" else 80)
+    try:
+        infos = socket.getaddrinfo(parts.hostname, port, proto=socket.IPPROTO_TCP)
+    except socket.gaierror as e:
+        raise RemoteImageError(f"host tapılmadı: {parts.hostname}") from e
+    addresses = [ipaddress.ip_address(info[4][0]) for info in infos]
+    if not getattr(settings, "IMAGE_PROXY_ALLOW_PRIVATE", False):
+        for ip in addresses:
+            if not ip.is_global:
+                raise RemoteImageError(f"qadağan olunmuş ünvan: {ip}")
+    return str(addresses[0])
+
+
+class _PinnedAdapter(requests.adapters.HTTPAdapter):
+    """URL-də IP olsa da SNI və sertifikat yoxlaması host adına görə aparılır."""
+
+    def __init__(self, hostname: str, **kwargs):
+        self._hostname = hostname
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        # http pool-ları bu açarı özləri atır
+        kwargs["server_hostname"] = self._hostname
+        super().init_poolmanager(*args, **kwargs)
+
+
+def _pinned_get(url: str, ip: str, timeout) -> requests.Response:
+    parts = urlsplit(url)
+    host = f"[{ip}]" if ":" in ip else ip
+    netloc = f"{host}:{parts.port}" if parts.port else host
+    target = urlunsplit((parts.scheme, netloc, parts.path or "/", parts.query, ""))
+
+    session = requests.Session()
+    # mühitdəki proxy-lər yoxlanılmış ünvanı yan keçməsin
+    session.trust_env = False
+    session.mount(f"{parts.scheme}://", _PinnedAdapter(parts.hostname))
+    try:
+        return session.get(
+            target,
+            headers={"Host": parts.netloc.rpartition("@")[2]},
+            stream=True,
+            timeout=timeout,
+            allow_redirects=False,
+        )
+    finally:
+        # açıq cavabın bağlantısı response.close()-a qədər yaşayır
+        session.close()
+
+
+def _remaining(deadline: float) -> float:
+    left = deadline - time.monotonic()
+    if left <= 0:
+        raise RemoteImageError("yükləmə çox uzun çəkdi")
+    return left
+
+
+def fetch_remote(url: str) -> bytes:
+    """Redirect-ləri (MAX_REDIRECTS) yoxlayaraq izləyir, bədəni limitlə oxuyur."""
+    deadline = time.monotonic() + FETCH_DEADLINE
+    for _ in range(MAX_REDIRECTS + 1):
+        ip = _check_url(url)
+        left = _remaining(deadline)
+        try:
+            response = _pinned_get(url, ip, (min(FETCH_TIMEOUT[0], left), min(FETCH_TIMEOUT[1], left)))
+        except requests.RequestException as e:
+            raise RemoteImageError(str(e)) from e
+
+        with response:
+            if response.is_redirect:
+                url = urljoin(url, response.headers.get("Location", ""))
+                continue
+            if response.status_code != 200:
+                raise RemoteImageError(f"HTTP {response.status_code}")
+            content_type = response.headers.get("Content-Type", "")
+            if not content_type.startswith("image/"):
+                raise RemoteImageError(f"şəkil deyil: {content_type or '?'}")
+            declared = response.headers.get("Content-Length")
+            if declared and declared.isdigit() and int(declared) > MAX_REMOTE_BYTES:
+                raise RemoteImageError("şəkil çox böyükdür")
+
+            body = bytearray()
+            try:
+                for block in response.iter_content(64 * 1024):
+                    body += block
+                    # Content-Length olmaya və ya yalan ola bilər
+                    if len(body) > MAX_REMOTE_BYTES:
+                        raise RemoteImageError("şəkil çox böyükdür")
+                    _remaining(deadline)
+            except requests.RequestException as e:
+                raise RemoteImageError(str(e)) from e
+            return bytes(body)
+
+    raise RemoteImageError("həddən çox redirect")
+
+
+def normalize_image(data: bytes) -> bytes:
+    try:
+        img = Image.open(io.BytesIO(data))
+    except UnidentifiedImageError as e:
+        raise RemoteImageError("şəkil açılmadı") from e
+    if img.width * img.height > MAX_SOURCE_PIXELS:
+        raise RemoteImageError("şəkil çox böyükdür")
+
+    edge = RENDITION_SIZES["large"]
+    img.draft("RGB", (edge, edge))
+    try:
+        img.load()
+    except OSError as e:
+        raise RemoteImageError("şəkil zədəlidir") from e
+    img = ImageOps.exif_transpose(img)
+    if img.mode not in ("RGB", "RGBA"):
+        img = img.convert("RGBA" if "A" in img.getbands() or "transparency" in img.info else "RGB")
+    img.thumbnail((edge, edge), Image.LANCZOS)
+
+    out = io.BytesIO()
+    img.save(out, "WEBP", quality=80, method=4)
+    return out.getvalue()
+
+
+# -------------------------
+# Cache
+# -------------------------
+
+@contextmanager
+def _name_lock(name: str) -> Iterator[bool]:
+    """Gözləmədən götürülən lock; artıq tutulubsa False verir."""
+    with _locks_guard:
+        entry = _locks.setdefault(name, [threading.Lock(), 0])
+        entry[1] += 1
+    acquired = entry[0].acquire(blocking=False)
+    try:
+        yield acquired
+    finally:
+        if acquired:
+            entry[0].release()
+        with _locks_guard:
+            entry[1] -= 1
+            if not entry[1]:
+                del _locks[name]
+
+
+def _store(name: str, data: bytes) -> None:
+    """Müvəqqəti adla yazıb yerinə köçürür; köhnə nüsxə sonuna qədər oxuna bilir."""
+    temp = default_storage.save(f"{name}.{uuid.uuid4().hex}.tmp", ContentFile(data))
+    try:
+        os.replace(default_storage.path(temp), default_storage.path(name))
+    except NotImplementedError:
+        # yerli yolu olmayan storage (S3 və s.): rename yoxdur, obyekt yazısı özü bütövdür
+        default_storage.delete(temp)
+        if default_storage.exists(name):
+            default_storage.delete(name)
+        default_storage.save(name, ContentFile(data))
+    except OSError:
+        default_storage.delete(temp)
+        raise
+    # köhnə şəkildən yaradılmış ölçülər də yenilənməlidir
+    delete_renditions(name)
+
+
+def _mark_checked(name: str) -> None:
+    # növbəti yoxlama yalnız REFRESH_HOURS sonra
+    cache.set(_checked_key(name), True, _refresh_seconds())
+
+
+def refresh(url: str) -> bool:
+    """Şəkli yenidən yükləyir; məzmun dəyişibsə True. Uğursuzluqda köhnə qalır."""
+    name = cached_name(url)
+    with _name_lock(name) as acquired:
+        if not acquired:
+            # eyni şəkil artıq yüklənir
+            return False
+        try:
+            data = normalize_image(fetch_remote(url))
+        except RemoteImageError as e:
+            logger.info("image proxy refresh failed for %s: %s", url, e)
+            if default_storage.exists(name):
+                _mark_checked(name)
+            raise
+
+        if default_storage.exists(name):
+            with default_storage.open(name, "rb") as fh:
+                if fh.read() == data:
+                    _mark_checked(name)
+                    return False
+        _store(name, data)
+        return True
+
+
+def ensure_cached(url: str) -> str:
+    """
+    Nüsxə yoxdursa sinxron yükləyir, varsa və köhnədirsə arxa fonda yeniləyir.
+    RemoteImageError: yükləmə alınmadı, bu yaxınlarda alınmamışdı və ya başqa
+    request hələ yükləyir — view orijinal URL-ə yönləndirir.
+    """
+    name = cached_name(url)
+    if default_storage.exists(name):
+        if is_stale(name):
+            refresh_in_background(url)
+        return name
+
+    if cache.get(_failed_key(url)):
+        raise RemoteImageError("şəkil bu yaxınlarda yüklənmədi")
+    with _name_lock(name) as acquired:
+        if not acquired:
+            # eyni şəkil üçün paralel ilk request-lər gözləməsin
+            raise RemoteImageError("şəkil hələ yüklənir")
+        if not default_storage.exists(name):
+            try:
+                data = normalize_image(fetch_remote(url))
+            except RemoteImageError:
+                cache.set(_failed_key(url), True, _failure_seconds())
+                raise
+            _store(name, data)
+    return name
+
+
+def is_stale(name: str) -> bool:
+    if cache.get(_checked_key(name)):
+        return False
+    modified: datetime = default_storage.get_modified_time(name)
+    age = datetime.now(dt_timezone.utc) - modified.astimezone(dt_timezone.utc)
+    return age.total_seconds() > _refresh_seconds()
+
+
+def refresh_in_background(url: str) -> Optional[threading.Thread]:
+    with _locks_guard:
+        if url in _refreshing:
+            return None
+        _refreshing.add(url)
+
+    def run():
+        started = time.monotonic()
+        try:
+            changed = refresh(url)
+            logger.info("image proxy refreshed %s (changed=%s, %.2fs)", url, changed, time.monotonic() - started)
+        except RemoteImageError:
+            pass
+        except Exception:
+            logger.exception("image proxy refresh crashed for %s", url)
+        finally:
+            with _locks_guard:
+                _refreshing.discard(url)
+
+    thread = threading.Thread(target=run, daemon=True)
+    thread.start()
+    return thread
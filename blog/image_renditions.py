@@ -0,0 +1,212 @@
+# blog/image_renditions.py
+
+"""
+Şəkillərin kiçildilmiş nüsxələri (Post.image, ExamAnswerFile şəkilləri).
+
+Kartlar əvvəl orijinalı (bəzən bir neçə MB) yükləyirdi. İndi yükləmədən sonra
+arxa fonda (ayrıca thread, transaction commit-dən sonra) hər ölçü üçün WebP və
+JPEG nüsxə yaradılıb default storage-də saxlanılır:
+
+    renditions/<ölçü>/<orijinal yol, uzantısı ilə>.<webp|jpg>
+
+(uzantı saxlanılır: a.png və a.jpg eyni nüsxəyə düşməsin). Ad orijinal yoldan
+çıxır, ona görə axtarış = bir storage.exists. Nüsxə hələ yoxdursa orijinalın
+URL-i qaytarılır və yaradılma planlanır (köhnə şəkillər də beləcə ilk baxışda
+hazırlanır).
+
+Açılmayan / zədəli / çox böyük mənbə üçün renditions/failed/<orijinal yol>
+marker-i yazılır: sonrakı baxışlar yaradılmanı yenidən planlamır. Marker
+delete_renditions ilə (mənbə silinəndə / yenilənəndə) silinir.
+
+Bu modul model import etmir (models.py get_image üçün onu import edir),
+signal-lar "blog.Post" kimi adla bağlanır.
+"""
+
+from __future__ import annotations
+
+import io
+import logging
+import os
+import threading
+from typing import Optional
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import close_old_connections, transaction
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+from PIL import Image, ImageOps, UnidentifiedImageError
+
+logger = logging.getLogger(__name__)
+
+RENDITION_PREFIX = "renditions"
+FAILED_PREFIX = f"{RENDITION_PREFIX}/failed"
+# ölçü adı -> uzun tərəfin maksimumu (px); kiçik şəkil böyüdülmür
+RENDITION_SIZES = {"thumb": 320, "card": 640, "large": 1280}
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+IMAGE_EXTENSIONS = {".jpg", ".jpeg", ".png", ".gif", ".webp"}
+# decompression bomb: bundan böyük şəkillər emal olunmur
+MAX_SOURCE_PIXELS = 40_000_000
+
+_pending = set()
+_pending_lock = threading.Lock()
+
+
+def is_image_name(name: str) -> bool:
+    return os.path.splitext(name or "")[1].lower() in IMAGE_EXTENSIONS
+
+
+def rendition_name(source_name: str, size: str, fmt: str = "webp") -> str:
+    return f"{RENDITION_PREFIX}/{size}/{source_name}.{fmt}"
+
+
+def failure_marker_name(source_name: str) -> str:
+    return f"{FAILED_PREFIX}/{source_name}"
+
+
+def ready_rendition(storage, source_name: str, size: str, fmt: str = "webp") -> Optional[str]:
+    """Hazır nüsxənin adı; yoxdursa None (mənbə əvvəl alınmayıbsa yenidən planlanmır)."""
+    if size not in RENDITION_SIZES or fmt not in FORMATS:
+        raise ValueError(f"naməlum rendition: {size}/{fmt}")
+    name = rendition_name(source_name, size, fmt)
+    if default_storage.exists(name):
+        return name
+    if not default_storage.exists(failure_marker_name(source_name)):
+        schedule_renditions(storage, source_name)
+    return None
+
+
+def rendition_url(field_file, size: str, fmt: str = "webp") -> Optional[str]:
+    """Hazır nüsxənin URL-i; yoxdursa None (və yaradılma planlanır)."""
+    if size not in RENDITION_SIZES or fmt not in FORMATS:
+        raise ValueError(f"naməlum rendition: {size}/{fmt}")
+    if not field_file or not is_image_name(field_file.name):
+        return None
+    name = ready_rendition(field_file.storage, field_file.name, size, fmt)
+    return default_storage.url(name) if name else None
+
+
+def _flatten(img: Image.Image, fmt: str) -> Image.Image:
+    if fmt == "jpg":
+        if img.mode in ("RGBA", "LA"):
+            background = Image.new("RGB", img.size, (255, 255, 255))
+            background.paste(img, mask=img.getchannel("A"))
+            return background
+        return img.convert("RGB") if img.mode != "RGB" else img
+    return img if img.mode in ("RGB", "RGBA") else img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+
+def _mark_failed(name: str, reason: str) -> None:
+    marker = failure_marker_name(name)
+    if not default_storage.exists(marker):
+        default_storage.save(marker, ContentFile(reason.encode("utf-8")))
+
+
+def build_renditions(storage, name: str) -> int:
+    """Çatışmayan bütün nüsxələri yaradır; yaradılan fayl sayını qaytarır."""
+    if default_storage.exists(failure_marker_name(name)):
+        return 0
+    missing = [
+        (size, fmt)
+        for size in RENDITION_SIZES
+        for fmt in FORMATS
+        if not default_storage.exists(rendition_name(name, size, fmt))
+    ]
+    if not missing:
+        return 0
+
+    with storage.open(name, "rb") as fh:
+        try:
+            img = Image.open(fh)
+        except (UnidentifiedImageError, Image.DecompressionBombError) as e:
+            logger.info("rendition skipped, not an image: %s (%s)", name, e)
+            _mark_failed(name, "not an image")
+            return 0
+        if img.width * img.height > MAX_SOURCE_PIXELS:
+            logger.warning("rendition skipped, image too large: %s %sx%s", name, img.width, img.height)
+            _mark_failed(name, "too large")
+            return 0
+        # JPEG: ən böyük lazım olan ölçüyə qədər DCT səviyyəsində kiçildərək oxu
+        longest = max(RENDITION_SIZES[size] for size, _ in missing)
+        try:
+            img.draft("RGB", (longest, longest))
+            img.load()
+            img = ImageOps.exif_transpose(img)
+            if img.mode == "P":
+                img = img.convert("RGBA" if "transparency" in img.info else "RGB")
+        except (OSError, SyntaxError, ValueError) as e:
+            # zədəli / yarımçıq fayl
+            logger.info("rendition skipped, image is damaged: %s (%s)", name, e)
+            _mark_failed(name, "damaged")
+            return 0
+
+    created = 0
+    # böyükdən kiçiyə: hər ölçü əvvəlkindən kiçildilir (orijinal bir dəfə emal olunur)
+    for size in sorted(RENDITION_SIZES, key=RENDITION_SIZES.get, reverse=True):
+        img.thumbnail((RENDITION_SIZES[size], RENDITION_SIZES[size]), Image.LANCZOS)
+        for fmt, (pil_format, options) in FORMATS.items():
+            if (size, fmt) not in missing:
+                continue
+            out = io.BytesIO()
+            _flatten(img, fmt).save(out, pil_format, **options)
+            target = rendition_name(name, size, fmt)
+            saved = default_storage.save(target, ContentFile(out.getvalue()))
+            if saved != target:
+                # paralel thread eyni nüsxəni artıq yazıb
+                default_storage.delete(saved)
+            else:
+                created += 1
+    return created
+
+
+def schedule_renditions(storage, name: str) -> None:
+    """Commit-dən sonra ayrıca thread-də; eyni fayl üçün eyni anda bir thread."""
+
+    def start():
+        with _pending_lock:
+            if name in _pending:
+                return
+            _pending.add(name)
+        threading.Thread(target=run, daemon=True).start()
+
+    def run():
+        try:
+            build_renditions(storage, name)
+        except Exception:
+            logger.exception("rendition failed for %s", name)
+        finally:
+            with _pending_lock:
+                _pending.discard(name)
+            close_old_connections()
+
+    # rollback olsa callback da atılır
+    transaction.on_commit(start)
+
+
+def delete_renditions(name: str) -> None:
+    for size in RENDITION_SIZES:
+        for fmt in FORMATS:
+            default_storage.delete(rendition_name(name, size, fmt))
+    default_storage.delete(failure_marker_name(name))
+
+
+@receiver(post_save, sender="blog.Post")
+def _post_image_saved(sender, instance, **kwargs):
+    if instance.image and is_image_name(instance.image.name):
+        schedule_renditions(instance.image.storage, instance.image.name)
+
+
+@receiver(post_delete, sender="blog.Post")
+def _post_image_deleted(sender, instance, **kwargs):
+    if instance.image:
+        delete_renditions(instance.image.name)
+
+
+@receiver(post_save, sender="blog.ExamAnswerFile")
+def _answer_image_saved(sender, instance, created, **kwargs):
+    # blob-un nüsxələri GC ilə birlikdə silinir (blog/blob_refs.py)
+    if created and is_image_name(instance.file.name):
+        schedule_renditions(instance.file.storage, instance.file.name)
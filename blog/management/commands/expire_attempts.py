@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from blog.attempt_expiry import BATCH_SIZE, expire_all_overdue
+
+
+class Command(BaseCommand):
+    help = "Vaxtı bitmiş, submit olunmamış imtahan cəhdlərini expired edir və yenidən hesablayır (cron ilə)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--batch", type=int, default=BATCH_SIZE, help="Bir UPDATE-də neçə attempt")
+
+    def handle(self, *args, **options):
+        n = expire_all_overdue(batch_size=options["batch"])
+        self.stdout.write(self.style.SUCCESS(f"Expired attempts: {n}"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from blog.answer_uploads import STALE_UPLOAD_HOURS, discard_stale_uploads
+from blog.blob_refs import GC_GRACE_HOURS, collect_garbage
+
+
+class Command(BaseCommand):
+    help = (
+        "Yarımçıq qalmış (chunked) cavab fayl yükləmələrini və istinadsız "
+        "content-addressed blob-ları silir (cron ilə)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--hours", type=int, default=STALE_UPLOAD_HOURS, help="Bu qədər saat toxunulmayan yükləmələr")
+        parser.add_argument("--grace-hours", type=int, default=GC_GRACE_HOURS, help="İstinadsız blob bu qədər saat gözləyir")
+        parser.add_argument("--dry-run", action="store_true", help="Heç nə silmə, yalnız say")
+
+    def handle(self, *args, **options):
+        if not options["dry_run"]:
+            n = discard_stale_uploads(hours=options["hours"])
+            self.stdout.write(self.style.SUCCESS(f"Stale uploads removed: {n}"))
+
+        stats = collect_garbage(grace_hours=options["grace_hours"], dry_run=options["dry_run"])
+        prefix = "Would remove" if options["dry_run"] else "Removed"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix} blobs: {stats['blobs']}, orphan files: {stats['orphans']}, bytes: {stats['bytes']}"
+        ))
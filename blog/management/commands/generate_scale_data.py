@@ -0,0 +1,35 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from blog import scale_data
+
+
+class Command(BaseCommand):
+    help = "Yük / performans testi üçün sintetik data yaradır (bulk_create, seed ilə deterministik)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--seed", type=int, default=0, help="Eyni seed -> eyni data (username/slug prefiksi: s<seed>)")
+        parser.add_argument(
+            "--multiplier", type=float, default=1.0,
+            help="Bütün sayları vurur (məs: 0.1 sürətli lokal data, 5 prod ölçüsü)",
+        )
+        # hər ölçü ayrıca dəyişdirilə bilər: --students 20000 --questions-per-exam 300
+        for key, value in scale_data.DEFAULT_SCALE.items():
+            parser.add_argument(f"--{key.replace('_', '-')}", dest=key, type=int, default=None, help=f"default: {value}")
+
+    def handle(self, *args, **options):
+        seed = options["seed"]
+        if scale_data.seed_exists(seed):
+            raise CommandError(f"Seed {seed} üçün data artıq var — başqa --seed seçin.")
+
+        overrides = {key: options[key] for key in scale_data.DEFAULT_SCALE if options[key] is not None}
+        scale = {**scale_data.scaled(options["multiplier"]), **overrides}
+
+        started = time.perf_counter()
+        data = scale_data.generate(scale=scale, seed=seed)
+        elapsed = time.perf_counter() - started
+
+        for key in ("teachers", "students", "groups", "exams", "attempts", "posts", "subscribers", "live_sessions"):
+            self.stdout.write(f"{key:14} {len(data[key])}")
+        self.stdout.write(self.style.SUCCESS(f"Done in {elapsed:.1f}s (seed={seed})"))
@@ -0,0 +1,26 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections
+
+from blog.exam_schedule import run_schedule
+
+
+class Command(BaseCommand):
+    help = "Planlı imtahanları (opens_at / closes_at) aktiv/deaktiv edir və start-dan əvvəl hazırlayır."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--loop", action="store_true", help="Dayanmadan işləsin (cron əvəzinə)")
+        parser.add_argument("--interval", type=int, default=30, help="Dövrələr arası saniyə")
+
+    def handle(self, *args, **options):
+        while True:
+            stats = run_schedule()
+            if any(stats.values()) or not options["loop"]:
+                self.stdout.write(
+                    f"opened={stats['opened']} closed={stats['closed']} prewarmed={stats['prewarmed']}"
+                )
+            if not options["loop"]:
+                break
+            close_old_connections()
+            time.sleep(options["interval"])
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0021_alter_exam_random_question_count"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examattempt",
+            name="status",
+            field=models.CharField(
+                choices=[
+                    ("prepared", "Hazırlanıb (başlanmayıb)"),
+                    ("draft", "Draft (yarımçıq saxlanılıb)"),
+                    ("in_progress", "Davam edir"),
+                    ("submitted", "Təslim edilib"),
+                    ("expired", "Vaxt bitib"),
+                ],
+                default="in_progress",
+                max_length=20,
+                verbose_name="Status",
+            ),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0022_examattempt_prepared"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="exam",
+            name="closes_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Bu vaxt imtahan avtomatik deaktiv olur.",
+                null=True,
+                verbose_name="Bağlanma vaxtı",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exam",
+            name="opens_at",
+            field=models.DateTimeField(
+                blank=True,
+                db_index=True,
+                help_text="Bu vaxt imtahan avtomatik aktiv olur.",
+                null=True,
+                verbose_name="Açılma vaxtı",
+            ),
+        ),
+        migrations.AddField(
+            model_name="exam",
+            name="schedule_state",
+            field=models.CharField(blank=True, default="", editable=False, max_length=10),
+        ),
+    ]
@@ -0,0 +1,19 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:42
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0023_exam_schedule_window"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(fields=["status", "started_at"], name="attempt_status_started_idx"),
+        ),
+    ]
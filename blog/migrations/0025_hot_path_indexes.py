@@ -0,0 +1,46 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0024_examattempt_status_started_idx"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="exam",
+            index=models.Index(
+                condition=models.Q(("is_active", True)),
+                fields=["-created_at"],
+                name="exam_active_created_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                fields=["exam", "user", "status", "started_at"],
+                name="attempt_exam_user_status_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="examattempt",
+            index=models.Index(
+                condition=models.Q(("checked_by_teacher", False)),
+                fields=["exam", "status", "finished_at"],
+                name="attempt_review_queue_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="post",
+            index=models.Index(
+                condition=models.Q(("is_published", True)),
+                fields=["-created_at"],
+                name="post_published_created_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:47
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0025_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examattempt",
+            name="autosave_version",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+    ]
@@ -0,0 +1,36 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:54
+
+import django.db.models.deletion
+import uuid
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0026_examattempt_autosave_version"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examanswerfile",
+            name="sha256",
+            field=models.CharField(blank=True, editable=False, max_length=64),
+        ),
+        migrations.CreateModel(
+            name="ExamAnswerUpload",
+            fields=[
+                ("id", models.UUIDField(default=uuid.uuid4, editable=False, primary_key=True, serialize=False)),
+                ("filename", models.CharField(max_length=255)),
+                ("size", models.PositiveBigIntegerField()),
+                ("received", models.PositiveBigIntegerField(default=0)),
+                ("created_at", models.DateTimeField(auto_now_add=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+                ("answer", models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name="uploads", to="blog.examanswer")),
+            ],
+            options={
+                "verbose_name": "Yarımçıq yükləmə",
+                "verbose_name_plural": "Yarımçıq yükləmələr",
+            },
+        ),
+    ]
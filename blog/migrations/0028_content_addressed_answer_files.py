@@ -0,0 +1,41 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:58
+
+import blog.storage
+import blog.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0027_answer_file_uploads"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="examanswerfile",
+            name="original_name",
+            field=models.CharField(blank=True, max_length=255),
+        ),
+        migrations.AlterField(
+            model_name="examanswerfile",
+            name="file",
+            field=models.FileField(max_length=255, storage=blog.storage.get_answer_file_storage, upload_to="exam_uploads/", validators=[blog.validators.validate_file_extension, blog.validators.validate_file_size, blog.validators.validate_zip_contents], verbose_name="Fayl"),
+        ),
+        migrations.CreateModel(
+            name="FileBlob",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("name", models.CharField(max_length=255, unique=True)),
+                ("sha256", models.CharField(max_length=64)),
+                ("size", models.PositiveBigIntegerField(default=0)),
+                ("ref_count", models.PositiveIntegerField(default=0)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Fayl blob-u",
+                "verbose_name_plural": "Fayl blob-ları",
+                "indexes": [models.Index(fields=["ref_count", "updated_at"], name="fileblob_gc_idx")],
+            },
+        ),
+    ]
@@ -0,0 +1,20 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:00
+
+import blog.storage
+import blog.validators
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0028_content_addressed_answer_files"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="examanswerfile",
+            name="file",
+            field=models.FileField(max_length=255, storage=blog.storage.get_answer_file_storage, upload_to="exam_uploads/", validators=[blog.validators.validate_file_extension, blog.validators.validate_file_size, blog.validators.validate_file_signature, blog.validators.validate_zip_contents], verbose_name="Fayl"),
+        ),
+    ]
@@ -6,8 +6,14 @@ from django.utils.crypto import get_random_string
 from django.utils import timezone
 from django.contrib.auth.models import Group
 import itertools
+import uuid
 from django.templatetags.static import static
-from .validators import validate_file_extension, validate_file_size, validate_zip_contents
+from django.urls import reverse
+from django.utils.http import urlencode
+from .image_proxy import proxy_enabled, url_key
+from .image_renditions import is_image_name, rendition_url
+from .storage import get_answer_file_storage
+from .validators import validate_file_extension, validate_file_signature, validate_file_size, validate_zip_contents
 
 # ---- Models for Category functionality ----
 
@@ -67,6 +73,14 @@ class Post(models.Model):
 
     class Meta:
         ordering = ["-created_at"]
+        indexes = [
+            # home: yalnız dərc olunmuşlar, ən yenidən (partial)
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_published=True),
+                name="post_published_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.title
@@ -92,17 +106,29 @@ class Post(models.Model):
         agg = self.comments.aggregate(models.Avg("rating"))
         return agg["rating__avg"] or 0
     
-    @property
-    def get_image(self):
+    def get_image(self, size=None, fmt="webp"):
         """
         Bu metod yoxlayır:
         1. Fayl yüklənib? -> Faylın yolunu qaytar.
-        2. URL var? -> URL-i qaytar.
+           size verilibsə ("thumb" / "card" / "large") kiçildilmiş nüsxə,
+           hələ hazır deyilsə orijinal (bax: blog/image_renditions.py)
+        2. URL var? -> serverdə cache-lənmiş nüsxənin (proxy) URL-i,
+           v= image_url dəyişəndə brauzer cache-ini yeniləyir (bax: blog/image_proxy.py)
         3. Heç biri yoxdur? -> Default şəkli qaytar.
+
+        Template-də {{ post.get_image }} orijinaldır, ölçü üçün:
+        {{ post|image_size:"card" }}
         """
         if self.image:
+            if size:
+                return rendition_url(self.image, size, fmt) or self.image.url
             return self.image.url
         elif self.image_url:
+            if proxy_enabled():
+                params = {"v": url_key(self.image_url)[:12]}
+                if size:
+                    params["size"] = size
+                return f"{reverse('post_image_proxy', args=[self.slug])}?{urlencode(params)}"
             return self.image_url
         else:
             return static('img/default-post.jpg') # Default şəklin yeri
@@ -239,6 +265,48 @@ class StudentGroup(models.Model):
         return self.students.filter(id=user.id).exists()
 
 
+class ExamAccess:
+    """
+    Exam icazə qaydalarının (can_user_see / attempts_left_for / can_user_start)
+    istifadə etdiyi faktlar. Tək imtahan üçün fakt lazım olanda sorğu atılır;
+    Exam.access_for_many isə siyahı üçün hamısını sabit sayda sorğu ilə doldurur.
+    """
+
+    def __init__(self, exam: "Exam", user: User, **known):
+        self.exam = exam
+        self.user = user
+        self._known = known
+
+    def _get(self, key, compute):
+        if key not in self._known:
+            self._known[key] = compute()
+        return self._known[key]
+
+    @property
+    def has_allowed_users(self) -> bool:
+        return self._get("has_allowed_users", self.exam.allowed_users.exists)
+
+    @property
+    def has_allowed_groups(self) -> bool:
+        return self._get("has_allowed_groups", self.exam.allowed_groups.exists)
+
+    @property
+    def user_allowed(self) -> bool:
+        return self._get("user_allowed", lambda: self.exam.allowed_users.filter(id=self.user.id).exists())
+
+    @property
+    def user_in_group(self) -> bool:
+        return self._get("user_in_group", lambda: self.exam._user_in_allowed_groups(self.user))
+
+    @property
+    def used_attempts(self) -> int:
+        # draft attempt-lər limitsayımda nəzərə alınmır
+        return self._get(
+            "used_attempts",
+            lambda: self.exam.attempts.filter(user=self.user).exclude(status="draft").count(),
+        )
+
+
 class Exam(models.Model):
     
   
@@ -274,6 +342,24 @@ class Exam(models.Model):
         help_text="Əgər söndürsəniz, tələbələr bu imtahanı görə bilməyəcək."
     )
 
+    # Planlı pəncərə – OPTIONAL (aktiv/deaktiv etməni scheduler edir, bax: blog/exam_schedule.py)
+    opens_at = models.DateTimeField(
+        "Açılma vaxtı",
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="Bu vaxt imtahan avtomatik aktiv olur."
+    )
+    closes_at = models.DateTimeField(
+        "Bağlanma vaxtı",
+        blank=True,
+        null=True,
+        db_index=True,
+        help_text="Bu vaxt imtahan avtomatik deaktiv olur."
+    )
+    # scheduler hansı addımı artıq edib: "" (gözləyir) / "opened" / "closed"
+    schedule_state = models.CharField(max_length=10, blank=True, default="", editable=False)
+
     # Ümumi imtahan vaxtı (dəqiqə) – OPTIONAL
     total_duration_minutes = models.PositiveIntegerField(
         "Ümumi imtahan müddəti (dəqiqə)",
@@ -344,6 +430,14 @@ class Exam(models.Model):
         verbose_name = "İmtahan bloku"
         verbose_name_plural = "İmtahan blokları"
         ordering = ["-created_at"]
+        indexes = [
+            # student_exam_list: aktiv imtahanlar, ən yenidən (partial)
+            models.Index(
+                fields=["-created_at"],
+                condition=models.Q(is_active=True),
+                name="exam_active_created_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.title} ({self.get_exam_type_display()})"
@@ -359,7 +453,7 @@ class Exam(models.Model):
 
     # ---------- ATTEMPT LIMIT MƏNTİQİ ----------
 
-    def attempts_left_for(self, user: User) -> int | None:
+    def attempts_left_for(self, user: User, access: ExamAccess | None = None) -> int | None:
         """
         Bu user üçün neçə attempt qalıb?
         None → limitsiz deməkdir.
@@ -371,17 +465,72 @@ class Exam(models.Model):
         if not self.max_attempts_per_user:
             return None  # limitsiz
 
-        used = (
-            self.attempts
-            .filter(user=user)
-            .exclude(status="draft")  # draft = davam edən / saxlanmış
-            .count()
-        )
-        left = self.max_attempts_per_user - used
+        access = access or ExamAccess(self, user)
+        left = self.max_attempts_per_user - access.used_attempts
         return max(left, 0)
 
+    # ---------- PLANLI PƏNCƏRƏ ----------
+
+    def window_error(self, now=None) -> str | None:
+        """opens_at / closes_at pəncərəsindən kənardırsa səbəb, əks halda None."""
+        now = now or timezone.now()
+        if self.opens_at and now < self.opens_at:
+            return "İmtahan hələ açılmayıb."
+        if self.closes_at and now >= self.closes_at:
+            return "İmtahanın vaxtı bitib."
+        return None
+
     # ---------- ACCESS NƏZARƏTİ (user + qrup + kod) ----------
 
+    @classmethod
+    def access_for_many(cls, user: User, exams) -> dict:
+        """
+        Siyahılar üçün: {exam_id: ExamAccess} — bütün faktlar 5 sorğu ilə.
+        Nəticə can_user_see / attempts_left_for / can_user_start-a access= kimi ötürülür.
+        """
+        exams = list(exams)
+        exam_ids = [e.id for e in exams]
+        if not exam_ids:
+            return {}
+
+        users_through = cls.allowed_users.through
+        groups_through = cls.allowed_groups.through
+
+        has_allowed_users = set(
+            users_through.objects.filter(exam_id__in=exam_ids).values_list("exam_id", flat=True).distinct()
+        )
+        has_allowed_groups = set(
+            groups_through.objects.filter(exam_id__in=exam_ids).values_list("exam_id", flat=True).distinct()
+        )
+        user_allowed = set(
+            users_through.objects.filter(exam_id__in=exam_ids, user_id=user.id).values_list("exam_id", flat=True)
+        )
+        user_in_group = set(
+            groups_through.objects
+            .filter(exam_id__in=exam_ids, studentgroup__students=user)
+            .values_list("exam_id", flat=True)
+        )
+        used_attempts = dict(
+            ExamAttempt.objects
+            .filter(user=user, exam_id__in=[e.id for e in exams if e.max_attempts_per_user])
+            .exclude(status="draft")
+            .values("exam_id")
+            .annotate(n=models.Count("id"))
+            .values_list("exam_id", "n")
+        )
+
+        return {
+            exam.id: ExamAccess(
+                exam, user,
+                has_allowed_users=exam.id in has_allowed_users,
+                has_allowed_groups=exam.id in has_allowed_groups,
+                user_allowed=exam.id in user_allowed,
+                user_in_group=exam.id in user_in_group,
+                used_attempts=used_attempts.get(exam.id, 0),
+            )
+            for exam in exams
+        }
+
 
     def _user_in_allowed_groups(self, user: User) -> bool:
         """
@@ -389,14 +538,15 @@ class Exam(models.Model):
         """
         return self.allowed_groups.filter(students=user).exists()
 
-    def can_user_see(self, user: User) -> bool:
+    def can_user_see(self, user: User, access: ExamAccess | None = None) -> bool:
         """
         Student imtahan kartını / məlumatını görməlidirmi?
         Burada hələ cəhd limiti yoxlanmır, yalnız 'görmə' hüququ.
         """
         # 1) Imtahan müəllifi hər zaman görür
-        if user == self.author:
+        if user.id == self.author_id:
             return True
+        access = access or ExamAccess(self, user)
 
         # 2) Aktiv deyilsə – heç kimə göstərməyək
         if not self.is_active:
@@ -405,18 +555,18 @@ class Exam(models.Model):
         # 3) Tam public + heç bir əlavə məhdudiyyət yoxdursa
         if (
             self.is_public
-            and not self.allowed_users.exists()
-            and not self.allowed_groups.exists()
             and not self.access_code
+            and not access.has_allowed_users
+            and not access.has_allowed_groups
         ):
             return True
 
         # 4) Fərdi user kimi icazəlidir
-        if self.allowed_users.filter(id=user.id).exists():
+        if access.user_allowed:
             return True
 
         # 5) Qrup vasitəsilə icazəlidir
-        if self._user_in_allowed_groups(user):
+        if access.user_in_group:
             return True
 
         # 6) Kodla giriş: kart görünsün, amma start üçün kod tələb olunacaq
@@ -426,7 +576,9 @@ class Exam(models.Model):
         # 7) Ümumiyyətlə giriş icazəsi yoxdur
         return False
 
-    def can_user_start(self, user: User, code: str | None = None) -> tuple[bool, str | None]:
+    def can_user_start(
+        self, user: User, code: str | None = None, access: ExamAccess | None = None
+    ) -> tuple[bool, str | None]:
         """
         Student yeni attempt başlaya bilərmi?
 
@@ -434,23 +586,24 @@ class Exam(models.Model):
         - (True, None)    → hər şey qaydasındadır, başlaya bilər
         - (False, reason) → niyə başlaya bilmədiyi barədə mesaj
         """
-        # 1) Aktiv deyil
+        # 1) Aktiv deyil / planlı pəncərədən kənardır
         if not self.is_active:
             return False, "Bu imtahan hazırda aktiv deyil."
+        window_error = self.window_error()
+        if window_error:
+            return False, window_error
 
         # 2) Cəhd limiti
-        left = self.attempts_left_for(user)
+        access = access or ExamAccess(self, user)
+        left = self.attempts_left_for(user, access=access)
         if left is not None and left <= 0:
             return False, "Artıq bütün icazə verilən cəhdlərinizi istifadə etmisiniz."
 
         # 3) Müəllif (exam sahibi) – cəhd limiti keçməyibsə, hər zaman başlaya bilər
-        if user == self.author:
+        if user.id == self.author_id:
             return True, None
 
-        in_allowed_any = (
-            self.allowed_users.filter(id=user.id).exists()
-            or self._user_in_allowed_groups(user)
-        )
+        in_allowed_any = access.user_allowed or access.user_in_group
 
         # 4) Ümumiyyətlə kod təyin olunmayıbsa
         if not self.access_code:
@@ -614,17 +767,28 @@ class ExamQuestion(models.Model):
 
     # ---- Statistikaya köməkçi propertilər ----
 
+    # Siyahılarda N+1 olmasın deyə queryset .annotate(answers_total=..., answers_correct=...)
+    # verilibsə həmin dəyərlər istifadə olunur.
+
+    def _real_answers(self):
+        # hazırlanmış (hələ başlanmamış) attempt-lərin boş cavabları statistikaya düşmür
+        return self.answers.exclude(attempt__status="prepared")
+
     @property
     def total_answers(self):
-        return self.answers.count()
+        if hasattr(self, "answers_total"):
+            return self.answers_total
+        return self._real_answers().count()
 
     @property
     def correct_answers_count(self):
-        return self.answers.filter(is_correct=True).count()
+        if hasattr(self, "answers_correct"):
+            return self.answers_correct
+        return self._real_answers().filter(is_correct=True).count()
 
     @property
     def wrong_answers_count(self):
-        return self.answers.filter(is_correct=False).count()
+        return self._real_answers().filter(is_correct=False).count()
 
     @property
     def correct_ratio(self):
@@ -660,8 +824,19 @@ class ExamQuestionOption(models.Model):
         return f"{prefix} {self.text[:50]}"
 
 
+class ExamAttemptManager(models.Manager):
+    """
+    Default manager: əvvəlcədən hazırlanmış (hələ başlanmamış) attempt-lər görünmür.
+    Onlarla yalnız ExamAttempt.all_objects işləyir (bax: blog/attempt_pool.py).
+    """
+
+    def get_queryset(self):
+        return super().get_queryset().exclude(status="prepared")
+
+
 class ExamAttempt(models.Model):
     STATUS_CHOICES = (
+        ("prepared", "Hazırlanıb (başlanmayıb)"),
         ("draft", "Draft (yarımçıq saxlanılıb)"),
         ("in_progress", "Davam edir"),
         ("submitted", "Təslim edilib"),
@@ -722,11 +897,29 @@ class ExamAttempt(models.Model):
         blank=True,
     )
 
+    # JSON autosave hər uğurlu yazışda artırır (bax: blog/attempt_autosave.py)
+    autosave_version = models.PositiveIntegerField(default=0, editable=False)
+
+    objects = ExamAttemptManager()
+    all_objects = models.Manager()
+
     class Meta:
         verbose_name = "İmtahan cəhdi"
         verbose_name_plural = "İmtahan cəhdləri"
         ordering = ["-started_at"]
         unique_together = ("user", "exam", "attempt_number")
+        indexes = [
+            # expiry sweeper: açıq attempt-lər started_at üzrə (bax: blog/attempt_expiry.py)
+            models.Index(fields=["status", "started_at"], name="attempt_status_started_idx"),
+            # _start_or_resume_attempt / attempts_left_for: (exam, user) + status, son başlanan
+            models.Index(fields=["exam", "user", "status", "started_at"], name="attempt_exam_user_status_idx"),
+            # teacher_pending_attempts: yoxlanmamış cəhdlər (partial), exam + status + finished_at
+            models.Index(
+                fields=["exam", "status", "finished_at"],
+                condition=models.Q(checked_by_teacher=False),
+                name="attempt_review_queue_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.user.username} → {self.exam.title} (#{self.attempt_number})"
@@ -869,20 +1062,84 @@ class ExamAnswerFile(models.Model):
         related_name="files",
         verbose_name="Cavab"
     )
+    # content-addressed: eyni məzmun bir dəfə saxlanılır (bax: blog/storage.py)
     file = models.FileField(
         "Fayl",
         upload_to="exam_uploads/",
-        validators=[validate_file_extension, validate_file_size, validate_zip_contents]
+        storage=get_answer_file_storage,
+        max_length=255,
+        validators=[validate_file_extension, validate_file_size, validate_file_signature, validate_zip_contents]
     )
+    # storage adı hash-dir, tələbənin göndərdiyi ad burada qalır
+    original_name = models.CharField(max_length=255, blank=True)
     uploaded_at = models.DateTimeField("Yüklənmə tarixi", auto_now_add=True)
+    # eyni cavaba eyni fayl təkrar göndəriləndə yeni sətir / yazı olmasın
+    sha256 = models.CharField(max_length=64, blank=True, editable=False)
 
     def filename(self):
-        return self.file.name.split("/")[-1]
+        return self.original_name or self.file.name.split("/")[-1]
+
+    def is_image(self):
+        return is_image_name(self.filename())
+
+    def preview_url(self, size="thumb"):
+        """Şəkil önizləməsi: kiçildilmiş nüsxə, hazır deyilsə orijinal."""
+        return rendition_url(self.file, size) or self.file.url
 
     def __str__(self):
         return f"{self.filename()} ({self.answer_id})"
 
 
+class FileBlob(models.Model):
+    """
+    Content-addressed storage-dakı bir blob. ref_count — ona istinad edən
+    ExamAnswerFile sayı (signal-larla saxlanılır, bax: blog/blob_refs.py).
+    0-a düşən blob-ları gc_answer_files silir.
+    """
+    name = models.CharField(max_length=255, unique=True)
+    sha256 = models.CharField(max_length=64)
+    size = models.PositiveBigIntegerField(default=0)
+    ref_count = models.PositiveIntegerField(default=0)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Fayl blob-u"
+        verbose_name_plural = "Fayl blob-ları"
+        indexes = [
+            # GC: istinadsız blob-lar
+            models.Index(fields=["ref_count", "updated_at"], name="fileblob_gc_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.name} ({self.ref_count})"
+
+
+class ExamAnswerUpload(models.Model):
+    """
+    Yarımçıq (chunked) fayl yükləməsi. Hissələr diskə müvəqqəti fayla yazılır,
+    received qədəri artıq qəbul olunub (resume buradan davam edir).
+    Tamamlananda ExamAnswerFile yaranır və bu sətir silinir (bax: blog/answer_uploads.py).
+    """
+    id = models.UUIDField(primary_key=True, default=uuid.uuid4, editable=False)
+    answer = models.ForeignKey(
+        "ExamAnswer",
+        on_delete=models.CASCADE,
+        related_name="uploads",
+    )
+    filename = models.CharField(max_length=255)
+    size = models.PositiveBigIntegerField()
+    received = models.PositiveBigIntegerField(default=0)
+    created_at = models.DateTimeField(auto_now_add=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Yarımçıq yükləmə"
+        verbose_name_plural = "Yarımçıq yükləmələr"
+
+    def __str__(self):
+        return f"{self.filename} ({self.received}/{self.size})"
+
+
 
 
 
@@ -0,0 +1,133 @@
+# blog/question_selection.py
+
+"""
+Attempt üçün random sual seçimi — yalnız id-lər üzərində.
+
+- exam_question_index: imtahanın (block_id, [question_id...]) indeksi, Django cache-də.
+  Sual / blok dəyişəndə signal ilə silinir.
+- select_question_ids: bloklar üzrə bərabər pay (stratified), çatmayanı qalan
+  suallardan doldurur. Model obyekti yüklənmir.
+- attempt_seed: seçim attempt id-dən çıxan sabit seed-lə edilir, yəni eyni
+  sual bankı üçün nəticəni istənilən vaxt yenidən hesablamaq (audit) olar.
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, List, Optional
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .models import ExamQuestion, QuestionBlock
+
+INDEX_CACHE_SECONDS = 60 * 10
+
+
+def _index_key(exam_id: int) -> str:
+    return f"exam:qindex:{exam_id}"
+
+
+def build_question_index(exam_id: int) -> Dict[str, object]:
+    """Bir sorğu: (id, block_id) cütləri."""
+    blocks: Dict[int, List[int]] = {}
+    loose: List[int] = []
+    for qid, block_id in (
+        ExamQuestion.objects
+        .filter(exam_id=exam_id)
+        .order_by("id")
+        .values_list("id", "block_id")
+    ):
+        if block_id is None:
+            loose.append(qid)
+        else:
+            blocks.setdefault(block_id, []).append(qid)
+
+    return {
+        "total": len(loose) + sum(len(ids) for ids in blocks.values()),
+        "blocks": sorted(blocks.items()),
+        "loose": loose,
+    }
+
+
+def exam_question_index(exam_id: int) -> Dict[str, object]:
+    key = _index_key(exam_id)
+    index = cache.get(key)
+    if index is None:
+        index = build_question_index(exam_id)
+        cache.set(key, index, INDEX_CACHE_SECONDS)
+    return index
+
+
+def invalidate_question_index(exam_id: Optional[int]) -> None:
+    if exam_id:
+        cache.delete(_index_key(exam_id))
+
+
+def needed_question_count(exam, total: int) -> int:
+    """
+    exam.random_question_count -> attempt-ə düşəcək sual sayı:
+    0 -> hamısı, None / səhv dəyər -> 10 (default), əks halda min(val, total)
+    """
+    val = getattr(exam, "random_question_count", None)
+    try:
+        val = int(val)
+    except (TypeError, ValueError):
+        return min(10, total)
+    if val <= 0:
+        return total
+    return min(val, total)
+
+
+def attempt_seed(attempt) -> str:
+    return f"exam:{attempt.exam_id}:attempt:{attempt.id}"
+
+
+def select_question_ids(index: Dict[str, object], needed: int, seed: str) -> List[int]:
+    """
+    - needed >= total: hamısı (random sıra)
+    - blok varsa: hər bloka needed // len(blocks) (+1 qalıq), çatmayan yer
+      seçilməmiş suallardan (blokusuzlar daxil) doldurulur
+    - blok yoxdursa: ümumi pool-dan sample
+    """
+    rng = random.Random(seed)
+    blocks = [list(ids) for _, ids in index["blocks"]]
+    loose = list(index["loose"])
+    all_ids = [qid for ids in blocks for qid in ids] + loose
+
+    if needed <= 0 or not all_ids:
+        return []
+
+    if needed >= len(all_ids):
+        rng.shuffle(all_ids)
+        return all_ids
+
+    if not blocks:
+        return rng.sample(all_ids, needed)
+
+    rng.shuffle(blocks)
+    base, rem = divmod(needed, len(blocks))
+
+    selected: List[int] = []
+    leftover: List[int] = list(loose)
+    for i, ids in enumerate(blocks):
+        take = min(base + (1 if i < rem else 0), len(ids))
+        rng.shuffle(ids)
+        selected.extend(ids[:take])
+        leftover.extend(ids[take:])
+
+    if len(selected) < needed:
+        selected.extend(rng.sample(leftover, needed - len(selected)))
+
+    # blok "izləri" qalmasın
+    rng.shuffle(selected)
+    return selected
+
+
+@receiver(post_save, sender=ExamQuestion)
+@receiver(post_delete, sender=ExamQuestion)
+@receiver(post_save, sender=QuestionBlock)
+@receiver(post_delete, sender=QuestionBlock)
+def _question_bank_changed(sender, instance, **kwargs):
+    invalidate_question_index(instance.exam_id)
@@ -0,0 +1,6 @@
+from django.urls import path
+from . import consumers
+
+websocket_urlpatterns = [
+    path("ws/exams/attempt/<int:attempt_id>/", consumers.ExamAttemptConsumer.as_asgi()),
+]
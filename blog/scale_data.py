@@ -0,0 +1,342 @@
+# blog/scale_data.py
+
+"""
+Performans testləri üçün sintetik (amma real ölçülü) data.
+
+- Hər şey bulk_create ilə, chunk-larla yazılır (save() / signal-lar işləmir)
+- Eyni seed -> eyni data (random.Random(seed))
+- Şifrə hash-i bir dəfə hesablanır, bütün user-lər onu paylaşır
+
+Testlər DEFAULT_SCALE ilə çağırır; lokal yük testi üçün:
+    python manage.py generate_scale_data --seed 1 --multiplier 0.1
+"""
+
+from __future__ import annotations
+
+import random
+from typing import Dict, List
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import Group, User
+from django.db import transaction
+from django.utils import timezone
+
+from .models import (
+    Category,
+    Comment,
+    Exam,
+    ExamAnswer,
+    ExamAttempt,
+    ExamQuestion,
+    ExamQuestionOption,
+    Post,
+    QuestionBlock,
+    StudentGroup,
+    Subscriber,
+)
+
+# Sorğu büdcəsi testlərinin istifadə etdiyi ölçü
+DEFAULT_SCALE: Dict[str, int] = {
+    "teachers": 20,
+    "students": 5000,
+    "groups": 50,
+    "exams": 200,
+    "blocks_per_exam": 4,
+    "questions_per_exam": 100,
+    "options_per_question": 4,
+    "attempts": 10000,
+    "answers_per_attempt": 10,
+    "categories": 8,
+    "posts": 60,
+    "comments_per_post": 20,
+    "subscribers": 500,
+    "live_sessions": 20,
+    "players_per_session": 30,
+}
+
+BATCH_SIZE = 2000
+
+SEED_PASSWORD = "scale-pass-123"
+
+
+def _bulk(model, objs: List, batch_size: int = BATCH_SIZE) -> List:
+    return model.objects.bulk_create(objs, batch_size=batch_size)
+
+
+def seed_exists(seed: int) -> bool:
+    """Eyni seed ilə data artıq yaradılıbmı (username/slug-lar toqquşar)."""
+    return User.objects.filter(username=f"s{seed}_teacher_0").exists()
+
+
+def scaled(multiplier: float, scale: Dict[str, int] | None = None) -> Dict[str, int]:
+    """
+    DEFAULT_SCALE-in sayları vurulur; "per_*" (bir obyekt daxilindəki) ölçülər dəyişmir.
+    """
+    base = {**DEFAULT_SCALE, **(scale or {})}
+    return {
+        key: value if "_per_" in key else max(1, int(round(value * multiplier)))
+        for key, value in base.items()
+    }
+
+
+@transaction.atomic
+def generate(scale: Dict[str, int] | None = None, seed: int = 0) -> Dict[str, object]:
+    """
+    Datanı yaradır və testlər üçün lazımi obyektləri qaytarır.
+    """
+    cfg = {**DEFAULT_SCALE, **(scale or {})}
+    rng = random.Random(seed)
+    now = timezone.now()
+    password = make_password(SEED_PASSWORD, salt=f"scale{seed}")
+    tag = f"s{seed}"
+
+    # ---- users ----
+    teacher_group, _ = Group.objects.get_or_create(name="teacher")
+    teachers = _bulk(User, [
+        User(username=f"{tag}_teacher_{i}", password=password, email=f"{tag}_teacher_{i}@example.com")
+        for i in range(cfg["teachers"])
+    ])
+    _bulk(User.groups.through, [
+        User.groups.through(user_id=t.id, group_id=teacher_group.id) for t in teachers
+    ])
+    students = _bulk(User, [
+        User(username=f"{tag}_student_{i}", password=password, email=f"{tag}_student_{i}@example.com")
+        for i in range(cfg["students"])
+    ])
+
+    # ---- student groups (hər tələbə bir qrupda) ----
+    groups = _bulk(StudentGroup, [
+        StudentGroup(teacher=teachers[i % len(teachers)], name=f"{tag}-G{i:03d}")
+        for i in range(cfg["groups"])
+    ])
+    _bulk(StudentGroup.students.through, [
+        StudentGroup.students.through(studentgroup_id=groups[i % len(groups)].id, user_id=s.id)
+        for i, s in enumerate(students)
+    ])
+
+    # ---- exams: public / qrupa bağlı / kodlu qarışıq ----
+    exams = []
+    for i in range(cfg["exams"]):
+        kind = i % 4
+        exams.append(Exam(
+            author=teachers[i % len(teachers)],
+            title=f"Exam {i}",
+            slug=f"{tag}-exam-{i}",
+            exam_type="test",
+            is_active=(i % 10 != 9),
+            is_public=(kind != 1),
+            access_code=("123456" if kind == 2 else ""),
+            max_attempts_per_user=(3 if kind == 3 else None),
+            random_question_count=cfg["answers_per_attempt"],
+            total_duration_minutes=(30 if i % 2 else None),
+        ))
+    exams = _bulk(Exam, exams)
+    _bulk(Exam.allowed_groups.through, [
+        Exam.allowed_groups.through(exam_id=e.id, studentgroup_id=groups[(i * 7) % len(groups)].id)
+        for i, e in enumerate(exams) if i % 4 == 1
+    ])
+
+    blocks = _bulk(QuestionBlock, [
+        QuestionBlock(exam=e, name=f"Blok {b + 1}", order=b + 1)
+        for e in exams for b in range(cfg["blocks_per_exam"])
+    ])
+    blocks_by_exam: Dict[int, List[QuestionBlock]] = {}
+    for b in blocks:
+        blocks_by_exam.setdefault(b.exam_id, []).append(b)
+
+    questions = []
+    for e in exams:
+        exam_blocks = blocks_by_exam.get(e.id) or [None]
+        for q in range(cfg["questions_per_exam"]):
+            questions.append(ExamQuestion(
+                exam=e,
+                block=exam_blocks[q % len(exam_blocks)],
+                text=f"Sual {q + 1}: {rng.randrange(10 ** 8):08d}",
+                order=q + 1,
+                answer_mode="single",
+            ))
+    questions = _bulk(ExamQuestion, questions)
+
+    labels = "ABCDE"
+    options = _bulk(ExamQuestionOption, [
+        ExamQuestionOption(
+            question=q, label=labels[o] if o < len(labels) else None,
+            text=f"Variant {o + 1}", is_correct=(o == 0),
+        )
+        for q in questions for o in range(cfg["options_per_question"])
+    ])
+    questions_by_exam: Dict[int, List[ExamQuestion]] = {}
+    for q in questions:
+        questions_by_exam.setdefault(q.exam_id, []).append(q)
+    options_by_question: Dict[int, List[ExamQuestionOption]] = {}
+    for o in options:
+        options_by_question.setdefault(o.question_id, []).append(o)
+
+    # ---- attempts + answers ----
+    # nəticələri əvvəlcədən hesablayırıq ki, sonradan bulk_update lazım olmasın
+    plans = []
+    seen = set()
+    # hər (tələbə, imtahan) cütü bir dəfə -> cüt sayından çox ola bilməz
+    target = min(cfg["attempts"], len(students) * len(exams))
+    while len(plans) < target:
+        student = students[rng.randrange(len(students))]
+        exam = exams[rng.randrange(len(exams))]
+        if (student.id, exam.id) in seen:
+            continue
+        seen.add((student.id, exam.id))
+
+        pool = questions_by_exam[exam.id]
+        picked = []
+        for q in rng.sample(pool, min(cfg["answers_per_attempt"], len(pool))):
+            # ~30% sual cavabsız qalır
+            opt = rng.choice(options_by_question[q.id]) if rng.random() >= 0.3 else None
+            picked.append((q, opt))
+        plans.append((student, exam, picked))
+
+    attempts = []
+    for student, exam, picked in plans:
+        finished = rng.random() < 0.8
+        correct = sum(1 for _, opt in picked if opt is not None and opt.is_correct)
+        attempts.append(ExamAttempt(
+            user=student,
+            exam=exam,
+            attempt_number=1,
+            status="submitted" if finished else "in_progress",
+            finished_at=now if finished else None,
+            duration_seconds=rng.randint(120, 1800) if finished else None,
+            correct_count=correct,
+            wrong_count=len(picked) - correct,
+        ))
+    attempts = _bulk(ExamAttempt, attempts)
+
+    answers = _bulk(ExamAnswer, [
+        ExamAnswer(attempt=a, question=q, is_correct=bool(opt is not None and opt.is_correct))
+        for a, (_, _, picked) in zip(attempts, plans)
+        for q, opt in picked
+    ])
+    picked_options = [opt for _, _, picked in plans for _, opt in picked]
+    _bulk(ExamAnswer.selected_options.through, [
+        ExamAnswer.selected_options.through(examanswer_id=ans.id, examquestionoption_id=opt.id)
+        for ans, opt in zip(answers, picked_options)
+        if opt is not None
+    ])
+
+    # ---- blog: kateqoriya / post / şərh ----
+    categories = _bulk(Category, [
+        Category(name=f"{tag} Kateqoriya {i}", slug=f"{tag}-kateqoriya-{i}") for i in range(cfg["categories"])
+    ])
+    posts = _bulk(Post, [
+        Post(
+            author=teachers[i % len(teachers)],
+            category=categories[i % len(categories)],
+            title=f"Post {i}",
+            slug=f"{tag}-post-{i}",
+            excerpt="Qısa xülasə",
+            content="Məzmun " * 200,
+            is_published=(i % 10 != 0),
+        )
+        for i in range(cfg["posts"])
+    ])
+    _bulk(Comment, [
+        Comment(post=p, user=students[rng.randrange(len(students))], text="Şərh", rating=rng.randint(1, 5))
+        for p in posts for _ in range(cfg["comments_per_post"])
+    ])
+
+    # ---- abunəçilər ----
+    subscribers = _bulk(Subscriber, [
+        Subscriber(email=f"{tag}_sub_{i}@example.com", is_active=(i % 5 != 0))
+        for i in range(cfg["subscribers"])
+    ])
+
+    live_sessions = _generate_live(cfg, rng, tag, exams, questions_by_exam, options_by_question)
+
+    return {
+        "config": cfg,
+        "teachers": teachers,
+        "students": students,
+        "groups": groups,
+        "exams": exams,
+        "attempts": attempts,
+        "posts": posts,
+        "subscribers": subscribers,
+        "live_sessions": live_sessions,
+    }
+
+
+def _generate_live(cfg, rng, tag, exams, questions_by_exam, options_by_question) -> List:
+    """
+    Live sessiyalar (əksəriyyəti bitmiş) + oyunçular + cavablar.
+    LiveSession.save() işləmədiyi üçün PIN-lər burada, seed-dən seçilir;
+    yalnız lobby-dəki sessiyalar PIN-i tutur (active_pin), bitmişlər recycle olunmuş sayılır.
+    """
+    from liveExam.models import LiveAnswer, LivePlayer, LiveSession
+    from liveExam.pins import PIN_LENGTH, PIN_SPACE
+
+    if not cfg["live_sessions"]:
+        return []
+
+    used = set()
+    sessions = []
+    for i in range(cfg["live_sessions"]):
+        exam = exams[rng.randrange(len(exams))]
+        pool = questions_by_exam[exam.id]
+        picked = rng.sample(pool, min(10, len(pool)))
+
+        finished = bool(i % 5)
+        pin = f"{rng.randrange(PIN_SPACE):0{PIN_LENGTH}d}"
+        while not finished and (pin in used or LiveSession.objects.filter(active_pin=pin).exists()):
+            pin = f"{rng.randrange(PIN_SPACE):0{PIN_LENGTH}d}"
+        if not finished:
+            used.add(pin)
+
+        sessions.append(LiveSession(
+            exam=exam,
+            host_user_id=exam.author_id,
+            pin=pin,
+            active_pin=None if finished else pin,
+            state=LiveSession.STATE_FINISHED if finished else LiveSession.STATE_LOBBY,
+            question_limit=len(picked),
+            selected_question_ids=[q.id for q in picked],
+        ))
+    sessions = _bulk(LiveSession, sessions)
+
+    # cavablar əvvəlcədən planlanır -> oyunçu balı insert zamanı məlumdur
+    plans = []
+    for s in sessions:
+        finished = s.state == LiveSession.STATE_FINISHED
+        limit_ms = s.question_seconds * 1000
+        for p in range(cfg["players_per_session"]):
+            rows = []
+            for qid in (s.selected_question_ids if finished else []):
+                opt = rng.choice(options_by_question[qid])
+                answer_ms = rng.randint(800, limit_ms)
+                points = int(1000 * (1 - answer_ms / limit_ms / 2)) if opt.is_correct else 0
+                rows.append((qid, opt, answer_ms, points))
+            plans.append((s, p, rows))
+
+    players = _bulk(LivePlayer, [
+        LivePlayer(
+            session=s,
+            nickname=f"Oyunçu {p + 1}",
+            avatar_key=f"avatar_{p % 8 + 1}",
+            client_id=f"{tag}-{s.id}-{p}",
+            score=sum(row[3] for row in rows),
+            is_connected=(s.state != LiveSession.STATE_FINISHED),
+        )
+        for s, p, rows in plans
+    ])
+    _bulk(LiveAnswer, [
+        LiveAnswer(
+            session=s,
+            player=player,
+            question_id=qid,
+            choice_id=opt.id,
+            choice_ids=[opt.id],
+            is_correct=opt.is_correct,
+            answer_ms=answer_ms,
+            awarded_points=points,
+        )
+        for player, (s, _, rows) in zip(players, plans)
+        for qid, opt, answer_ms, points in rows
+    ])
+    return sessions
@@ -0,0 +1,78 @@
+# blog/storage.py
+
+"""
+Cavab faylları üçün content-addressed storage.
+
+Fayl adı məzmunun SHA-256-sından çıxır: exam_blobs/ab/cd/<sha256>.<ext>.
+Eyni məzmun ikinci dəfə gələndə diskə yazılmır — mövcud blob-un adı qaytarılır
+(mtime yenilənir ki, GC onu həmin an silməsin). Neçə ExamAnswerFile-ın bir
+blob-a istinad etdiyi FileBlob.ref_count-da saxlanılır (blog/blob_refs.py),
+istinadsız blob-ları manage.py gc_answer_files silir.
+
+Bu modul model import etmir (models.py storage-i FileField-ə verir).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import os
+
+from django.conf import settings
+from django.core.files import File
+from django.core.files.storage import FileSystemStorage
+from django.utils.functional import LazyObject
+
+BLOB_PREFIX = "exam_blobs"
+
+
+class ContentAddressedStorage(FileSystemStorage):
+
+    def __init__(self, prefix: str = BLOB_PREFIX, **kwargs):
+        # paralel iki eyni yükləmədə ikinci sadəcə eyni baytları üstünə yazır
+        kwargs.setdefault("allow_overwrite", True)
+        super().__init__(**kwargs)
+        self.prefix = prefix
+
+    def blob_name(self, sha256: str, original_name: str) -> str:
+        ext = os.path.splitext(original_name)[1].lower()
+        return f"{self.prefix}/{sha256[:2]}/{sha256[2:4]}/{sha256}{ext}"
+
+    def is_blob(self, name: str) -> bool:
+        return bool(name) and name.startswith(f"{self.prefix}/")
+
+    def save(self, name, content, max_length=None):
+        if name is None:
+            name = content.name
+        if not hasattr(content, "chunks"):
+            content = File(content, name)
+
+        # hash əvvəlcədən hesablanıbsa (attach_file) fayl ikinci dəfə oxunmur
+        digest = getattr(content, "sha256", None)
+        if not digest:
+            hasher = hashlib.sha256()
+            for chunk in content.chunks():
+                hasher.update(chunk)
+            digest = hasher.hexdigest()
+        content.seek(0)
+
+        blob = self.blob_name(digest, name)
+        if self.exists(blob):
+            os.utime(self.path(blob))
+            return blob
+        return super().save(blob, content, max_length=max_length)
+
+
+class _AnswerFileStorage(LazyObject):
+    def _setup(self):
+        self._wrapped = ContentAddressedStorage(
+            location=getattr(settings, "EXAM_BLOB_ROOT", None),
+            base_url=getattr(settings, "EXAM_BLOB_URL", None),
+        )
+
+
+answer_file_storage = _AnswerFileStorage()
+
+
+def get_answer_file_storage():
+    """FileField(storage=...) üçün callable (migration-da yol kimi saxlanılır)."""
+    return answer_file_storage
@@ -0,0 +1,159 @@
+# blog/submission_export.py
+
+"""
+Yazılı imtahan cavablarının toplu yüklənməsi (stream olunan ZIP).
+
+Arxiv sorğu zamanı qurulur: zipfile seek edilə bilməyən "sink"-ə yazır
+(local header + data descriptor), generator yazılan baytları dərhal
+StreamingHttpResponse-a ötürür. Müvəqqəti fayl yoxdur, yaddaşda eyni anda
+ən çox bir blok (READ_BLOCK) + bir sorğu hissəsi (chunk_size) olur.
+
+Struktur:
+    <username>/cehd-<n>/sual-<nn>/cavab.txt      (yazılı mətn, varsa)
+    <username>/cehd-<n>/sual-<nn>/<fayl adı>     (ExamAnswerFile-lar)
+Sual nömrəsi attempt daxilində cavabların sırasıdır (teacher_check_attempt kimi).
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import re
+import zipfile
+from typing import Iterable, Iterator, Optional
+
+from django.db.models import F, Window
+from django.db.models.functions import RowNumber
+from django.utils import timezone
+
+from .models import Exam, ExamAnswer, ExamAnswerFile
+
+READ_BLOCK = 64 * 1024
+QUERY_CHUNK = 200
+
+# artıq sıxılmış formatlar yenidən deflate olunmur (CPU boşuna gedir)
+STORED_EXTENSIONS = {
+    ".zip", ".rar", ".7z", ".gz", ".jpg", ".jpeg", ".png", ".gif", ".webp",
+    ".pdf", ".docx", ".xlsx", ".pptx", ".mp4", ".mp3",
+}
+
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\x00-\x1f]+')
+
+
+class _ZipSink(io.RawIOBase):
+    """zipfile-ın yazdığı baytlar burada toplanır, generator onları götürür."""
+
+    def __init__(self):
+        super().__init__()
+        self._parts = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def take(self) -> bytes:
+        data = b"".join(self._parts)
+        self._parts.clear()
+        return data
+
+
+def _safe_part(value: str, fallback: str) -> str:
+    value = _UNSAFE_CHARS.sub("_", value or "").strip(" .")
+    return value[:120] or fallback
+
+
+def _unique(name: str, used: set) -> str:
+    if name not in used:
+        used.add(name)
+        return name
+    stem, ext = os.path.splitext(name)
+    n = 2
+    while f"{stem} ({n}){ext}" in used:
+        n += 1
+    name = f"{stem} ({n}){ext}"
+    used.add(name)
+    return name
+
+
+def _zip_info(arcname: str, when, size: int) -> zipfile.ZipInfo:
+    when = timezone.localtime(when) if when else timezone.localtime()
+    info = zipfile.ZipInfo(arcname, date_time=when.timetuple()[:6])
+    ext = os.path.splitext(arcname)[1].lower()
+    info.compress_type = zipfile.ZIP_STORED if ext in STORED_EXTENSIONS else zipfile.ZIP_DEFLATED
+    # zipfile ZIP64 qərarını file_size-a görə verir (>2GB fayllar)
+    info.file_size = size
+    return info
+
+
+def submission_answers(exam: Exam, attempt_ids: Optional[Iterable[int]] = None):
+    qs = (
+        ExamAnswer.objects
+        .filter(attempt__exam=exam)
+        .exclude(attempt__status="prepared")
+        .select_related("attempt__user")
+        .prefetch_related("files")
+        .annotate(position=Window(RowNumber(), partition_by=[F("attempt_id")], order_by=F("id").asc()))
+        .order_by("attempt__user__username", "attempt__attempt_number", "attempt_id", "id")
+    )
+    if attempt_ids is not None:
+        qs = qs.filter(attempt_id__in=list(attempt_ids))
+    return qs
+
+
+def _write_file(zf: zipfile.ZipFile, sink: _ZipSink, arcname: str, obj: ExamAnswerFile) -> Iterator[bytes]:
+    storage = obj.file.storage
+    try:
+        size = storage.size(obj.file.name)
+        src = storage.open(obj.file.name, "rb")
+    except FileNotFoundError:
+        # blob diskdə yoxdursa arxiv yarımçıq qalmasın
+        return
+    with src, zf.open(_zip_info(arcname, obj.uploaded_at, size), "w") as dest:
+        while True:
+            block = src.read(READ_BLOCK)
+            if not block:
+                break
+            dest.write(block)
+            yield sink.take()
+    yield sink.take()
+
+
+def iter_submissions_zip(exam: Exam, attempt_ids: Optional[Iterable[int]] = None) -> Iterator[bytes]:
+    # deflate bəzən blok udub heç nə qaytarmır — boş hissələr göndərilmir
+    return (chunk for chunk in _iter_zip(exam, attempt_ids) if chunk)
+
+
+def _iter_zip(exam: Exam, attempt_ids: Optional[Iterable[int]]) -> Iterator[bytes]:
+    sink = _ZipSink()
+    with zipfile.ZipFile(sink, "w") as zf:
+        current_attempt = None
+        used: set = set()
+
+        for answer in submission_answers(exam, attempt_ids).iterator(chunk_size=QUERY_CHUNK):
+            if answer.attempt_id != current_attempt:
+                # ad təkrarları yalnız bir attempt daxilində yoxlanılır
+                current_attempt, used = answer.attempt_id, set()
+
+            attempt = answer.attempt
+            folder = "{}/cehd-{}/sual-{:02d}".format(
+                _safe_part(attempt.user.username, f"user-{attempt.user_id}"),
+                attempt.attempt_number,
+                answer.position,
+            )
+
+            text = (answer.text_answer or "").strip()
+            if text:
+                data = text.encode("utf-8")
+                arcname = _unique(f"{folder}/cavab.txt", used)
+                zf.writestr(_zip_info(arcname, attempt.finished_at or attempt.started_at, len(data)), data)
+                yield sink.take()
+
+            for obj in answer.files.all():
+                name = _safe_part(os.path.basename(obj.filename()), f"fayl-{obj.id}")
+                yield from _write_file(zf, sink, _unique(f"{folder}/{name}", used), obj)
+
+    # central directory
+    yield sink.take()
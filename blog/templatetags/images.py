@@ -0,0 +1,15 @@
+from django import template
+
+register = template.Library()
+
+
+@register.filter
+def image_size(post, size):
+    """{{ post|image_size:"card" }} -> Post.get_image(size)"""
+    return post.get_image(size)
+
+
+@register.filter
+def image_size_jpeg(post, size):
+    """<picture> fallback-u üçün JPEG nüsxə."""
+    return post.get_image(size, fmt="jpg")
@@ -1,3 +1,1466 @@
-from django.test import TestCase
+import asyncio
+import io
+import os
+import shutil
+import socket
+import threading
+import tempfile
+import time
+import unittest
+import zipfile
+from datetime import timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from unittest import mock
 
-# Create your tests here.
+from asgiref.sync import async_to_sync
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import AnonymousUser, Group, User
+from django.core.cache import cache
+from django.core.exceptions import MiddlewareNotUsed, ValidationError
+from django.core.files import File
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import connection, transaction
+from django.http import HttpResponse
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase, TransactionTestCase, override_settings, tag
+from django.test.utils import CaptureQueriesContext
+from django.urls import resolve, reverse
+from django.utils import timezone
+
+from PIL import Image
+
+from blogApp import metrics
+
+from . import (
+    answer_uploads,
+    attempt_autosave,
+    attempt_expiry,
+    attempt_pool,
+    blob_refs,
+    exam_schedule,
+    image_proxy,
+    image_renditions,
+    question_selection,
+    scale_data,
+    zip_inspect,
+)
+from .consumers import ExamAttemptConsumer
+from .models import (
+    Category,
+    Comment,
+    Exam,
+    ExamAnswer,
+    ExamAnswerUpload,
+    ExamAttempt,
+    ExamQuestion,
+    ExamQuestionOption,
+    FileBlob,
+    Post,
+    QuestionBlock,
+    StudentGroup,
+)
+from .storage import answer_file_storage
+from .views import _build_exam_items, generate_random_questions_for_attempt
+from .validators import validate_file_signature, validate_zip_contents
+
+
+# Manifest storage testdə collectstatic tələb edir
+TEST_STORAGES = {
+    "default": {"BACKEND": "django.core.files.storage.FileSystemStorage"},
+    "staticfiles": {"BACKEND": "django.contrib.staticfiles.storage.StaticFilesStorage"},
+}
+
+
+@override_settings(METRICS_ENABLED=True)
+class MetricsMiddlewareTests(TestCase):
+
+    def setUp(self):
+        metrics.registry.reset()
+        self.addCleanup(metrics.registry.reset)
+        self.addCleanup(metrics.uninstall)
+        self.factory = RequestFactory()
+
+    def _view(self, queries):
+        def get_response(request):
+            request.resolver_match = resolve(reverse("home"))
+            for _ in range(queries):
+                list(User.objects.all()[:1])
+            return HttpResponse(Template("{% for i in items %}{{ i }}{% endfor %}").render(Context({"items": [1, 2]})))
+        return get_response
+
+    def test_counts_queries_and_render(self):
+        middleware = metrics.QueryMetricsMiddleware(self._view(3))
+        with self.assertLogs("blogApp.metrics", "INFO") as logs:
+            response = middleware(self.factory.get("/"))
+
+        self.assertIn('desc="3 queries"', response["Server-Timing"])
+        self.assertIn('"event": "view_metrics"', logs.output[0])
+        self.assertIn('app_view_queries_total{view="home"} 3', metrics.registry.render())
+
+    @override_settings(QUERY_BUDGETS={"home": 1})
+    def test_budget_exceeded_is_warned(self):
+        middleware = metrics.QueryMetricsMiddleware(self._view(2))
+        with self.assertLogs("blogApp.metrics", "WARNING") as logs:
+            middleware(self.factory.get("/"))
+        self.assertIn("query_budget_exceeded", logs.output[0])
+        self.assertIn('app_view_query_budget_exceeded_total{view="home"} 1', metrics.registry.render())
+
+    @override_settings(METRICS_ENABLED=False)
+    def test_disabled_installs_no_hooks(self):
+        metrics.uninstall()
+        render = Template.render
+        with self.assertRaises(MiddlewareNotUsed):
+            metrics.QueryMetricsMiddleware(self._view(0))
+        self.assertIs(Template.render, render)
+
+    @override_settings(DEBUG=False, METRICS_TOKEN="secret")
+    def test_endpoint_requires_token_or_staff(self):
+        url = reverse("metrics")
+        self.assertEqual(self.client.get(url).status_code, 404)
+        response = self.client.get(url, HTTP_AUTHORIZATION="Bearer secret")
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("# TYPE app_view_requests_total counter", response.content.decode())
+
+
+def _create_hot_view_data(students=40, exams=12, questions=20, answers=10, attempts_per_exam=8):
+    """
+    HotViewQueryBudgetTests üçün öz fixture-u: hər tip imtahan (public / qrupa bağlı /
+    kodlu / limitli), başlanmış və bitmiş cəhdlər, post və şərhlər.
+    Ölçü kiçikdir, amma hər siyahıda bir neçə sətir var — N+1 sorğu sayında görünür.
+    """
+    teacher_group, _ = Group.objects.get_or_create(name="teacher")
+    teachers = [User.objects.create_user(f"hv_teacher_{i}", password="pass") for i in range(2)]
+    for t in teachers:
+        t.groups.add(teacher_group)
+    student_list = User.objects.bulk_create([
+        User(username=f"hv_student_{i}", password="!") for i in range(students)
+    ])
+    groups = [StudentGroup.objects.create(teacher=t, name=f"HV-{t.id}") for t in teachers]
+    for i, s in enumerate(student_list):
+        groups[i % len(groups)].students.add(s)
+
+    exam_list = []
+    for i in range(exams):
+        kind = i % 4
+        exam = Exam.objects.create(
+            author=teachers[i % len(teachers)],
+            title=f"Exam {i}",
+            slug=f"hv-exam-{i}",
+            exam_type="test",
+            is_active=(i != exams - 1),
+            is_public=(kind != 1),
+            access_code=("123456" if kind == 2 else ""),
+            max_attempts_per_user=(3 if kind == 3 else None),
+            random_question_count=answers,
+        )
+        if kind == 1:
+            exam.allowed_groups.add(groups[i % len(groups)])
+        block = QuestionBlock.objects.create(exam=exam, name="Blok 1", order=1)
+        qs = ExamQuestion.objects.bulk_create([
+            ExamQuestion(exam=exam, block=block, text=f"Sual {q + 1}", order=q + 1, answer_mode="single")
+            for q in range(questions)
+        ])
+        ExamQuestionOption.objects.bulk_create([
+            ExamQuestionOption(question=q, label="ABCD"[o], text=f"Variant {o + 1}", is_correct=(o == 0))
+            for q in qs for o in range(4)
+        ])
+        exam_list.append((exam, qs))
+
+    now = timezone.now()
+    for i, (exam, qs) in enumerate(exam_list):
+        for j in range(attempts_per_exam):
+            finished = j % 4 != 3
+            attempt = ExamAttempt.objects.create(
+                user=student_list[(i + j * 3) % len(student_list)],
+                exam=exam,
+                attempt_number=1,
+                status="submitted" if finished else "in_progress",
+                finished_at=now if finished else None,
+                duration_seconds=600 if finished else None,
+            )
+            picked = ExamAnswer.objects.bulk_create([
+                ExamAnswer(attempt=attempt, question=q, is_correct=(k % 2 == 0))
+                for k, q in enumerate(qs[:answers])
+            ])
+            ExamAnswer.selected_options.through.objects.bulk_create([
+                ExamAnswer.selected_options.through(
+                    examanswer_id=ans.id,
+                    examquestionoption_id=ans.question.options.order_by("id")[0 if k % 2 == 0 else 1].id,
+                )
+                for k, ans in enumerate(picked)
+            ])
+
+    category = Category.objects.create(name="HV Kateqoriya", slug="hv-kateqoriya")
+    for i in range(6):
+        post = Post.objects.create(
+            author=teachers[0], category=category, title=f"Post {i}", slug=f"hv-post-{i}",
+            excerpt="Qısa xülasə", content="Məzmun " * 50, is_published=(i != 0),
+        )
+        Comment.objects.bulk_create([
+            Comment(post=post, user=student_list[k], text="Şərh", rating=(k % 5) + 1) for k in range(5)
+        ])
+
+    return {"teachers": teachers, "students": student_list}
+
+
+@tag("perf")
+@override_settings(STORAGES=TEST_STORAGES)
+class HotViewQueryBudgetTests(TestCase):
+    """
+    Əsas view-ların sorğu sayı limitləri (data: _create_hot_view_data).
+    Kimsə yenidən sətir başına sorğu (N+1) əlavə etsə, bu testlər yıxılır.
+
+    Yalnız bunları işlətmək: python manage.py test blog --tag=perf
+    """
+
+    # sorğu limitləri: ölçülmüş dəyər + kiçik ehtiyat (dataya görə artmamalıdır)
+    BUDGETS = {
+        "home": 8,
+        "post_detail": 15,
+        "student_exam_list": 12,
+        "assigned_exam_list": 10,
+        "take_exam_get": 22,
+        "take_exam_post": 22,
+        "exam_autosave": 14,
+        "exam_result": 10,
+        "teacher_exam_results": 10,
+        "teacher_exam_submissions_zip": 8,
+    }
+
+    @classmethod
+    def setUpTestData(cls):
+        data = _create_hot_view_data()
+        cls.student = data["students"][7]
+        cls.teacher = data["teachers"][0]
+
+        cls.open_attempt = (
+            ExamAttempt.objects
+            .filter(status="in_progress", exam__exam_type="test")
+            .select_related("exam", "user")
+            .first()
+        )
+        cls.finished_attempt = (
+            ExamAttempt.objects
+            .filter(status="submitted")
+            .select_related("exam", "user")
+            .first()
+        )
+        cls.teacher_exam = Exam.objects.filter(author=cls.teacher).first()
+        cls.post = Post.objects.filter(is_published=True).first()
+
+    def _measure(self, budget_key, user, url, method="get", data=None, expected_status=200):
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as ctx:
+            response = getattr(self.client, method)(url, data or {})
+
+        self.assertEqual(response.status_code, expected_status)
+        self.assertLessEqual(
+            len(ctx), self.BUDGETS[budget_key],
+            f"{budget_key}: {len(ctx)} sorğu (limit {self.BUDGETS[budget_key]})",
+        )
+        return response
+
+    def test_home(self):
+        self._measure("home", self.student, reverse("home"))
+
+    def test_post_detail(self):
+        self._measure("post_detail", self.student, reverse("post_detail", args=[self.post.slug]))
+
+    def test_student_exam_list(self):
+        response = self._measure("student_exam_list", self.student, reverse("student_exam_list"))
+        self.assertTrue(response.context["page_obj"].paginator.count > 0)
+
+    def test_assigned_exam_list(self):
+        self._measure("assigned_exam_list", self.student, reverse("assigned_exam_list"))
+
+    def test_take_exam_get(self):
+        a = self.open_attempt
+        self._measure("take_exam_get", a.user, reverse("take_exam", args=[a.exam.slug, a.id]))
+
+    def test_take_exam_post(self):
+        a = self.open_attempt
+        answers = list(a.answers.prefetch_related("question__options"))
+        data = {
+            f"q_{ans.question_id}": next(o.id for o in ans.question.options.all() if o.is_correct)
+            for ans in answers
+        }
+        self._measure(
+            "take_exam_post", a.user, reverse("take_exam", args=[a.exam.slug, a.id]),
+            method="post", data=data, expected_status=302,
+        )
+
+        a.refresh_from_db()
+        self.assertEqual(a.correct_count, len(answers))
+        self.assertEqual(a.wrong_count, 0)
+
+    def test_exam_autosave(self):
+        a = self.open_attempt
+        ans = a.answers.prefetch_related("question__options").first()
+        correct = next(o.id for o in ans.question.options.all() if o.is_correct)
+        self.client.force_login(a.user)
+        url = reverse("exam_autosave", args=[a.exam.slug, a.id])
+
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.patch(
+                url, {"answers": {str(ans.question_id): {"options": [correct]}}},
+                content_type="application/json",
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertLessEqual(len(ctx), self.BUDGETS["exam_autosave"], f"exam_autosave: {len(ctx)} sorğu")
+        self.assertEqual(response.json()["version"], 1)
+
+        ans.refresh_from_db()
+        a.refresh_from_db()
+        self.assertTrue(ans.is_correct)
+        self.assertEqual(list(ans.selected_options.values_list("id", flat=True)), [correct])
+        self.assertEqual(a.status, "draft")
+        self.assertEqual(a.correct_count + a.wrong_count, a.answers.count())
+
+        response = self.client.patch(url, {"answers": {"x": {}}}, content_type="application/json")
+        self.assertEqual(response.status_code, 400)
+
+    def test_exam_result(self):
+        a = self.finished_attempt
+        self._measure("exam_result", a.user, reverse("exam_result", args=[a.exam.slug, a.id]))
+
+    def test_teacher_exam_results(self):
+        self._measure(
+            "teacher_exam_results", self.teacher,
+            reverse("teacher_exam_results", args=[self.teacher_exam.slug]),
+        )
+
+    def test_teacher_exam_submissions_zip(self):
+        ExamAnswer.objects.filter(attempt__exam=self.teacher_exam).update(text_answer="Cavab mətni")
+
+        self.client.force_login(self.teacher)
+        url = reverse("teacher_exam_submissions_zip", args=[self.teacher_exam.slug])
+        with CaptureQueriesContext(connection) as ctx:
+            response = self.client.get(url)
+            b"".join(response.streaming_content)
+        self.assertEqual(response.status_code, 200)
+        # sorğu sayı cavab / fayl sayından asılı deyil
+        self.assertLessEqual(len(ctx), self.BUDGETS["teacher_exam_submissions_zip"], f"{len(ctx)} sorğu")
+
+
+class ScaleDataTests(TestCase):
+
+    SMALL = {"students": 30, "exams": 8, "questions_per_exam": 12, "answers_per_attempt": 5, "attempts": 40}
+
+    def test_scaled_keeps_per_object_sizes(self):
+        cfg = scale_data.scaled(0.01)
+        self.assertEqual(cfg["students"], 50)
+        self.assertEqual(cfg["questions_per_exam"], scale_data.DEFAULT_SCALE["questions_per_exam"])
+        self.assertEqual(scale_data.scaled(0.0001)["groups"], 1)
+
+    def test_command_counts_and_seed_guard(self):
+        out = io.StringIO()
+        args = [f"--{key.replace('_', '-')}={value}" for key, value in self.SMALL.items()]
+        call_command("generate_scale_data", "--seed=3", "--multiplier=0.05", *args, stdout=out)
+
+        self.assertIn("attempts       40", out.getvalue())
+        self.assertEqual(ExamQuestion.objects.filter(exam__slug__startswith="s3-").count(), 8 * 12)
+        self.assertEqual(ExamAnswer.objects.filter(attempt__exam__slug__startswith="s3-").count(), 40 * 5)
+        # hər (tələbə, imtahan) cütü bir dəfə
+        pairs = ExamAttempt.objects.values_list("user_id", "exam_id")
+        self.assertEqual(len(set(pairs)), len(pairs))
+
+        with self.assertRaises(CommandError):
+            call_command("generate_scale_data", "--seed=3", *args, stdout=io.StringIO())
+
+    def test_same_seed_same_data(self):
+        def texts():
+            return list(ExamQuestion.objects.order_by("exam__slug", "order").values_list("text", flat=True))
+
+        scale = scale_data.scaled(0.01, self.SMALL)
+        with transaction.atomic():
+            scale_data.generate(scale=scale, seed=5)
+            first = texts()
+            transaction.set_rollback(True)
+        scale_data.generate(scale=scale, seed=5)
+        self.assertEqual(texts(), first)
+
+
+class QuestionSelectionTests(TestCase):
+
+    INDEX = {"total": 14, "blocks": [(1, list(range(1, 11))), (2, [11, 12])], "loose": [13, 14]}
+
+    def setUp(self):
+        cache.clear()
+
+    def test_stratified_share_and_fill(self):
+        picked = question_selection.select_question_ids(self.INDEX, 6, "seed")
+        self.assertEqual(len(set(picked)), 6)
+        # hər bloka 3 düşür, 2-ci blokda 2 sual var -> 1 yer qalanlardan doldurulur
+        self.assertTrue({11, 12} <= set(picked))
+        self.assertGreaterEqual(len([q for q in picked if q <= 10]), 3)
+        self.assertEqual(question_selection.select_question_ids(self.INDEX, 6, "seed"), picked)
+
+    def test_all_or_nothing(self):
+        self.assertEqual(sorted(question_selection.select_question_ids(self.INDEX, 99, "x")), list(range(1, 15)))
+        self.assertEqual(question_selection.select_question_ids(self.INDEX, 0, "x"), [])
+        no_blocks = {"total": 3, "blocks": [], "loose": [1, 2, 3]}
+        self.assertEqual(len(question_selection.select_question_ids(no_blocks, 2, "x")), 2)
+
+    def test_attempt_gets_questions_and_index_invalidates(self):
+        author = User.objects.create_user("muellim")
+        exam = Exam.objects.create(author=author, title="Sec", random_question_count=4)
+        block = QuestionBlock.objects.create(exam=exam, name="B", order=1)
+        for i in range(6):
+            ExamQuestion.objects.create(exam=exam, block=block if i % 2 else None, text=f"q{i}", order=i)
+
+        with self.assertNumQueries(1):
+            self.assertEqual(question_selection.exam_question_index(exam.id)["total"], 6)
+        ExamQuestion.objects.create(exam=exam, text="yeni", order=9)
+        self.assertEqual(question_selection.exam_question_index(exam.id)["total"], 7)
+
+        attempt = ExamAttempt.objects.create(exam=exam, user=author)
+        generate_random_questions_for_attempt(attempt)
+        first = list(attempt.answers.order_by("id").values_list("question_id", flat=True))
+        self.assertEqual(len(set(first)), 4)
+        # təkrar çağırış sualları dəyişmir
+        generate_random_questions_for_attempt(attempt)
+        self.assertEqual(list(attempt.answers.order_by("id").values_list("question_id", flat=True)), first)
+
+
+class PreparedAttemptTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("muellim")
+        cls.teacher.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        cls.student = User.objects.create_user("telebe")
+        cls.done = User.objects.create_user("bitirib")
+        cls.inactive = User.objects.create_user("passiv", is_active=False)
+        cls.exam = Exam.objects.create(
+            author=cls.teacher, title="Pool", is_active=True, is_public=False, random_question_count=3,
+        )
+        cls.exam.allowed_users.add(cls.student, cls.done, cls.inactive)
+        for i in range(5):
+            ExamQuestion.objects.create(exam=cls.exam, text=f"q{i}", order=i)
+        ExamAttempt.objects.create(exam=cls.exam, user=cls.done, status="submitted")
+
+    def setUp(self):
+        cache.clear()
+
+    def test_prewarm_skips_exhausted_and_inactive(self):
+        self.assertEqual(attempt_pool.prewarm_exam(self.exam.id), 1)
+        prepared = ExamAttempt.all_objects.get(status="prepared")
+        self.assertEqual(prepared.user, self.student)
+        self.assertEqual(prepared.answers.count(), 3)
+        # təkrar çağırış heç nə yaratmır, prepared adi siyahıda görünmür
+        self.assertEqual(attempt_pool.prewarm_exam(self.exam.id), 0)
+        self.assertFalse(ExamAttempt.objects.filter(status="prepared").exists())
+
+    def test_start_claims_prepared_attempt(self):
+        attempt_pool.prewarm_exam(self.exam.id)
+        prepared = ExamAttempt.all_objects.get(status="prepared")
+
+        self.client.force_login(self.student)
+        response = self.client.get(reverse("start_exam", args=[self.exam.slug]))
+        self.assertRedirects(response, reverse("take_exam", args=[self.exam.slug, prepared.id]), fetch_redirect_response=False)
+        prepared.refresh_from_db()
+        self.assertEqual((prepared.status, prepared.attempt_number), ("in_progress", 1))
+        self.assertIsNone(attempt_pool.claim_prepared_attempt(self.exam, self.student, 2))
+
+    def test_prepared_answers_not_in_question_stats(self):
+        attempt_pool.prewarm_exam(self.exam.id)
+        question = ExamAnswer.objects.filter(attempt__status="prepared").first().question
+        self.assertEqual(question.total_answers, 0)
+        self.assertEqual(question.correct_ratio, 0)
+
+        self.client.force_login(self.teacher)
+        response = self.client.get(reverse("teacher_exam_results", args=[self.exam.slug]))
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(all(q.answers_total == 0 for q in response.context["hardest_questions"]))
+
+
+class ExamScheduleTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("muellim")
+        cls.student = User.objects.create_user("telebe")
+
+    def setUp(self):
+        cache.clear()
+        self.now = timezone.now()
+
+    def make_exam(self, title, **kwargs):
+        exam = Exam.objects.create(author=self.teacher, title=title, is_public=False, **kwargs)
+        exam.allowed_users.add(self.student)
+        ExamQuestion.objects.create(exam=exam, text="q", order=1)
+        return exam
+
+    def test_run_schedule_prewarms_opens_and_closes(self):
+        soon = self.make_exam("soon", opens_at=self.now + timedelta(seconds=60))
+        due = self.make_exam("due", opens_at=self.now - timedelta(seconds=1))
+        over = self.make_exam("over", is_active=True, opens_at=self.now - timedelta(hours=2),
+                              closes_at=self.now - timedelta(seconds=1), schedule_state="opened")
+
+        stats = exam_schedule.run_schedule(self.now)
+        self.assertEqual(stats, {"prewarmed": 2, "opened": 1, "closed": 1})
+        soon.refresh_from_db()
+        due.refresh_from_db()
+        over.refresh_from_db()
+        self.assertEqual((soon.is_active, soon.schedule_state), (False, ""))
+        self.assertEqual((due.is_active, due.schedule_state), (True, "opened"))
+        self.assertEqual((over.is_active, over.schedule_state), (False, "closed"))
+
+        # əl ilə söndürülən imtahan yenidən açılmır
+        Exam.objects.filter(id=due.id).update(is_active=False)
+        self.assertEqual(exam_schedule.run_schedule(self.now)["opened"], 0)
+
+    def test_window_blocks_start(self):
+        exam = self.make_exam("later", is_active=True, opens_at=self.now + timedelta(hours=1))
+        self.assertEqual(exam.can_user_start(self.student), (False, "İmtahan hələ açılmayıb."))
+        exam.opens_at, exam.closes_at = None, self.now
+        self.assertEqual(exam.can_user_start(self.student), (False, "İmtahanın vaxtı bitib."))
+
+    def test_admission_delay_is_stable_and_bounded(self):
+        exam = self.make_exam("ramp", is_active=True, opens_at=self.now)
+        wait = exam_schedule.admission_delay(exam, self.student, now=self.now)
+        self.assertTrue(0 <= wait < exam_schedule.RAMP_SECONDS)
+        self.assertEqual(exam_schedule.admission_delay(exam, self.student, now=self.now), wait)
+        later = self.now + timedelta(seconds=exam_schedule.RAMP_SECONDS)
+        self.assertEqual(exam_schedule.admission_delay(exam, self.student, now=later), 0)
+        self.assertEqual(exam_schedule.admission_delay(exam, self.teacher, now=self.now), 0)
+
+    def test_busy_start_gets_wait_page_that_retries(self):
+        exam = self.make_exam("busy", is_active=True, opens_at=self.now)
+        self.client.force_login(self.student)
+        with mock.patch("blog.views.admission_delay", return_value=7):
+            response = self.client.get(reverse("start_exam", args=[exam.slug]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Retry-After"], "7")
+        self.assertTemplateUsed(response, "blog/exam_wait.html")
+        self.assertContains(response, reverse("start_exam", args=[exam.slug]))
+        self.assertFalse(ExamAttempt.objects.filter(exam=exam).exists())
+
+        with mock.patch("blog.views.admission_delay", return_value=0):
+            response = self.client.get(reverse("start_exam", args=[exam.slug]))
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(ExamAttempt.objects.filter(exam=exam, user=self.student).exists())
+
+
+class AttemptExpiryTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("muellim")
+        cls.exam = Exam.objects.create(author=cls.teacher, title="Timed", exam_type="test", total_duration_minutes=30)
+        cls.untimed = Exam.objects.create(author=cls.teacher, title="Free", exam_type="test")
+        cls.question = ExamQuestion.objects.create(exam=cls.exam, text="q", order=1)
+
+    def attempt(self, exam, username, minutes_ago, status="in_progress"):
+        attempt = ExamAttempt.objects.create(exam=exam, user=User.objects.create_user(username), status=status)
+        ExamAttempt.objects.filter(id=attempt.id).update(started_at=self.now - timedelta(minutes=minutes_ago))
+        attempt.refresh_from_db()
+        return attempt
+
+    def setUp(self):
+        self.now = timezone.now()
+
+    def test_overdue_attempts_expired_and_rescored(self):
+        overdue = self.attempt(self.exam, "a", 40)
+        ExamAnswer.objects.create(attempt=overdue, question=self.question, is_correct=True)
+        in_grace = self.attempt(self.exam, "b", 30.5)
+        running = self.attempt(self.exam, "c", 5)
+        submitted = self.attempt(self.exam, "d", 40, status="submitted")
+        no_limit = self.attempt(self.untimed, "e", 600)
+
+        self.assertEqual(attempt_expiry.expire_all_overdue(self.now, batch_size=1), 1)
+        overdue.refresh_from_db()
+        self.assertEqual(overdue.status, "expired")
+        self.assertEqual(overdue.finished_at, overdue.started_at + timedelta(minutes=30))
+        self.assertEqual((overdue.duration_seconds, overdue.correct_count, overdue.wrong_count), (1800, 1, 0))
+        for other in (in_grace, running, no_limit):
+            other.refresh_from_db()
+            self.assertEqual(other.status, "in_progress")
+        submitted.refresh_from_db()
+        self.assertEqual(submitted.status, "submitted")
+
+        # grace bitəndən sonra
+        later = self.now + timedelta(seconds=attempt_expiry.GRACE_SECONDS + 60)
+        self.assertEqual(attempt_expiry.expire_all_overdue(later), 1)
+
+    def test_sweeper_logs_failures_and_keeps_running(self):
+        calls = []
+
+        def broken():
+            calls.append(1)
+            if len(calls) >= 2:
+                raise asyncio.CancelledError
+            raise RuntimeError("db down")
+
+        with mock.patch.object(attempt_expiry, "SWEEP_INTERVAL_SECONDS", 0), \
+                mock.patch.object(attempt_expiry, "expire_all_overdue", broken), \
+                self.assertLogs("blog.attempt_expiry", "ERROR") as logs:
+            with self.assertRaises(asyncio.CancelledError):
+                asyncio.run(attempt_expiry._sweeper_loop())
+
+        self.assertEqual(len(calls), 2)
+        self.assertIn("attempt expiry sweep failed", logs.output[0])
+
+
+class AutosaveDeltaTests(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.student = User.objects.create_user("telebe")
+        teacher = User.objects.create_user("muellim")
+        cls.test_exam = Exam.objects.create(author=teacher, title="Test", exam_type="test", is_active=True)
+        cls.question = ExamQuestion.objects.create(exam=cls.test_exam, text="q", order=1)
+        cls.right = ExamQuestionOption.objects.create(question=cls.question, text="A", is_correct=True)
+        cls.wrong = ExamQuestionOption.objects.create(question=cls.question, text="B")
+        cls.written_exam = Exam.objects.create(author=teacher, title="Yazılı", exam_type="written", is_active=True)
+        cls.written_q = ExamQuestion.objects.create(exam=cls.written_exam, text="w", order=1)
+
+    def setUp(self):
+        self.attempt = ExamAttempt.objects.create(exam=self.test_exam, user=self.student, status="in_progress")
+        self.answer = ExamAnswer.objects.create(attempt=self.attempt, question=self.question, text_answer="qeyd")
+
+    def test_options_only_keeps_text(self):
+        version = attempt_autosave.save_answer_deltas(self.attempt, {self.question.id: {"options": [self.right.id]}})
+        self.assertEqual(version, 1)
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.text_answer, "qeyd")
+        self.assertTrue(self.answer.is_correct)
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.correct_count), ("draft", 1))
+
+    def test_text_only_keeps_selection(self):
+        attempt_autosave.save_answer_deltas(self.attempt, {self.question.id: {"options": [self.right.id]}})
+        attempt_autosave.save_answer_deltas(self.attempt, {self.question.id: {"text": "yeni"}})
+        self.answer.refresh_from_db()
+        self.assertEqual(self.answer.text_answer, "yeni")
+        self.assertTrue(self.answer.is_correct)
+        self.assertEqual(list(self.answer.selected_options.values_list("id", flat=True)), [self.right.id])
+
+    def test_written_text_saved(self):
+        attempt = ExamAttempt.objects.create(exam=self.written_exam, user=self.student, status="in_progress")
+        answer = ExamAnswer.objects.create(attempt=attempt, question=self.written_q)
+        attempt_autosave.save_answer_deltas(attempt, {self.written_q.id: {"text": "cavab", "options": [1]}})
+        answer.refresh_from_db()
+        self.assertEqual(answer.text_answer, "cavab")
+
+    def test_finished_attempt_not_written(self):
+        ExamAttempt.objects.filter(id=self.attempt.id).update(status="submitted")
+        self.assertIsNone(attempt_autosave.save_answer_deltas(self.attempt, {self.question.id: {"text": "x"}}))
+
+    def test_parse_and_buffer_merge_fields(self):
+        changes = attempt_autosave.parse_changes({"answers": {"5": {"options": ["3"], "text": " t "}}})
+        self.assertEqual(changes, {5: {"options": [3], "text": "t"}})
+        for bad in ({"answers": {"x": {}}}, {"answers": {"5": {}}}, {"answers": {"5": {"options": [True]}}}):
+            with self.assertRaises(ValueError):
+                attempt_autosave.parse_changes(bad)
+
+        buf = attempt_autosave.AutosaveBuffer()
+        buf.add(1, {5: {"text": "a"}})
+        buf.add(1, {5: {"options": [3]}})
+        pending = buf.drain()
+        self.assertEqual(pending, {1: {5: {"text": "a", "options": [3]}}})
+        buf.add(1, {5: {"text": "b"}})
+        buf.restore(pending)
+        self.assertEqual(buf.pop(1), {5: {"text": "b", "options": [3]}})
+
+
+@override_settings(
+    EXAM_WS_AUTOSAVE=True,
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+)
+class AttemptConsumerTests(TransactionTestCase):
+
+    def setUp(self):
+        self.student = User.objects.create_user("telebe")
+        exam = Exam.objects.create(author=self.student, title="WS", exam_type="test", is_active=True)
+        self.question = ExamQuestion.objects.create(exam=exam, text="q", order=1)
+        self.option = ExamQuestionOption.objects.create(question=self.question, text="A", is_correct=True)
+        self.attempt = ExamAttempt.objects.create(exam=exam, user=self.student, status="in_progress")
+        ExamAnswer.objects.create(attempt=self.attempt, question=self.question)
+        patcher = mock.patch("blog.consumers.ensure_flusher")
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.addCleanup(attempt_autosave.buffer.drain)
+
+    def communicator(self, user):
+        comm = WebsocketCommunicator(ExamAttemptConsumer.as_asgi(), f"/ws/exams/attempt/{self.attempt.id}/")
+        comm.scope["user"] = user
+        comm.scope["url_route"] = {"kwargs": {"attempt_id": self.attempt.id}}
+        return comm
+
+    def test_rejects_anonymous(self):
+        async def scenario():
+            connected, _ = await self.communicator(AnonymousUser()).connect()
+            self.assertFalse(connected)
+
+        async_to_sync(scenario)()
+
+    def test_answers_buffered_then_flushed(self):
+        async def scenario():
+            comm = self.communicator(self.student)
+            connected, _ = await comm.connect()
+            self.assertTrue(connected)
+            self.assertEqual(await comm.receive_json_from(), {"type": "time", "remaining_seconds": None})
+
+            await comm.send_json_to({"type": "answers", "answers": {str(self.question.id): {"options": [self.option.id]}}})
+            self.assertEqual(await comm.receive_json_from(), {"type": "queued", "question_ids": [self.question.id]})
+            await comm.send_json_to({"type": "answers", "answers": {"x": {}}})
+            self.assertEqual((await comm.receive_json_from())["type"], "error")
+
+            await comm.send_json_to({"type": "flush"})
+            self.assertEqual(await comm.receive_json_from(), {"type": "saved", "version": 1})
+            await comm.disconnect()
+
+        async_to_sync(scenario)()
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.correct_count), ("draft", 1))
+
+    def test_deadline_flushes_and_expires(self):
+        self.attempt.exam.total_duration_minutes = 1
+        self.attempt.exam.save(update_fields=["total_duration_minutes"])
+        ExamAttempt.objects.filter(id=self.attempt.id).update(started_at=timezone.now() - timedelta(minutes=2))
+        attempt_autosave.buffer.add(self.attempt.id, {self.question.id: {"options": [self.option.id]}})
+
+        async def scenario():
+            comm = self.communicator(self.student)
+            connected, _ = await comm.connect()
+            self.assertTrue(connected)
+            self.assertEqual(await comm.receive_json_from(), {"type": "time", "remaining_seconds": 0})
+            finished = await comm.receive_json_from()
+            self.assertEqual(finished["type"], "finished")
+            self.assertIn(str(self.attempt.id), finished["redirect_url"])
+            await comm.wait()
+
+        async_to_sync(scenario)()
+        self.attempt.refresh_from_db()
+        self.assertEqual((self.attempt.status, self.attempt.correct_count), ("expired", 1))
+
+
+class ExamAccessTests(TestCase):
+    """Siyahıdakı toplu yoxlama Exam metodları ilə eyni nəticəni verməlidir."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.teacher = User.objects.create_user("muellim")
+        cls.student = User.objects.create_user("telebe")
+        group = StudentGroup.objects.create(teacher=cls.teacher, name="A1")
+        group.students.add(cls.student)
+
+        def exam(title, **kwargs):
+            kwargs.setdefault("is_active", True)
+            return Exam.objects.create(author=cls.teacher, title=title, **kwargs)
+
+        cls.public = exam("public", is_public=True)
+        cls.coded = exam("coded", is_public=True, access_code="1234")
+        cls.private = exam("private", is_public=False)
+        cls.by_group = exam("group", is_public=False, access_code="9999")
+        cls.by_group.allowed_groups.add(group)
+        cls.limited = exam("limited", is_public=True, max_attempts_per_user=1)
+        ExamAttempt.objects.create(exam=cls.limited, user=cls.student, status="submitted")
+        cls.inactive = exam("inactive", is_public=True, is_active=False)
+
+    def test_items_match_model_rules(self):
+        exams = Exam.objects.order_by("id")
+        with self.assertNumQueries(6):
+            items = {item["exam"].title: item for item in _build_exam_items(self.student, exams)}
+
+        self.assertEqual(set(items), {"public", "coded", "group"})
+        self.assertFalse(items["public"]["requires_code"])
+        self.assertTrue(items["coded"]["requires_code"])
+        # qrup üzvü kodsuz başlayır
+        self.assertFalse(items["group"]["requires_code"])
+
+        for exam in exams:
+            visible = exam.can_user_see(self.student) and exam.attempts_left_for(self.student) != 0
+            self.assertEqual(exam.title in items, visible, exam.title)
+
+    def test_author_sees_own_inactive_exam(self):
+        titles = {item["exam"].title for item in _build_exam_items(self.teacher, Exam.objects.all())}
+        self.assertIn("inactive", titles)
+        self.assertIn("private", titles)
+
+
+@tag("perf")
+class HotPathIndexTests(TestCase):
+    """
+    EXPLAIN ilə yoxlayır ki, hot path sorğuları üçün əlavə olunan index-lər
+    (blog 0025, liveExam 0009) planner tərəfindən həqiqətən istifadə olunur.
+    """
+
+    @classmethod
+    def setUpTestData(cls):
+        data = scale_data.generate(scale=scale_data.scaled(0.05, {"live_sessions": 100}), seed=1)
+        cls.student = data["students"][0]
+        cls.teacher = data["teachers"][0]
+        cls.exam = data["exams"][0]
+        cls.live_session = data["live_sessions"][1]
+
+        # planner statistikası (sqlite_stat1 / pg_statistic)
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+
+    def setUp(self):
+        if connection.vendor not in ("sqlite", "postgresql"):
+            raise unittest.SkipTest("EXPLAIN formatı yalnız sqlite / postgresql üçün yoxlanır")
+        if connection.vendor == "postgresql":
+            # kiçik test cədvəllərində seq scan həmişə ucuz görünür
+            with connection.cursor() as cursor:
+                cursor.execute("SET enable_seqscan = off")
+
+    def assertUsesIndex(self, qs, index_name):
+        plan = qs.explain()
+        self.assertIn(index_name, plan, plan)
+
+    def test_start_or_resume_attempt(self):
+        qs = (
+            self.exam.attempts
+            .filter(user=self.student, status__in=["draft", "in_progress"])
+            .order_by("-started_at")
+        )
+        self.assertUsesIndex(qs, "attempt_exam_user_status_idx")
+
+    def test_teacher_pending_attempts(self):
+        qs = (
+            ExamAttempt.objects
+            .filter(exam__author=self.teacher, status__in=["submitted", "expired"], checked_by_teacher=False)
+            .exclude(exam__exam_type="test")
+            .order_by("finished_at")
+        )
+        self.assertUsesIndex(qs, "attempt_review_queue_idx")
+
+    def test_home_posts(self):
+        qs = Post.objects.filter(is_published=True).order_by("-created_at")[:6]
+        self.assertUsesIndex(qs, "post_published_created_idx")
+
+    def test_active_exams(self):
+        qs = Exam.objects.filter(is_active=True).order_by("-created_at")
+        self.assertUsesIndex(qs, "exam_active_created_idx")
+
+    def test_live_answer_progress(self):
+        from liveExam.models import LiveAnswer, LivePlayer
+
+        qid = self.live_session.selected_question_ids[0]
+        answered = (
+            LiveAnswer.objects
+            .filter(session=self.live_session, question_id=qid)
+            .values("player_id")
+            .distinct()
+        )
+        self.assertUsesIndex(answered, "liveans_session_q_player_idx")
+
+        online = LivePlayer.objects.filter(session=self.live_session, is_connected=True)
+        self.assertUsesIndex(online, "liveplayer_session_online_idx")
+
+
+class ZipInspectorTests(SimpleTestCase):
+    """blog/zip_inspect.py: limitlər, magic bytes, iç-içə arxivlər."""
+
+    @staticmethod
+    def make_zip(entries, compression=zipfile.ZIP_DEFLATED):
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w", compression) as zf:
+            for name, data in entries:
+                zf.writestr(name, data)
+        return buf.getvalue()
+
+    def upload(self, name, data):
+        return SimpleUploadedFile(name, data)
+
+    def test_valid_zip(self):
+        data = self.make_zip([("a/report.pdf", b"%PDF-1.4 ok"), ("a/img.png", b"\x89PNG\r\n\x1a\n...")])
+        stats = zip_inspect.inspect_zip(io.BytesIO(data))
+        self.assertEqual(stats["entries"], 2)
+        validate_zip_contents(self.upload("answer.zip", data))
+
+    def test_executable_detected_by_magic(self):
+        data = self.make_zip([("notes.pdf", b"MZ\x90\x00" + b"\x00" * 100)])
+        with self.assertRaisesMessage(ValidationError, "notes.pdf"):
+            validate_zip_contents(self.upload("answer.zip", data))
+
+    def test_zip_detected_without_extension(self):
+        data = self.make_zip([("run.sh", b"echo")])
+        with self.assertRaises(ValidationError):
+            validate_zip_contents(self.upload("answer.pdf", data))
+
+    def test_entry_count_limit(self):
+        data = self.make_zip([(f"{i}.txt", b"x") for i in range(20)])
+        with mock.patch.object(zip_inspect, "MAX_ENTRIES", 10):
+            with self.assertRaisesMessage(ValidationError, "çox fayl"):
+                zip_inspect.inspect_zip(io.BytesIO(data))
+
+    def test_compression_ratio_bomb(self):
+        data = self.make_zip([("zeros.txt", b"\x00" * (20 * 1024 * 1024))])
+        with self.assertRaisesMessage(ValidationError, "sıxılma nisbəti"):
+            zip_inspect.inspect_zip(io.BytesIO(data))
+
+    def test_nested_zip_checked(self):
+        inner = self.make_zip([("evil.bin", b"\x7fELF" + b"\x00" * 64)])
+        outer = self.make_zip([("inner.zip", inner)])
+        with self.assertRaisesMessage(ValidationError, "inner.zip"):
+            zip_inspect.inspect_zip(io.BytesIO(outer))
+
+        deep = outer
+        for i in range(zip_inspect.MAX_DEPTH + 1):
+            deep = self.make_zip([(f"level{i}.zip", deep)])
+        with self.assertRaisesMessage(ValidationError, "dərin"):
+            zip_inspect.inspect_zip(io.BytesIO(deep))
+
+    def test_path_traversal(self):
+        data = self.make_zip([("../../etc/passwd.pdf", b"%PDF-")])
+        with self.assertRaisesMessage(ValidationError, "yanlış yol"):
+            zip_inspect.inspect_zip(io.BytesIO(data))
+
+    def test_corrupt_zip(self):
+        with self.assertRaisesMessage(ValidationError, "zədəlidir"):
+            validate_zip_contents(self.upload("answer.zip", b"PK\x03\x04 truncated"))
+
+    def test_signature_must_match_extension(self):
+        validate_file_signature(self.upload("scan.jpg", b"\xff\xd8\xff\xe0 data"))
+        with self.assertRaisesMessage(ValidationError, "uyğun deyil"):
+            validate_file_signature(self.upload("scan.pdf", b"MZ\x90\x00"))
+
+
+class AnswerUploadTests(TestCase):
+
+    PDF = b"%PDF-1.4\n" + b"0123456789" * 3
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(STORAGES=TEST_STORAGES, MEDIA_ROOT=media, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+        patcher = mock.patch.object(answer_uploads, "CHUNK_SIZE", 16)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+        self.student = User.objects.create_user("telebe")
+        exam = Exam.objects.create(author=self.student, title="Yazılı", exam_type="written", is_active=True)
+        self.question = ExamQuestion.objects.create(exam=exam, text="w", order=1)
+        self.attempt = ExamAttempt.objects.create(
+            exam=exam, user=self.student, status="in_progress", started_at=timezone.now()
+        )
+        self.answer = ExamAnswer.objects.create(attempt=self.attempt, question=self.question)
+        self.start_url = reverse("exam_upload_start", args=[exam.slug, self.attempt.id])
+        self.client.force_login(self.student)
+
+    def _start(self, **extra):
+        payload = {"question_id": self.question.id, "filename": "cavab.pdf", "size": len(self.PDF), **extra}
+        return self.client.post(self.start_url, payload, content_type="application/json")
+
+    def _put(self, upload_id, offset, body):
+        return self.client.put(
+            f"{self.start_url}{upload_id}/", body,
+            content_type="application/octet-stream", HTTP_UPLOAD_OFFSET=str(offset),
+        )
+
+    def _upload(self):
+        start = self._start().json()
+        offset = start["offset"]
+        while True:
+            data = self._put(start["upload_id"], offset, self.PDF[offset:offset + start["chunk_size"]]).json()
+            offset = data["offset"]
+            if data["complete"]:
+                return data
+
+    def test_chunks_assembled_and_resumed(self):
+        start = self._start().json()
+        self.assertEqual((start["complete"], start["offset"], start["chunk_size"]), (False, 0, 16))
+        upload_id = start["upload_id"]
+
+        self.assertEqual(self._put(upload_id, 0, self.PDF[:16]).json(), {"success": True, "complete": False, "offset": 16})
+        # yenidən başlanğıc: eyni sessiya, serverin offset-indən davam
+        self.assertEqual((self._start().json()["upload_id"], self._start().json()["offset"]), (upload_id, 16))
+        self.assertEqual(self.client.get(f"{self.start_url}{upload_id}/").json()["offset"], 16)
+
+        stale = self._put(upload_id, 0, self.PDF[:16])
+        self.assertEqual((stale.status_code, stale.json()["offset"]), (409, 16))
+
+        self.assertEqual(self._put(upload_id, 16, self.PDF[16:]).status_code, 400)
+        self.assertEqual(self._put(upload_id, 16, self.PDF[16:32]).json()["offset"], 32)
+        data = self._put(upload_id, 32, self.PDF[32:])
+        self.assertTrue(data.json()["complete"])
+        obj = self.answer.files.get()
+        self.assertEqual(data.json()["file"]["id"], obj.id)
+        self.assertEqual(obj.original_name, "cavab.pdf")
+        with obj.file.open("rb") as fh:
+            self.assertEqual(fh.read(), self.PDF)
+        self.assertFalse(ExamAnswerUpload.objects.exists())
+        self.assertEqual(list(answer_uploads.upload_temp_dir().iterdir()), [])
+
+    def test_same_content_deduplicated(self):
+        first = self._upload()
+        self.assertFalse(first["deduplicated"])
+        self.assertTrue(self._upload()["deduplicated"])
+
+        digest = answer_uploads.file_sha256([self.PDF])
+        known = self._start(sha256=digest).json()
+        self.assertEqual((known["complete"], known["file"]["id"]), (True, first["file"]["id"]))
+        self.assertEqual(self.answer.files.count(), 1)
+
+    def test_stale_uploads_discarded(self):
+        upload_id = self._start().json()["upload_id"]
+        self.assertEqual(answer_uploads.discard_stale_uploads(), 0)
+        ExamAnswerUpload.objects.filter(id=upload_id).update(
+            updated_at=timezone.now() - timedelta(hours=answer_uploads.STALE_UPLOAD_HOURS + 1)
+        )
+        self.assertEqual(answer_uploads.discard_stale_uploads(), 1)
+        self.assertFalse(ExamAnswerUpload.objects.exists())
+        self.assertEqual(list(answer_uploads.upload_temp_dir().iterdir()), [])
+
+    def test_started_upload_finishes_within_grace(self):
+        upload_id = self._start().json()["upload_id"]
+        self.attempt.exam.total_duration_minutes = 1
+        self.attempt.exam.save(update_fields=["total_duration_minutes"])
+        ExamAttempt.objects.filter(id=self.attempt.id).update(started_at=timezone.now() - timedelta(seconds=65))
+
+        self.assertTrue(self._put(upload_id, 0, self.PDF[:16]).json()["success"])
+        # yeni yükləmə deadline-dan sonra başlamır
+        self.assertEqual(self._start(filename="diger.pdf").status_code, 409)
+        self.attempt.refresh_from_db()
+        self.assertEqual(self.attempt.status, "expired")
+
+    def test_delete_file(self):
+        file_id = self._upload()["file"]["id"]
+        url = reverse("exam_answer_file_delete", args=[self.attempt.exam.slug, self.attempt.id, file_id])
+
+        self.client.force_login(User.objects.create_user("diger"))
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+        self.client.force_login(self.student)
+        self.assertEqual(self.client.get(url).status_code, 405)
+        self.assertEqual(self.client.post(url).json(), {"success": True, "id": file_id})
+        self.assertFalse(self.answer.files.exists())
+        self.assertEqual(self.client.post(url).status_code, 404)
+
+        file_id = self._upload()["file"]["id"]
+        ExamAttempt.objects.filter(id=self.attempt.id).update(status="submitted")
+        url = reverse("exam_answer_file_delete", args=[self.attempt.exam.slug, self.attempt.id, file_id])
+        self.assertEqual(self.client.post(url).status_code, 409)
+        self.assertTrue(self.answer.files.exists())
+
+
+class BlobRefTests(TestCase):
+
+    PDF = b"%PDF-1.4\n blob"
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(STORAGES=TEST_STORAGES, MEDIA_ROOT=media, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        students = [User.objects.create_user(f"telebe{i}") for i in range(2)]
+        exam = Exam.objects.create(author=students[0], title="Yazılı", exam_type="written", is_active=True)
+        question = ExamQuestion.objects.create(exam=exam, text="w", order=1)
+        self.attempts = [ExamAttempt.objects.create(exam=exam, user=u, status="in_progress") for u in students]
+        self.answers = [ExamAnswer.objects.create(attempt=a, question=question) for a in self.attempts]
+
+    def _attach(self, answer, data=None, name="cavab.pdf"):
+        data = data or self.PDF
+        return answer_uploads.attach_file(answer.id, File(io.BytesIO(data), name=name), answer_uploads.file_sha256([data]))
+
+    def _age(self, name, hours=2):
+        old = time.time() - hours * 3600
+        os.utime(answer_file_storage.path(name), (old, old))
+        FileBlob.objects.filter(name=name).update(updated_at=timezone.now() - timedelta(hours=hours))
+
+    def test_shared_blob_ref_count(self):
+        first, created = self._attach(self.answers[0])
+        self.assertTrue(created)
+        self.assertFalse(self._attach(self.answers[0], name="tekrar.pdf")[1])
+        second, _ = self._attach(self.answers[1], name="basqa.pdf")
+
+        self.assertEqual(first.file.name, second.file.name)
+        self.assertTrue(answer_file_storage.is_blob(first.file.name))
+        blob = FileBlob.objects.get()
+        self.assertEqual((blob.name, blob.ref_count, blob.size), (first.file.name, 2, len(self.PDF)))
+
+        first.delete()
+        self.assertEqual(FileBlob.objects.get().ref_count, 1)
+        # cascade silinmə də sayılır
+        self.attempts[1].delete()
+        self.assertEqual(FileBlob.objects.get().ref_count, 0)
+
+    def test_gc_removes_unreferenced_blob_after_grace(self):
+        obj, _ = self._attach(self.answers[0])
+        name = obj.file.name
+        obj.delete()
+
+        # yenicə istinadsız qalıb — grace bitməyib
+        self.assertEqual(blob_refs.collect_garbage()["blobs"], 0)
+        self._age(name)
+        self.assertEqual(blob_refs.collect_garbage(dry_run=True), {"blobs": 1, "orphans": 0, "bytes": len(self.PDF)})
+        self.assertTrue(answer_file_storage.exists(name))
+
+        self.assertEqual(blob_refs.collect_garbage()["blobs"], 1)
+        self.assertFalse(answer_file_storage.exists(name))
+        self.assertFalse(FileBlob.objects.exists())
+
+    def test_gc_keeps_referenced_and_reused_blobs(self):
+        kept, _ = self._attach(self.answers[0])
+        dropped, _ = self._attach(self.answers[1], data=b"%PDF-1.4\n other")
+        dropped.delete()
+        self._age(kept.file.name)
+        self._age(dropped.file.name)
+        # eyni məzmun yenidən yüklənib: storage mtime-ı yeniləyir, blob silinmir
+        self._attach(self.answers[1], data=b"%PDF-1.4\n other")
+
+        self.assertEqual(blob_refs.collect_garbage()["blobs"], 0)
+        self.assertTrue(answer_file_storage.exists(kept.file.name))
+        self.assertTrue(answer_file_storage.exists(dropped.file.name))
+        self.assertEqual(FileBlob.objects.get(name=dropped.file.name).ref_count, 1)
+
+    def test_gc_removes_old_orphan_files(self):
+        kept, _ = self._attach(self.answers[0])
+        self._age(kept.file.name)
+        # FileBlob sətri yazılmamış (yarımçıq qalmış) blob-lar
+        orphan = answer_file_storage.save(None, ContentFile(b"%PDF-1.4 orphan", name="a.pdf"))
+        fresh = answer_file_storage.save(None, ContentFile(b"%PDF-1.4 fresh", name="b.pdf"))
+        self._age(orphan)
+
+        out = io.StringIO()
+        call_command("gc_answer_files", "--dry-run", stdout=out)
+        self.assertIn("Would remove blobs: 0, orphan files: 1", out.getvalue())
+        self.assertTrue(answer_file_storage.exists(orphan))
+
+        call_command("gc_answer_files", stdout=io.StringIO())
+        self.assertFalse(answer_file_storage.exists(orphan))
+        self.assertTrue(answer_file_storage.exists(fresh))
+        self.assertTrue(answer_file_storage.exists(kept.file.name))
+
+
+class SubmissionExportTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(STORAGES=TEST_STORAGES, MEDIA_ROOT=media, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+
+        self.teacher = User.objects.create_user("muellim")
+        self.teacher.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        self.student = User.objects.create_user("telebe")
+        self.exam = Exam.objects.create(author=self.teacher, title="Yazılı", exam_type="written", is_active=True)
+        questions = [ExamQuestion.objects.create(exam=self.exam, text=f"w{i}", order=i) for i in (1, 2)]
+        self.attempt = ExamAttempt.objects.create(exam=self.exam, user=self.student, status="submitted")
+        self.answers = [ExamAnswer.objects.create(attempt=self.attempt, question=q) for q in questions]
+        self.url = reverse("teacher_exam_submissions_zip", args=[self.exam.slug])
+
+    def _attach(self, answer, name, data):
+        return answer_uploads.attach_file(answer.id, File(io.BytesIO(data), name=name), answer_uploads.file_sha256([data]))[0]
+
+    def _download(self, **params):
+        self.client.force_login(self.teacher)
+        response = self.client.get(self.url, params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "application/zip")
+        return zipfile.ZipFile(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_text_answer_layout(self):
+        ExamAnswer.objects.filter(id=self.answers[1].id).update(text_answer="Cavab mətni")
+        with self._download(attempt=[self.attempt.id]) as zf:
+            self.assertEqual(zf.namelist(), ["telebe/cehd-1/sual-02/cavab.txt"])
+            self.assertEqual(zf.read("telebe/cehd-1/sual-02/cavab.txt").decode(), "Cavab mətni")
+
+        with self._download(attempt=[self.attempt.id + 1]) as zf:
+            self.assertEqual(zf.namelist(), [])
+
+    def test_files_compression_duplicates_and_missing_blob(self):
+        ExamAnswer.objects.filter(id=self.answers[0].id).update(text_answer="mətn " * 200)
+        first = b"%PDF-1.4\n birinci"
+        second = b"%PDF-1.4\n ikinci"
+        self._attach(self.answers[0], "cavab.pdf", first)
+        self._attach(self.answers[0], "cavab.pdf", second)
+        lost = self._attach(self.answers[1], "itkin.pdf", b"%PDF-1.4\n itkin")
+        answer_file_storage.delete(lost.file.name)
+
+        with self._download() as zf:
+            self.assertIsNone(zf.testzip())
+            infos = {info.filename: info for info in zf.infolist()}
+            folder = "telebe/cehd-1/sual-01"
+            # blob-u olmayan fayl atlanır, arxiv yenə tamdır
+            self.assertEqual(sorted(infos), [f"{folder}/cavab (2).pdf", f"{folder}/cavab.pdf", f"{folder}/cavab.txt"])
+            self.assertEqual(zf.read(f"{folder}/cavab.pdf"), first)
+            self.assertEqual(zf.read(f"{folder}/cavab (2).pdf"), second)
+            # PDF artıq sıxılmış sayılır, mətn deflate olunur
+            self.assertEqual(infos[f"{folder}/cavab.pdf"].compress_type, zipfile.ZIP_STORED)
+            self.assertEqual(infos[f"{folder}/cavab.txt"].compress_type, zipfile.ZIP_DEFLATED)
+            self.assertLess(infos[f"{folder}/cavab.txt"].compress_size, infos[f"{folder}/cavab.txt"].file_size)
+
+    def test_only_exam_author(self):
+        self.client.force_login(self.student)
+        self.assertNotEqual(self.client.get(self.url).status_code, 200)
+
+
+class ImageRenditionTests(TestCase):
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(STORAGES=TEST_STORAGES, MEDIA_ROOT=media, MEDIA_URL="/media/")
+        override.enable()
+        self.addCleanup(override.disable)
+        self.author = User.objects.create_user("muellif")
+
+    def _png(self, size=(2000, 1000)):
+        out = io.BytesIO()
+        Image.new("RGBA", size, (200, 10, 10, 128)).save(out, "PNG")
+        return SimpleUploadedFile("cover.png", out.getvalue(), content_type="image/png")
+
+    def test_post_renditions(self):
+        with self.captureOnCommitCallbacks() as callbacks:
+            post = Post.objects.create(title="Şəkilli", content="x", author=self.author, image=self._png())
+        # yükləmədən sonra arxa fonda yaradılma planlanır
+        self.assertEqual(len(callbacks), 1)
+
+        # nüsxə hələ yoxdur -> orijinal
+        self.assertEqual(post.get_image("card"), post.image.url)
+        self.assertEqual(post.get_image(), post.image.url)
+
+        created = image_renditions.build_renditions(post.image.storage, post.image.name)
+        self.assertEqual(created, len(image_renditions.RENDITION_SIZES) * len(image_renditions.FORMATS))
+        self.assertEqual(image_renditions.build_renditions(post.image.storage, post.image.name), 0)
+
+        card = image_renditions.rendition_name(post.image.name, "card")
+        self.assertEqual(post.get_image("card"), f"/media/{card}")
+        with Image.open(f"{post.image.storage.location}/{card}") as img:
+            self.assertEqual((img.format, img.size), ("WEBP", (640, 320)))
+        jpg = image_renditions.rendition_name(post.image.name, "thumb", "jpg")
+        with Image.open(f"{post.image.storage.location}/{jpg}") as img:
+            self.assertEqual((img.format, img.mode, img.size), ("JPEG", "RGB", (320, 160)))
+
+        # kiçik şəkil böyüdülmür
+        small = Post.objects.create(title="Kiçik", content="x", author=self.author, image=self._png((100, 80)))
+        image_renditions.build_renditions(small.image.storage, small.image.name)
+        large = image_renditions.rendition_name(small.image.name, "large")
+        with Image.open(f"{small.image.storage.location}/{large}") as img:
+            self.assertEqual(img.size, (100, 80))
+
+        post.delete()
+        self.assertFalse(post.image.storage.exists(card))
+
+    def test_name_keeps_source_extension(self):
+        self.assertEqual(image_renditions.rendition_name("posts/a.png", "card"), "renditions/card/posts/a.png.webp")
+        self.assertNotEqual(
+            image_renditions.rendition_name("posts/a.png", "card"),
+            image_renditions.rendition_name("posts/a.jpg", "card"),
+        )
+
+    def test_oversized_source_skipped(self):
+        post = Post.objects.create(title="Böyük", content="x", author=self.author, image=self._png((300, 300)))
+        with mock.patch.object(image_renditions, "MAX_SOURCE_PIXELS", 1000), \
+                self.assertLogs("blog.image_renditions", "WARNING"):
+            self.assertEqual(image_renditions.build_renditions(post.image.storage, post.image.name), 0)
+        # uğursuzluq yadda qalır: hər baxışda yenidən planlanmır
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(post.get_image("thumb"), post.image.url)
+        self.assertEqual(callbacks, [])
+
+    def test_damaged_source_marked_until_deleted(self):
+        data = self._png((400, 400)).read()
+        post = Post.objects.create(
+            title="Zədəli", content="x", author=self.author,
+            image=SimpleUploadedFile("broken.png", data[:len(data) // 2], content_type="image/png"),
+        )
+        marker = image_renditions.failure_marker_name(post.image.name)
+        with self.assertLogs("blog.image_renditions", "INFO"):
+            self.assertEqual(image_renditions.build_renditions(post.image.storage, post.image.name), 0)
+        self.assertTrue(default_storage.exists(marker))
+        self.assertEqual(image_renditions.build_renditions(post.image.storage, post.image.name), 0)
+        with self.captureOnCommitCallbacks() as callbacks:
+            self.assertEqual(post.get_image("card"), post.image.url)
+        self.assertEqual(callbacks, [])
+
+        post.delete()
+        self.assertFalse(default_storage.exists(marker))
+
+
+class _RemoteImageHandler(BaseHTTPRequestHandler):
+    """Test üçün üçüncü tərəf şəkil serveri: path -> (status, headers, body)."""
+
+    routes = {}
+    hits = []
+    hosts = []
+
+    def do_GET(self):
+        self.hits.append(self.path)
+        self.hosts.append(self.headers.get("Host"))
+        status, headers, body = self.routes.get(self.path, (404, {}, b""))
+        self.send_response(status)
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class ImageProxyTests(TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), _RemoteImageHandler)
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+        cls.base = f"http://127.0.0.1:{cls.server.server_port}"
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+        cls.server.server_close()
+        super().tearDownClass()
+
+    def setUp(self):
+        media = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media, ignore_errors=True)
+        override = override_settings(
+            STORAGES=TEST_STORAGES, MEDIA_ROOT=media, MEDIA_URL="/media/", IMAGE_PROXY_ALLOW_PRIVATE=True,
+        )
+        override.enable()
+        self.addCleanup(override.disable)
+        _RemoteImageHandler.routes = {}
+        _RemoteImageHandler.hits = []
+        _RemoteImageHandler.hosts = []
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.author = User.objects.create_user("muellif")
+
+    def _serve(self, path, body, content_type="image/png", status=200, **headers):
+        headers = {"Content-Type": content_type, "Content-Length": str(len(body)), **headers}
+        _RemoteImageHandler.routes[path] = (status, headers, body)
+        return f"{self.base}{path}"
+
+    def _png(self, size, color=(10, 200, 10)):
+        out = io.BytesIO()
+        Image.new("RGB", size, color).save(out, "PNG")
+        return out.getvalue()
+
+    def _post(self, url):
+        return Post.objects.create(title="Uzaq şəkil", content="x", author=self.author, image_url=url)
+
+    def _image(self, response):
+        return Image.open(io.BytesIO(b"".join(response.streaming_content)))
+
+    def test_fetched_once_and_served_locally(self):
+        post = self._post(self._serve("/cover.png", self._png((2400, 1200))))
+        url = post.get_image("card")
+        self.assertTrue(url.startswith(reverse("post_image_proxy", args=[post.slug])))
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        # card hələ hazır deyil: normallaşdırılmış nüsxə, qısa cache
+        self.assertEqual(response["Cache-Control"], "public, max-age=300")
+        self.assertEqual(self._image(response).size, (1280, 640))
+
+        name = image_proxy.cached_name(post.image_url)
+        image_renditions.build_renditions(default_storage, name)
+        response = self.client.get(url)
+        self.assertEqual(response["Cache-Control"], f"public, max-age={image_proxy.CACHE_MAX_AGE}")
+        self.assertEqual(self._image(response).size, (640, 320))
+        self.assertEqual(_RemoteImageHandler.hits, ["/cover.png"])
+
+    def test_rejected_remote_falls_back_to_original(self):
+        cases = {
+            "/page": self._serve("/page", b"<html></html>", content_type="text/html"),
+            "/missing": f"{self.base}/missing",
+            "/broken.png": self._serve("/broken.png", b"not an image"),
+        }
+        with mock.patch.object(image_proxy, "MAX_REMOTE_BYTES", 1024):
+            cases["/big.png"] = self._serve("/big.png", self._png((600, 600)) + b"\0" * 2048)
+            # Content-Length olmadan da limit işləyir
+            cases["/nolen.png"] = self._serve("/nolen.png", b"\0" * 4096)
+            del _RemoteImageHandler.routes["/nolen.png"][1]["Content-Length"]
+
+            for path, remote in cases.items():
+                with self.subTest(path):
+                    post = self._post(remote)
+                    response = self.client.get(post.get_image("thumb"))
+                    self.assertRedirects(response, remote, fetch_redirect_response=False)
+                    self.assertFalse(default_storage.exists(image_proxy.cached_name(remote)))
+
+    def test_private_address_and_redirect_checks(self):
+        target = self._serve("/cover.png", self._png((50, 50)))
+        hop = self._serve("/hop", b"", status=302, Location="/cover.png")
+        data = image_proxy.normalize_image(image_proxy.fetch_remote(hop))
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (50, 50))
+
+        with override_settings(IMAGE_PROXY_ALLOW_PRIVATE=False):
+            with self.assertRaises(image_proxy.RemoteImageError):
+                image_proxy.fetch_remote(target)
+        with self.assertRaises(image_proxy.RemoteImageError):
+            image_proxy.fetch_remote("file:///etc/passwd")
+        with mock.patch.object(image_proxy, "FETCH_DEADLINE", 0), self.assertRaises(image_proxy.RemoteImageError):
+            image_proxy.fetch_remote(target)
+
+    def test_connection_pinned_to_checked_address(self):
+        self._serve("/cover.png", self._png((50, 50)))
+        port = self.server.server_port
+        real = socket.getaddrinfo
+        lookups = []
+
+        def resolve(host, *args, **kwargs):
+            if host != "images.example":
+                return real(host, *args, **kwargs)
+            lookups.append(host)
+            # ikinci resolve (rebinding) başqa ünvan qaytarardı
+            ip = "127.0.0.1" if len(lookups) == 1 else "10.0.0.1"
+            return [(socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (ip, port))]
+
+        with mock.patch("socket.getaddrinfo", side_effect=resolve):
+            data = image_proxy.fetch_remote(f"http://images.example:{port}/cover.png")
+        self.assertEqual(Image.open(io.BytesIO(data)).size, (50, 50))
+        self.assertEqual(lookups, ["images.example"])
+        self.assertEqual(_RemoteImageHandler.hosts, [f"images.example:{port}"])
+
+    def test_failure_cached_and_busy_fetch_redirects(self):
+        remote = f"{self.base}/later.png"
+        post = self._post(remote)
+        for _ in range(2):
+            self.assertRedirects(self.client.get(post.get_image()), remote, fetch_redirect_response=False)
+        # ikinci sorğu uzaq serverə getmir
+        self.assertEqual(_RemoteImageHandler.hits, ["/later.png"])
+
+        cache.clear()
+        self._serve("/later.png", self._png((60, 60)))
+        name = image_proxy.cached_name(remote)
+        with image_proxy._name_lock(name):
+            # başqa request yükləyir: gözləmək əvəzinə orijinala
+            self.assertRedirects(self.client.get(post.get_image()), remote, fetch_redirect_response=False)
+        self.assertEqual(image_proxy._locks, {})
+        self.assertEqual(self.client.get(post.get_image()).status_code, 200)
+
+    def test_stale_copy_served_and_refreshed(self):
+        remote = self._serve("/cover.png", self._png((100, 100)))
+        post = self._post(remote)
+        name = image_proxy.ensure_cached(remote)
+
+        old = time.time() - 2 * image_proxy.REFRESH_HOURS * 3600
+        os.utime(default_storage.path(name), (old, old))
+        with mock.patch.object(image_proxy, "refresh_in_background") as refresh:
+            response = self.client.get(post.get_image())
+        self.assertEqual(response.status_code, 200)
+        refresh.assert_called_once_with(remote)
+
+        self.assertFalse(image_proxy.refresh(remote))
+        self.assertFalse(image_proxy.is_stale(name))
+        self._serve("/cover.png", self._png((100, 100), (200, 0, 0)))
+        self.assertTrue(image_proxy.refresh(remote))
+        with default_storage.open(name) as fh:
+            self.assertGreater(Image.open(fh).convert("RGB").getpixel((0, 0))[0], 150)
+        # müvəqqəti fayl yerinə köçürülüb
+        self.assertEqual(default_storage.listdir(os.path.dirname(name))[1], [os.path.basename(name)])
+
+        # yeniləmə alınmasa köhnə nüsxə qalır
+        del _RemoteImageHandler.routes["/cover.png"]
+        with self.assertRaises(image_proxy.RemoteImageError):
+            image_proxy.refresh(remote)
+        self.assertTrue(default_storage.exists(name))
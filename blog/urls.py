@@ -25,6 +25,7 @@ urlpatterns = [
     # --- Postlarla bağlı URL-lər ---
     path("posts/create/", views.create_post, name="create_post"),
     path("posts/<slug:slug>/", views.post_detail, name="post_detail"),
+    path("posts/<slug:slug>/image/", views.post_image_proxy, name="post_image_proxy"),
     path("post/<int:pk>/edit/", views.post_edit_ajax, name="post_edit_ajax"),
 
     # ---- Category URL-ləri ----
@@ -84,6 +85,7 @@ urlpatterns = [
     path("exams/<slug:slug>/edit/", views.edit_exam, name="edit_exam"),
     path("exams/<slug:slug>/delete/", views.delete_exam, name="delete_exam"),
     path("exams/<slug:slug>/results/", views.teacher_exam_results, name="teacher_exam_results"),
+    path("exams/<slug:slug>/results/submissions.zip", views.teacher_exam_submissions_zip, name="teacher_exam_submissions_zip"),
     
     # Sual əməliyyatları
     path("exams/<slug:slug>/questions/<int:question_id>/edit/", views.edit_exam_question, name="edit_exam_question"),
@@ -92,6 +94,10 @@ urlpatterns = [
     # Tələbə Prosesi
     path("exams/<slug:slug>/start/", views.start_exam, name="start_exam"),
     path("exams/<slug:slug>/attempt/<int:attempt_id>/", views.take_exam, name="take_exam"),
+    path("exams/<slug:slug>/attempt/<int:attempt_id>/autosave/", views.exam_autosave, name="exam_autosave"),
+    path("exams/<slug:slug>/attempt/<int:attempt_id>/uploads/", views.exam_upload_start, name="exam_upload_start"),
+    path("exams/<slug:slug>/attempt/<int:attempt_id>/uploads/<uuid:upload_id>/", views.exam_upload_chunk, name="exam_upload_chunk"),
+    path("exams/<slug:slug>/attempt/<int:attempt_id>/files/<int:file_id>/delete/", views.exam_answer_file_delete, name="exam_answer_file_delete"),
     path("exams/<slug:slug>/attempt/<int:attempt_id>/result/", views.exam_result, name="exam_result"),
     path("exams/<slug:slug>/attempt/<int:attempt_id>/check/", views.teacher_check_attempt, name="teacher_check_attempt"),
 
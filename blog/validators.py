@@ -1,12 +1,14 @@
 # exam/validators.py
 
 import os
-import zipfile
 from django.core.exceptions import ValidationError
 
 # İcazə verilən fayl tipləri
 ALLOWED_EXTENSIONS = ['.pdf', '.png', '.jpg', '.jpeg', '.zip']
 
+# Bir faylın maksimum ölçüsü (chunked upload da eyni limiti yoxlayır)
+MAX_UPLOAD_SIZE = 10 * 1024 * 1024  # 10 MB
+
 # Bloklanan (virus riskli) fayl tipləri
 BLOCKED_EXTENSIONS = [
     '.exe', '.js', '.sh', '.bat', '.cmd', '.msi',
@@ -23,30 +25,42 @@ def validate_file_extension(file):
         raise ValidationError("Bu fayl tipi icazəli deyil. Yalnız PDF, JPG, PNG, ZIP.")
 
 def validate_file_size(file):
-    max_size = 10 * 1024 * 1024  # 10 MB
-
-    if file.size > max_size:
+    if file.size > MAX_UPLOAD_SIZE:
         raise ValidationError("Fayl maksimum 10MB ola bilər.")
 
-def validate_zip_contents(file):
-    ext = os.path.splitext(file.name)[1].lower()
+# Uzantı -> məzmunun (magic bytes) gözlənilən tipi
+EXPECTED_TYPES = {
+    '.pdf': {'pdf'},
+    '.png': {'png'},
+    '.jpg': {'jpeg'},
+    '.jpeg': {'jpeg'},
+    '.zip': {'zip'},
+}
 
-    if ext != ".zip":
-        return  # ZIP deyilsə, çıxırıq
+def validate_file_signature(file):
+    """Fayl tipi uzantıdan yox, ilk baytlardan yoxlanılır (məs: .pdf adlı .exe)."""
+    from .zip_inspect import read_head, sniff_type
 
-    try:
-        zip_file = zipfile.ZipFile(file)
-    except zipfile.BadZipFile:
-        raise ValidationError("ZIP faylı zədəlidir və açıla bilmədi.")
+    expected = EXPECTED_TYPES.get(os.path.splitext(file.name)[1].lower())
+    if not expected:
+        return  # uzantı yoxlaması validate_file_extension-dadır
 
-    for info in zip_file.infolist():
-        inner_ext = os.path.splitext(info.filename)[1].lower()
+    if sniff_type(read_head(file)) not in expected:
+        raise ValidationError("Faylın məzmunu uzantısına uyğun deyil.")
 
-        # ZIP içində qovluq varsa, keçirik (çünki .ext olmur)
-        if not inner_ext:
-            continue
+def validate_zip_contents(file):
+    """
+    ZIP məzmunu (uzantıdan asılı olmayaraq magic bytes ilə tanınır) axınla
+    yoxlanılır: entry sayı, açılmış ölçü, sıxılma nisbəti, iç-içə arxivlər.
+    Bax: blog/zip_inspect.py
+    """
+    from .zip_inspect import inspect_zip, read_head, sniff_type
 
-        if inner_ext in BLOCKED_EXTENSIONS:
-            raise ValidationError(
-                f"ZIP içində təhlükəli fayl aşkarlandı: {info.filename}"
-            )
\ No newline at end of file
+    if sniff_type(read_head(file)) != "zip":
+        return  # ZIP deyilsə, çıxırıq
+
+    pos = file.tell()
+    try:
+        inspect_zip(file)
+    finally:
+        file.seek(pos)
@@ -1,12 +1,13 @@
 # blog/views.py
 from django.shortcuts import render, redirect, get_object_or_404
-from django.http import HttpResponse, Http404, JsonResponse, HttpResponseNotAllowed, HttpResponseForbidden
+from django.http import HttpResponse, Http404, JsonResponse, HttpResponseNotAllowed, HttpResponseForbidden, StreamingHttpResponse, FileResponse
 from django.views.decorators.http import require_POST
 from django.contrib import messages
 from django.contrib.auth.models import User
 from django.contrib.auth import login, logout, get_user_model
 from django.contrib.auth.decorators import login_required
 from django.core.exceptions import PermissionDenied, ValidationError
+from django.core.files.storage import default_storage
 from django.db.models import Count, Q, Max
 from django.core.mail import send_mail 
 from django.template.loader import render_to_string 
@@ -15,7 +16,21 @@ from django.utils import timezone
 from django.utils.text import slugify
 from django.core.paginator import Paginator, EmptyPage, PageNotAnInteger
 from datetime import timedelta
-from .models import Post, Category, Comment, Subscriber, Question, Exam, ExamQuestion, ExamQuestionOption, ExamAttempt, ExamAnswer, ExamAnswerFile, StudentGroup, QuestionBlock
+from .models import Post, Category, Comment, Subscriber, Question, Exam, ExamQuestion, ExamQuestionOption, ExamAttempt, ExamAnswer, ExamAnswerFile, ExamAnswerUpload, StudentGroup, QuestionBlock
+from .question_selection import (
+    attempt_seed,
+    exam_question_index,
+    invalidate_question_index,
+    needed_question_count,
+    select_question_ids,
+)
+from .attempt_pool import claim_prepared_attempt, discard_prepared, prewarm_enabled, prewarm_in_background
+from .exam_schedule import admission_delay
+from .attempt_autosave import attempt_deadline, parse_changes, save_answer_deltas, ws_autosave_enabled
+from .answer_uploads import UPLOAD_GRACE_SECONDS, append_chunk, attach_file, file_sha256, start_upload
+from .submission_export import iter_submissions_zip
+from .image_proxy import CACHE_MAX_AGE, RemoteImageError, ensure_cached
+from .image_renditions import RENDITION_SIZES, ready_rendition
 from .forms import (
     SubscriptionForm,
     RegisterForm,
@@ -124,21 +139,7 @@ def _effective_needed_count(exam) -> int:
     10 -> 10
     boş/None -> 10 (default)
     """
-    total = exam.questions.count()
-
-    val = getattr(exam, "random_question_count", None)
-    if val is None:
-        return min(10, total)
-
-    try:
-        val = int(val)
-    except (TypeError, ValueError):
-        return min(10, total)
-
-    if val <= 0:
-        return total  # 0 -> hamısı
-
-    return min(val, total)
+    return needed_question_count(exam, exam_question_index(exam.id)["total"])
 
 
 
@@ -245,6 +246,43 @@ def contact(request):
 
 # ------------------- POST DETAY + COMMENT ------------------- #
 
+def post_image_proxy(request, slug):
+    """
+    Postun image_url-i serverdə bir dəfə yüklənib saxlanılmış nüsxədən verilir
+    (?size=thumb|card|large). Yükləmə alınmasa brauzer əvvəlki kimi orijinala
+    yönləndirilir. Bax: blog/image_proxy.py
+    """
+    post = get_object_or_404(Post, slug=slug)
+    if not post.is_published and request.user != post.author:
+        raise Http404("No Post matches the given query.")
+    if post.image or not post.image_url:
+        return redirect(post.get_image())
+
+    try:
+        name = ensure_cached(post.image_url)
+    except RemoteImageError:
+        return redirect(post.image_url)
+
+    max_age = CACHE_MAX_AGE
+    size = request.GET.get("size")
+    if size in RENDITION_SIZES:
+        rendition = ready_rendition(default_storage, name, size)
+        if rendition:
+            name = rendition
+        else:
+            # ölçü hazır olana qədər böyük nüsxə, qısa müddətə cache-lənir
+            max_age = 300
+
+    try:
+        fh = default_storage.open(name, "rb")
+    except FileNotFoundError:
+        # nüsxə arada əvəzlənib və ya silinib — növbəti sorğu yenidən yoxlayacaq
+        return redirect(post.image_url)
+    response = FileResponse(fh, content_type="image/webp")
+    response["Cache-Control"] = f"public, max-age={max_age}"
+    return response
+
+
 def post_detail(request, slug):
     """
     Bir postun detal səhifəsi + şərhlər və rating forması.
@@ -1430,6 +1468,12 @@ def toggle_exam_active(request, slug):
     if request.method == "POST":
         exam.is_active = not exam.is_active
         exam.save()
+        if exam.is_active:
+            # start burst-dan əvvəl icazəli tələbələrin sual dəstlərini hazırla
+            if prewarm_enabled():
+                prewarm_in_background(exam.id)
+        else:
+            discard_prepared(exam.id)
     return redirect("teacher_exam_detail", slug=exam.slug)
 
 
@@ -1549,6 +1593,45 @@ def delete_exam_question(request, slug, question_id):
 # ---------------- STUDENT TƏRƏFİ -------------------
 
 
+def _build_exam_items(user, exams):
+    """
+    İmtahan kartları üçün icazə / cəhd məlumatı. Qaydalar Exam metodlarındadır,
+    faktlar isə Exam.access_for_many ilə toplu yüklənir (sabit sayda sorğu).
+    """
+    exams = list(exams)
+    access = Exam.access_for_many(user, exams)
+
+    items = []
+    for exam in exams:
+        facts = access[exam.id]
+        if not exam.can_user_see(user, access=facts):
+            continue
+
+        # cəhd limiti
+        left = exam.attempts_left_for(user, access=facts)
+        if left is not None and left <= 0:
+            continue
+
+        can_without_code, _ = exam.can_user_start(user, code=None, access=facts)
+        requires_code = bool(exam.access_code and not can_without_code)
+
+        # ekrandakı status yazısı
+        if exam.access_code:
+            access_label = "Kod tələb olunur"
+        elif exam.is_public:
+            access_label = "Hamı üçün açıq"
+        else:
+            access_label = "Yalnız icazəli istifadəçilər"
+
+        items.append({
+            "exam": exam,
+            "left": left,
+            "requires_code": requires_code,
+            "access_label": access_label,
+        })
+    return items
+
+
 @login_required
 def assigned_student_exam_list(request):
     user = request.user
@@ -1582,40 +1665,8 @@ def assigned_student_exam_list(request):
     # Sıralama
     exams_qs = exams_qs.order_by("-created_at")
 
-    # 2) PYTHON MƏNTİQİ (Permissions & List Construction) — EYNİDİR
-    exam_items = []
-
-    for exam in exams_qs:
-        # bu user ümumiyyətlə bu imtahan kartını görməlidir?
-        if not exam.can_user_see(user):
-            continue
-
-        # cəhd limiti
-        left = exam.attempts_left_for(user)
-        if left is not None and left <= 0:
-            continue
-
-        # kod tələb olunub-olunmamağı user-ə görə hesablayırıq
-        can_without_code, _ = exam.can_user_start(user, code=None)
-
-        requires_code = False
-        if exam.access_code and not can_without_code:
-            requires_code = True
-
-        # ekrandakı status yazısı
-        if exam.access_code:
-            access_label = "Kod tələb olunur"
-        elif exam.is_public:
-            access_label = "Hamı üçün açıq"
-        else:
-            access_label = "Yalnız icazəli istifadəçilər"
-
-        exam_items.append({
-            "exam": exam,
-            "left": left,
-            "requires_code": requires_code,
-            "access_label": access_label,
-        })
+    # 2) PYTHON MƏNTİQİ (Permissions & List Construction) — toplu sorğularla
+    exam_items = _build_exam_items(user, exams_qs)
 
     # 3) PAGINATION (Səhifələmə) — eyni saxla
     paginator = Paginator(exam_items, 2)
@@ -1666,41 +1717,8 @@ def student_exam_list(request):
     exams_qs = exams_qs.order_by("-created_at")
 
     # 2. PYTHON MƏNTİQİ (Permissions & List Construction)
-    # Bazadan gələn nəticələri yoxlayıb siyahıya yığırıq
-    exam_items = []
-
-    for exam in exams_qs:
-        # Bu user ümumiyyətlə bu imtahan kartını görməlidir?
-        if not exam.can_user_see(user):
-            continue
-
-        # Cəhd limiti
-        left = exam.attempts_left_for(user)
-        if left is not None and left <= 0:
-            # Kartı göstərməyə dəymir – cəhd qalmayıb
-            continue
-
-        # Kod tələb olunub–olunmamağı user-ə görə hesablayırıq
-        can_without_code, _ = exam.can_user_start(user, code=None)
-
-        requires_code = False
-        if exam.access_code and not can_without_code:
-            requires_code = True
-
-        # Ekrandakı status yazısı
-        if exam.access_code:
-            access_label = "Kod tələb olunur"
-        elif exam.is_public:
-            access_label = "Hamı üçün açıq"
-        else:
-            access_label = "Yalnız icazəli istifadəçilər"
-
-        exam_items.append({
-            "exam": exam,
-            "left": left,
-            "requires_code": requires_code,
-            "access_label": access_label,
-        })
+    # Bazadan gələn nəticələri yoxlayıb siyahıya yığırıq (sabit sayda sorğu)
+    exam_items = _build_exam_items(user, exams_qs)
 
     # 3. PAGINATION (Səhifələmə)
     # Hər səhifədə 6 imtahan göstərək
@@ -1761,6 +1779,24 @@ def _start_or_resume_attempt(request, exam: Exam):
         return redirect("student_exam_list")
 
     attempt_number = finished_count + 1
+
+    # planlı açılışda start-lar qısa ramp üzrə paylanır (thundering herd olmasın)
+    wait = admission_delay(exam, user)
+    if wait:
+        # siyahıya qaytarmırıq: gözləmə səhifəsi vaxt çatanda özü yenidən cəhd edir
+        response = render(request, "blog/exam_wait.html", {
+            "exam": exam,
+            "wait": wait,
+            "access_code": (request.POST.get("access_code") or "").strip(),
+        })
+        response["Retry-After"] = str(wait)
+        return response
+
+    # aktivləşmə zamanı hazırlanmış attempt varsa — bir UPDATE ilə götür
+    prepared_id = claim_prepared_attempt(exam, user, attempt_number)
+    if prepared_id:
+        return redirect("take_exam", slug=exam.slug, attempt_id=prepared_id)
+
     attempt = ExamAttempt.objects.create(
         user=user,
         exam=exam,
@@ -1827,67 +1863,21 @@ def generate_random_questions_for_attempt(attempt, *, force_rebuild: bool = Fals
 
     total_needed = _effective_needed_count(exam)
 
-    # bütün sualları al (DB hit az olsun)
-    all_qs = list(exam.questions.all())
-
-    if not all_qs:
+    # id-lər üzərində stratified seçim (bax: blog/question_selection.py)
+    selected_ids = select_question_ids(exam_question_index(exam.id), total_needed, attempt_seed(attempt))
+    if not selected_ids:
         return
 
-    # Əgər tələb olunan say hamısından çoxdursa -> hamısını götür
-    if total_needed >= len(all_qs):
-        selected_qs = all_qs[:]
-        random.shuffle(selected_qs)  # “hamısı” olsa belə random sıra
-    else:
-        selected_qs = []
-        blocks = list(exam.question_blocks.all())
-
-        if blocks:
-            blocks_count = len(blocks)
-            base = total_needed // blocks_count
-            rem = total_needed % blocks_count
-
-            random.shuffle(blocks)
-
-            picked_ids = set()
+    # cache köhnədirsə (sual başqa process-də silinib) -> indeksi yenilə
+    existing = set(ExamQuestion.objects.filter(id__in=selected_ids).values_list("id", flat=True))
+    if len(existing) != len(selected_ids):
+        invalidate_question_index(exam.id)
+        total_needed = _effective_needed_count(exam)
+        selected_ids = select_question_ids(exam_question_index(exam.id), total_needed, attempt_seed(attempt))
 
-            # bloklardan payla
-            for i, block in enumerate(blocks):
-                take = base + (1 if i < rem else 0)
-
-                block_qs = list(block.questions.all())
-                random.shuffle(block_qs)
-
-                for q in block_qs:
-                    if len(selected_qs) >= total_needed:
-                        break
-                    if q.id in picked_ids:
-                        continue
-                    selected_qs.append(q)
-                    picked_ids.add(q.id)
-                    if len(selected_qs) >= total_needed or len(selected_qs) - len(picked_ids) >= take:
-                        # yuxarıdakı “take” limitini yumşaq saxlayırıq,
-                        # əsas məqsəd total_needed-ə çatmaqdır
-                        pass
-
-                # blokda sual çatmadısa, problem deyil – aşağıda fill edəcəyik
-
-            # çatmayanı digər suallardan doldur
-            if len(selected_qs) < total_needed:
-                remaining = [q for q in all_qs if q.id not in picked_ids]
-                random.shuffle(remaining)
-                selected_qs.extend(remaining[: (total_needed - len(selected_qs))])
-
-            # son dəfə də ümumi sıranı qarışdır (blok “izləri” qalmasın)
-            random.shuffle(selected_qs)
-
-        else:
-            # blok yoxdursa — ümumi pool-dan random seç
-            random.shuffle(all_qs)
-            selected_qs = all_qs[:total_needed]
-
-    # ExamAnswer-ları bulk yarat
+    # ExamAnswer-ları bulk yarat (sıra = id sırası, take_exam order_by("id") edir)
     ExamAnswer.objects.bulk_create(
-        [ExamAnswer(attempt=attempt, question=q) for q in selected_qs],
+        [ExamAnswer(attempt=attempt, question_id=qid) for qid in selected_ids],
         ignore_conflicts=True
     )
 
@@ -1964,46 +1954,58 @@ def take_exam(request, slug, attempt_id):
         action = (request.POST.get("submit_action") or "").strip()
         is_ajax = request.headers.get("x-requested-with") == "XMLHttpRequest"
 
-        # DÜZƏLİŞ: Yalnız seçilmiş suallar üzərindən dövr edirik
-        for q in questions:
-            # ✅ DƏYİŞİKLİK: get() yerinə get_or_create (risk olmasın)
-            ans, _ = ExamAnswer.objects.get_or_create(attempt=attempt, question=q)
+        # Toplu yazma: cavablar answers_qs-də artıq var, variantlar prefetch olunub.
+        # Sual başına sorğu yoxdur (yalnız yazılı sualın faylları ayrıca yazılır).
+        now = timezone.now()
+        links = []
+        changed = []
 
-            ans.selected_options.clear()
+        for q in questions:
+            ans = answers_by_qid.get(q.id)
+            if ans is None:
+                # əvvəlki get_or_create ilə eyni: sətir yoxdursa (paralel silinmə) yaradılır
+                ans, _ = ExamAnswer.objects.get_or_create(attempt=attempt, question=q)
+                answers_by_qid[q.id] = ans
 
             if exam.exam_type == "test" and q.answer_mode in ("single", "multiple"):
-                if q.answer_mode == "single":
-                    opt_id = request.POST.get(f"q_{q.id}")
-                    if opt_id:
-                        opt = ExamQuestionOption.objects.filter(id=opt_id, question=q).first()
-                        if opt:
-                            ans.selected_options.add(opt)
+                valid_ids = {o.id for o in q.options.all()}
+                correct_ids = {o.id for o in q.options.all() if o.is_correct}
 
+                if q.answer_mode == "single":
+                    raw_ids = [request.POST.get(f"q_{q.id}") or ""]
                 else:
-                    # ✅ KRİTİK DƏYİŞİKLİK:
-                    # Köhnə: name="q_{id}_opt_{optid}" oxuyurdu
-                    # Yeni: checkbox-ların hamısı name="q_{id}" olacaq, id-ləri getlist ilə gələcək
-                    opt_ids = request.POST.getlist(f"q_{q.id}")
-                    if opt_ids:
-                        opts = list(ExamQuestionOption.objects.filter(question=q, id__in=opt_ids))
-                        if opts:
-                            ans.selected_options.add(*opts)
+                    # checkbox-ların hamısı name="q_{id}" -> getlist
+                    raw_ids = request.POST.getlist(f"q_{q.id}")
+                selected = {int(x) for x in raw_ids if x.isdigit()} & valid_ids
 
+                links.extend(
+                    ExamAnswer.selected_options.through(examanswer_id=ans.id, examquestionoption_id=opt_id)
+                    for opt_id in selected
+                )
                 ans.text_answer = ""
-                ans.auto_evaluate()
+                # auto_evaluate() ilə eyni qayda
+                ans.is_correct = bool(correct_ids) and selected == correct_ids
 
             else:
                 # Yazılı sual
-                text = request.POST.get(f"q_{q.id}", "").strip()
-                ans.text_answer = text
+                ans.text_answer = request.POST.get(f"q_{q.id}", "").strip()
                 ans.is_correct = False
-                ans.save()
 
-                files = request.FILES.getlist(f"file_{q.id}[]")
-                if files:
-                    ans.files.all().delete()
-                    for f in files:
-                        ExamAnswerFile.objects.create(answer=ans, file=f)
+                # fayllar əlavə olunur; eyni məzmun (sha256) təkrar yazılmır
+                for f in request.FILES.getlist(f"file_{q.id}[]"):
+                    digest = file_sha256(f.chunks())
+                    try:
+                        attach_file(ans.id, f, digest)
+                    except ValidationError as e:
+                        messages.error(request, f"{f.name}: {' '.join(e.messages)}")
+
+            ans.updated_at = now
+            changed.append(ans)
+
+        with transaction.atomic():
+            ExamAnswer.selected_options.through.objects.filter(examanswer__in=changed).delete()
+            ExamAnswer.selected_options.through.objects.bulk_create(links)
+            ExamAnswer.objects.bulk_update(changed, ["text_answer", "is_correct", "updated_at"])
 
         if exam.exam_type == "test":
             attempt.recalculate_score()
@@ -2035,10 +2037,150 @@ def take_exam(request, slug, attempt_id):
         "q_payload": q_payload,           # ✅ random variant üçün yeni
         "answers_by_qid": answers_by_qid,
         "remaining_seconds": remaining_seconds,
+        "ws_autosave": ws_autosave_enabled(),
+        "upload_grace_seconds": UPLOAD_GRACE_SECONDS,
     }
     return render(request, "blog/take_exam.html", context)
 
 
+def _writable_attempt(request, slug, attempt_id, grace_seconds=0):
+    """
+    JSON endpoint-lər üçün (autosave, upload): sahiblik + status + deadline bir sorğu ilə.
+    (attempt, None) və ya (None, JsonResponse) qaytarır; vaxt bitibsə attempt expired olur.
+    grace_seconds: deadline-dan sonra da qəbul olunan müddət (yarımçıq upload hissələri).
+    """
+    attempt = (
+        ExamAttempt.objects
+        .select_related("exam")
+        .filter(id=attempt_id, exam__slug=slug, user=request.user)
+        .first()
+    )
+    if attempt is None:
+        return None, JsonResponse({"success": False, "error": "not_found"}, status=404)
+
+    result_url = reverse("exam_result", kwargs={"slug": attempt.exam.slug, "attempt_id": attempt.id})
+    finished = JsonResponse({"success": False, "finished": True, "redirect_url": result_url}, status=409)
+    if attempt.is_finished:
+        return None, finished
+
+    deadline = attempt_deadline(attempt)
+    if deadline and timezone.now() >= deadline + timedelta(seconds=grace_seconds):
+        if attempt.exam.exam_type == "test":
+            attempt.recalculate_score()
+        attempt.mark_finished(status="expired")
+        return None, finished
+
+    return attempt, None
+
+
+@login_required
+def exam_autosave(request, slug, attempt_id):
+    """
+    JSON autosave: yalnız dəyişən suallar (bax: blog/attempt_autosave.py).
+    Cavab: {"success": true, "version": n}; vaxt bitibsə attempt expired olur
+    və redirect_url qaytarılır.
+    """
+    if request.method not in ("PATCH", "POST"):
+        return HttpResponseNotAllowed(["PATCH", "POST"])
+
+    attempt, error = _writable_attempt(request, slug, attempt_id)
+    if error:
+        return error
+
+    try:
+        changes = parse_changes(json.loads(request.body or b"{}"))
+    except (ValueError, UnicodeDecodeError) as e:
+        return JsonResponse({"success": False, "error": str(e)}, status=400)
+
+    version = save_answer_deltas(attempt, changes)
+    if version is None:
+        result_url = reverse("exam_result", kwargs={"slug": attempt.exam.slug, "attempt_id": attempt.id})
+        return JsonResponse({"success": False, "finished": True, "redirect_url": result_url}, status=409)
+
+    return JsonResponse({"success": True, "finished": False, "version": version})
+
+
+@login_required
+@require_POST
+def exam_upload_start(request, slug, attempt_id):
+    """
+    Chunked upload başlanğıcı (bax: blog/answer_uploads.py).
+    Body: {"question_id", "filename", "size", "sha256"?} -> upload_id + offset.
+    """
+    attempt, error = _writable_attempt(request, slug, attempt_id)
+    if error:
+        return error
+
+    try:
+        data = json.loads(request.body or b"{}")
+        question_id = int(data.get("question_id"))
+        size = int(data.get("size"))
+    except (TypeError, ValueError, UnicodeDecodeError):
+        return JsonResponse({"success": False, "error": "bad_payload"}, status=400)
+
+    answer = ExamAnswer.objects.filter(attempt=attempt, question_id=question_id).first()
+    if answer is None:
+        return JsonResponse({"success": False, "error": "not_found"}, status=404)
+
+    try:
+        result = start_upload(answer, str(data.get("filename") or ""), size, str(data.get("sha256") or ""))
+    except ValidationError as e:
+        return JsonResponse({"success": False, "error": " ".join(e.messages)}, status=400)
+    return JsonResponse({"success": True, **result})
+
+
+@login_required
+def exam_upload_chunk(request, slug, attempt_id, upload_id):
+    """
+    GET: qəbul olunmuş offset (resume üçün).
+    PUT / PATCH: "Upload-Offset" header-i + body-də növbəti hissə.
+    Deadline-dan əvvəl başlamış yükləmə UPLOAD_GRACE_SECONDS ərzində tamamlana bilər.
+    """
+    attempt, error = _writable_attempt(request, slug, attempt_id, grace_seconds=UPLOAD_GRACE_SECONDS)
+    if error:
+        return error
+
+    upload = ExamAnswerUpload.objects.filter(id=upload_id, answer__attempt=attempt).first()
+    if upload is None:
+        return JsonResponse({"success": False, "error": "not_found"}, status=404)
+
+    if request.method == "GET":
+        return JsonResponse({"success": True, "complete": False, "offset": upload.received})
+    if request.method not in ("PUT", "PATCH"):
+        return HttpResponseNotAllowed(["GET", "PUT", "PATCH"])
+
+    try:
+        offset = int(request.headers.get("Upload-Offset", ""))
+        length = int(request.headers["Content-Length"]) if request.headers.get("Content-Length") else None
+    except ValueError:
+        return JsonResponse({"success": False, "error": "bad_offset"}, status=400)
+
+    try:
+        result = append_chunk(upload, offset, request, length)
+    except ValueError as e:
+        upload.refresh_from_db(fields=["received"])
+        return JsonResponse({"success": False, "error": str(e), "offset": upload.received}, status=409)
+    except ValidationError as e:
+        return JsonResponse({"success": False, "error": " ".join(e.messages)}, status=400)
+    return JsonResponse({"success": True, **result})
+
+
+@login_required
+@require_POST
+def exam_answer_file_delete(request, slug, attempt_id, file_id):
+    """
+    Əlavə olunmuş faylı cavabdan çıxarır (yalnız açıq attempt-də).
+    Blob paylaşılırsa storage-dəki fayl qalır; ref_count blog/blob_refs.py-də azalır.
+    """
+    attempt, error = _writable_attempt(request, slug, attempt_id)
+    if error:
+        return error
+
+    obj = ExamAnswerFile.objects.filter(id=file_id, answer__attempt=attempt).first()
+    if obj is None:
+        return JsonResponse({"success": False, "error": "not_found"}, status=404)
+    obj.delete()
+    return JsonResponse({"success": True, "id": file_id})
 
 
 
@@ -2175,7 +2317,13 @@ def teacher_exam_results(request, slug):
         key=lambda a: a.duration_seconds
     )[:5]
 
-    questions = exam.questions.all()
+    # cavab sayları bir sorğuda (q.correct_ratio annotasiyanı istifadə edir)
+    # hazırlanmış (hələ başlanmamış) attempt-lərin boş cavabları sayılmır
+    real = ~Q(answers__attempt__status="prepared")
+    questions = exam.questions.annotate(
+        answers_total=Count("answers", filter=real),
+        answers_correct=Count("answers", filter=real & Q(answers__is_correct=True)),
+    )
     hardest_questions = sorted(
         questions,
         key=lambda q: q.correct_ratio
@@ -2191,6 +2339,27 @@ def teacher_exam_results(request, slug):
     })
 
 
+@login_required
+def teacher_exam_submissions_zip(request, slug):
+    """
+    İmtahanın bütün cavabları (və ya ?attempt=1&attempt=2 ilə seçilmiş cəhdlər)
+    bir ZIP kimi — student / cəhd / sual qovluqları. Arxiv stream olunur
+    (bax: blog/submission_export.py).
+    """
+    _ensure_teacher(request.user)
+    exam = get_object_or_404(Exam, slug=slug, author=request.user)
+
+    attempt_ids = None
+    selected = request.GET.getlist("attempt")
+    if selected:
+        attempt_ids = [int(v) for v in selected if v.isdigit()]
+
+    response = StreamingHttpResponse(iter_submissions_zip(exam, attempt_ids), content_type="application/zip")
+    response["Content-Disposition"] = f'attachment; filename="{exam.slug}-cavablar.zip"'
+    response["Cache-Control"] = "no-store"
+    return response
+
+
 @login_required
 def teacher_check_attempt(request, slug, attempt_id):
     """
@@ -0,0 +1,270 @@
+# blog/zip_inspect.py
+
+"""
+Yüklənən ZIP-lərin axınla (streaming) yoxlanması.
+
+zipfile.ZipFile bütün central directory-ni yaddaşda siyahıya çevirir və heç
+bir limit qoymur. Burada:
+
+- End of Central Directory (+ ZIP64) faylın sonundan oxunur; entry sayı
+  limiti central directory oxunmamış yoxlanılır
+- central directory qeydləri bir-bir oxunur (yaddaş qeyd ölçüsü qədərdir)
+- hər qeyddə: yol (.., mütləq yol), bloklanan uzantı, şifrələmə, entry başına
+  və ümumi sıxılma nisbəti, ümumi açılmış ölçü
+- faylın tipi uzantıdan yox, açılmış ilk baytlardan (magic bytes) təyin olunur
+- iç-içə ZIP bounded müvəqqəti fayla açılıb eyni büdcə ilə yoxlanılır
+- ilk pozuntuda ValidationError (qalan qeydlər oxunmur)
+"""
+
+from __future__ import annotations
+
+import os
+import struct
+import tempfile
+import zlib
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+
+MAX_ENTRIES = getattr(settings, "EXAM_ZIP_MAX_ENTRIES", 1000)
+MAX_TOTAL_SIZE = getattr(settings, "EXAM_ZIP_MAX_TOTAL_SIZE", 200 * 1024 * 1024)
+MAX_RATIO = getattr(settings, "EXAM_ZIP_MAX_RATIO", 100)
+MAX_DEPTH = getattr(settings, "EXAM_ZIP_MAX_DEPTH", 2)
+
+# kiçik entry-lərdə (məs: boşluqla dolu mətn) nisbət yüksək ola bilər
+RATIO_MIN_SIZE = 1024 * 1024
+SNIFF_BYTES = 512
+READ_BLOCK = 64 * 1024
+SPOOL_MAX_MEMORY = 1024 * 1024
+
+EOCD = struct.Struct("<4sHHHHIIH")
+EOCD_SIG = b"PK\x05\x06"
+ZIP64_LOCATOR = struct.Struct("<4sIQI")
+ZIP64_LOCATOR_SIG = b"PK\x06\x07"
+ZIP64_EOCD = struct.Struct("<4sQHHIIQQQQ")
+ZIP64_EOCD_SIG = b"PK\x06\x06"
+CENTRAL = struct.Struct("<4sHHHHHHIIIHHHHHII")
+CENTRAL_SIG = b"PK\x01\x02"
+LOCAL = struct.Struct("<4sHHHHHIIIHH")
+LOCAL_SIG = b"PK\x03\x04"
+
+STORED, DEFLATED = 0, 8
+
+# magic bytes -> tip
+SIGNATURES = (
+    (b"%PDF-", "pdf"),
+    (b"\x89PNG\r\n\x1a\n", "png"),
+    (b"\xff\xd8\xff", "jpeg"),
+    (b"PK\x03\x04", "zip"),
+    (b"PK\x05\x06", "zip"),
+    (b"MZ", "executable"),
+    (b"\x7fELF", "executable"),
+    (b"\xcf\xfa\xed\xfe", "executable"),
+    (b"\xce\xfa\xed\xfe", "executable"),
+    (b"\xca\xfe\xba\xbe", "executable"),
+    (b"#!", "script"),
+    (b"Rar!", "archive"),
+    (b"7z\xbc\xaf\x27\x1c", "archive"),
+    (b"\x1f\x8b", "archive"),
+)
+SCRIPT_MARKERS = (b"<!doctype html", b"<html", b"<script", b"<?php", b"<svg")
+
+BLOCKED_TYPES = {
+    "executable": "icra olunan fayl",
+    "script": "skript",
+    "archive": "yoxlanıla bilməyən arxiv (yalnız ZIP icazəlidir)",
+}
+
+
+def sniff_type(head: bytes) -> str:
+    for magic, kind in SIGNATURES:
+        if head.startswith(magic):
+            return kind
+    if head.lstrip()[:32].lower().startswith(SCRIPT_MARKERS):
+        return "script"
+    return "unknown"
+
+
+def read_head(fileobj, size: int = SNIFF_BYTES) -> bytes:
+    pos = fileobj.tell()
+    fileobj.seek(0)
+    head = fileobj.read(size)
+    fileobj.seek(pos)
+    return head
+
+
+class _Budget:
+    """İç-içə arxivlər daxil bütün yoxlama üçün ortaq limitlər."""
+
+    def __init__(self):
+        self.entries = 0
+        self.total = 0
+
+
+def _fail(message: str) -> None:
+    raise ValidationError(message)
+
+
+def _end_of_central_directory(fileobj):
+    fileobj.seek(0, os.SEEK_END)
+    size = fileobj.tell()
+    tail_len = min(size, EOCD.size + 0xFFFF)
+    fileobj.seek(size - tail_len)
+    tail = fileobj.read(tail_len)
+
+    pos = tail.rfind(EOCD_SIG)
+    if pos < 0 or pos + EOCD.size > len(tail):
+        _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+    _, disk, cd_disk, _, total, cd_size, cd_offset, _ = EOCD.unpack_from(tail, pos)
+    if disk or cd_disk:
+        _fail("Çox hissəli ZIP arxivləri dəstəklənmir.")
+
+    if total == 0xFFFF or cd_size == 0xFFFFFFFF or cd_offset == 0xFFFFFFFF:
+        loc = pos - ZIP64_LOCATOR.size
+        if loc < 0 or tail[loc:loc + 4] != ZIP64_LOCATOR_SIG:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+        _, _, eocd64_offset, _ = ZIP64_LOCATOR.unpack_from(tail, loc)
+        fileobj.seek(eocd64_offset)
+        raw = fileobj.read(ZIP64_EOCD.size)
+        if len(raw) < ZIP64_EOCD.size or raw[:4] != ZIP64_EOCD_SIG:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+        _, _, _, _, _, _, _, total, cd_size, cd_offset = ZIP64_EOCD.unpack(raw)
+
+    if cd_offset + cd_size > size:
+        _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+    return total, cd_size, cd_offset
+
+
+def _zip64_sizes(extra: bytes, comp: int, uncomp: int, offset: int):
+    i = 0
+    while i + 4 <= len(extra):
+        tag, length = struct.unpack_from("<HH", extra, i)
+        if tag == 0x0001:
+            data = extra[i + 4:i + 4 + length]
+            values = [struct.unpack_from("<Q", data, j)[0] for j in range(0, len(data) - 7, 8)]
+            if uncomp == 0xFFFFFFFF and values:
+                uncomp = values.pop(0)
+            if comp == 0xFFFFFFFF and values:
+                comp = values.pop(0)
+            if offset == 0xFFFFFFFF and values:
+                offset = values.pop(0)
+            break
+        i += 4 + length
+    return comp, uncomp, offset
+
+
+def _entry_data_offset(fileobj, local_offset: int) -> int:
+    fileobj.seek(local_offset)
+    raw = fileobj.read(LOCAL.size)
+    if len(raw) < LOCAL.size or raw[:4] != LOCAL_SIG:
+        _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+    fields = LOCAL.unpack(raw)
+    return local_offset + LOCAL.size + fields[9] + fields[10]
+
+
+def _iter_entry_data(fileobj, data_offset: int, comp_size: int, method: int, limit: int):
+    """Entry-nin açılmış baytları, bloklarla; limit-dən artıq çıxsa dayanır."""
+    fileobj.seek(data_offset)
+    left = comp_size
+    produced = 0
+    inflater = zlib.decompressobj(-15) if method == DEFLATED else None
+    while left > 0 and produced <= limit:
+        want = min(READ_BLOCK, left)
+        if inflater is None:
+            want = min(want, limit + 1 - produced)
+        raw = fileobj.read(want)
+        if not raw:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+        left -= len(raw)
+        try:
+            out = inflater.decompress(raw, limit + 1 - produced) if inflater else raw
+        except zlib.error:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+        produced += len(out)
+        yield out
+        if inflater and inflater.unconsumed_tail:
+            # limit dolub — qalan sıxılmış data açılmır
+            return
+
+
+def inspect_zip(fileobj, depth: int = 0, budget: Optional[_Budget] = None) -> Dict[str, int]:
+    """
+    Limitləri pozan ilk tapıntıda ValidationError. Uğurda statistika qaytarır.
+    fileobj: seek / tell / read dəstəkləyən istənilən fayl (UploadedFile, File, tempfile).
+    """
+    budget = budget or _Budget()
+    total, cd_size, cd_offset = _end_of_central_directory(fileobj)
+
+    if budget.entries + total > MAX_ENTRIES:
+        _fail(f"ZIP içində çox fayl var (maksimum {MAX_ENTRIES}).")
+
+    pos = cd_offset
+    end = cd_offset + cd_size
+    for _ in range(total):
+        fileobj.seek(pos)
+        raw = fileobj.read(CENTRAL.size)
+        if len(raw) < CENTRAL.size or raw[:4] != CENTRAL_SIG:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+        (_, _, _, flags, method, _, _, _, comp, uncomp,
+         name_len, extra_len, comment_len, _, _, _, local_offset) = CENTRAL.unpack(raw)
+        name_raw = fileobj.read(name_len)
+        extra = fileobj.read(extra_len)
+        pos += CENTRAL.size + name_len + extra_len + comment_len
+        if pos > end:
+            _fail("ZIP faylı zədəlidir və açıla bilmədi.")
+
+        name = name_raw.decode("utf-8" if flags & 0x800 else "cp437", errors="replace")
+        comp, uncomp, local_offset = _zip64_sizes(extra, comp, uncomp, local_offset)
+
+        budget.entries += 1
+        budget.total += uncomp
+        _check_entry(name, flags, method, comp, uncomp, budget)
+
+        if name.endswith("/") or uncomp == 0:
+            continue
+
+        data_offset = _entry_data_offset(fileobj, local_offset)
+        head = b"".join(_iter_entry_data(fileobj, data_offset, comp, method, SNIFF_BYTES))[:SNIFF_BYTES]
+        kind = sniff_type(head)
+        if kind in BLOCKED_TYPES:
+            _fail(f"ZIP içində təhlükəli fayl aşkarlandı: {name} ({BLOCKED_TYPES[kind]})")
+        if kind == "zip":
+            _inspect_nested(fileobj, name, data_offset, comp, uncomp, method, depth, budget)
+
+    return {"entries": budget.entries, "uncompressed": budget.total}
+
+
+def _check_entry(name: str, flags: int, method: int, comp: int, uncomp: int, budget: _Budget) -> None:
+    from .validators import BLOCKED_EXTENSIONS
+
+    if name.startswith(("/", "\\")) or ".." in name.replace("\\", "/").split("/"):
+        _fail(f"ZIP içində yanlış yol: {name}")
+    if os.path.splitext(name)[1].lower() in BLOCKED_EXTENSIONS:
+        _fail(f"ZIP içində təhlükəli fayl aşkarlandı: {name}")
+    if flags & 0x1:
+        _fail(f"Şifrələnmiş ZIP faylları qəbul olunmur: {name}")
+    if method not in (STORED, DEFLATED):
+        _fail(f"ZIP sıxılma metodu dəstəklənmir: {name}")
+    if budget.total > MAX_TOTAL_SIZE:
+        _fail(f"ZIP açılmış halda çox böyükdür (maksimum {MAX_TOTAL_SIZE // (1024 * 1024)}MB).")
+    if uncomp >= RATIO_MIN_SIZE and uncomp > max(comp, 1) * MAX_RATIO:
+        _fail(f"ZIP içində şübhəli sıxılma nisbəti: {name}")
+
+
+def _inspect_nested(fileobj, name, data_offset, comp, uncomp, method, depth, budget) -> None:
+    if depth + 1 > MAX_DEPTH:
+        _fail(f"ZIP içində çox dərin iç-içə arxiv: {name}")
+
+    with tempfile.SpooledTemporaryFile(max_size=SPOOL_MAX_MEMORY) as nested:
+        written = 0
+        for block in _iter_entry_data(fileobj, data_offset, comp, method, uncomp):
+            written += len(block)
+            # header-də yazılan ölçü yalandırsa (bomb) — dayanırıq
+            if written > uncomp:
+                _fail(f"ZIP içində şübhəli sıxılma nisbəti: {name}")
+            nested.write(block)
+        try:
+            inspect_zip(nested, depth + 1, budget)
+        except ValidationError as e:
+            _fail(f"{name}: {' '.join(e.messages)}")
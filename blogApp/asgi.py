@@ -11,17 +11,21 @@ from django.core.asgi import get_asgi_application
 from channels.routing import ProtocolTypeRouter, URLRouter
 from channels.auth import AuthMiddlewareStack
 
+import blog.routing
 import liveExam.routing
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "blogApp.settings")
 
 django_asgi_app = get_asgi_application()
 
+# EXAM_EXPIRY_SWEEPER=True olanda vaxtı bitmiş attempt-ləri arxa fonda bağlayır
+from blog.attempt_expiry import with_expiry_sweeper  # noqa: E402
+
 application = ProtocolTypeRouter(
     {
-        "http": django_asgi_app,
+        "http": with_expiry_sweeper(django_asgi_app),
         "websocket": AuthMiddlewareStack(
-            URLRouter(liveExam.routing.websocket_urlpatterns)
+            URLRouter(liveExam.routing.websocket_urlpatterns + blog.routing.websocket_urlpatterns)
         ),
     }
 )
@@ -0,0 +1,326 @@
+"""
+View / consumer event üzrə performans ölçüləri.
+
+Hər request (və ya instrument olunmuş consumer event-i) üçün:
+- SQL sorğu sayı və ümumi DB vaxtı (connection.execute_wrappers ilə)
+- template render vaxtı
+- cache hit / miss (record_cache ilə əl ilə qeyd olunur)
+
+Nəticələr:
+- Server-Timing header (brauzer DevTools-da görünür)
+- "blogApp.metrics" logger-ə JSON sətir (INFO), büdcə aşılanda WARNING
+- /metrics/ endpoint-i: Prometheus text formatında process daxili cəmlər
+
+Büdcə: settings.QUERY_BUDGETS = {"take_exam": 30, "LivePlayConsumer.receive_json": 12}
+(açar: url adı və ya Consumer.method), qalanlar üçün QUERY_BUDGET_DEFAULT.
+
+Default olaraq yalnız DEBUG-da açıqdır (settings.METRICS_ENABLED).
+METRICS_ENABLED=False olanda middleware siyahıdan çıxır (MiddlewareNotUsed),
+consumer-lər ölçülmür və Template.render-ə heç bir hook qoyulmur.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import logging
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Dict, Optional
+
+from django.conf import settings
+from django.db import connections
+from django.core.exceptions import MiddlewareNotUsed
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+
+logger = logging.getLogger("blogApp.metrics")
+
+
+class RequestMetrics:
+    __slots__ = ("name", "started", "queries", "db_time", "render_time", "render_depth", "cache_hits", "cache_misses")
+
+    def __init__(self, name: str = ""):
+        self.name = name
+        self.started = time.perf_counter()
+        self.queries = 0
+        self.db_time = 0.0
+        self.render_time = 0.0
+        self.render_depth = 0
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    @property
+    def total_time(self) -> float:
+        return time.perf_counter() - self.started
+
+    def as_dict(self) -> Dict[str, object]:
+        return {
+            "name": self.name,
+            "queries": self.queries,
+            "db_ms": round(self.db_time * 1000, 2),
+            "render_ms": round(self.render_time * 1000, 2),
+            "cache_hits": self.cache_hits,
+            "cache_misses": self.cache_misses,
+            "total_ms": round(self.total_time * 1000, 2),
+        }
+
+
+# contextvar -> sync_to_async / database_sync_to_async thread-lərinə də ötürülür
+_current: ContextVar[Optional[RequestMetrics]] = ContextVar("request_metrics", default=None)
+
+
+def current_metrics() -> Optional[RequestMetrics]:
+    return _current.get()
+
+
+def record_cache(hit: bool) -> None:
+    m = _current.get()
+    if m is None:
+        return
+    if hit:
+        m.cache_hits += 1
+    else:
+        m.cache_misses += 1
+
+
+# -------------------------
+# DB + template hook-ları
+# -------------------------
+
+def _execute_wrapper(execute, sql, params, many, context):
+    m = _current.get()
+    if m is None:
+        return execute(sql, params, many, context)
+    t0 = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        m.queries += 1
+        m.db_time += time.perf_counter() - t0
+
+
+def _install_wrapper(connection) -> None:
+    if _execute_wrapper not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute_wrapper)
+
+
+def _on_connection_created(sender, connection, **kwargs):
+    _install_wrapper(connection)
+
+
+def metrics_enabled() -> bool:
+    return getattr(settings, "METRICS_ENABLED", False)
+
+
+_installed = False
+_install_lock = threading.Lock()
+_original_render = None
+
+
+def _render(self, context):
+    m = _current.get()
+    if m is None:
+        return _original_render(self, context)
+    # include / extends daxilindəki render-lər ikinci dəfə sayılmasın
+    m.render_depth += 1
+    t0 = time.perf_counter()
+    try:
+        return _original_render(self, context)
+    finally:
+        m.render_depth -= 1
+        if m.render_depth == 0:
+            m.render_time += time.perf_counter() - t0
+
+
+def install() -> None:
+    """
+    Bir dəfə: yeni connection-lara wrapper, Template.render-ə ölçü.
+    Yalnız middleware / instrument_event metrics açıq olanda çağırır.
+    """
+    global _installed, _original_render
+    with _install_lock:
+        if _installed:
+            return
+        connection_created.connect(_on_connection_created, dispatch_uid="blogApp.metrics")
+
+        from django.template.base import Template
+
+        _original_render = Template.render
+        Template.render = functools.wraps(_original_render)(_render)
+        _installed = True
+
+
+def uninstall() -> None:
+    """install()-ı geri qaytarır (testlər üçün)."""
+    global _installed, _original_render
+    with _install_lock:
+        if not _installed:
+            return
+        connection_created.disconnect(dispatch_uid="blogApp.metrics")
+        for conn in connections.all(initialized_only=True):
+            if _execute_wrapper in conn.execute_wrappers:
+                conn.execute_wrappers.remove(_execute_wrapper)
+
+        from django.template.base import Template
+
+        Template.render = _original_render
+        _original_render = None
+        _installed = False
+
+
+# -------------------------
+# Aggregation (Prometheus)
+# -------------------------
+
+class _Registry:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._rows: Dict[str, Dict[str, float]] = defaultdict(lambda: defaultdict(float))
+
+    def observe(self, m: RequestMetrics, over_budget: bool) -> None:
+        with self._lock:
+            row = self._rows[m.name]
+            row["count"] += 1
+            row["queries"] += m.queries
+            row["db_seconds"] += m.db_time
+            row["render_seconds"] += m.render_time
+            row["seconds"] += m.total_time
+            row["cache_hits"] += m.cache_hits
+            row["cache_misses"] += m.cache_misses
+            row["over_budget"] += 1 if over_budget else 0
+
+    def render(self) -> str:
+        metrics = [
+            ("count", "app_view_requests_total", "counter", "Requests / events handled"),
+            ("queries", "app_view_queries_total", "counter", "SQL queries executed"),
+            ("db_seconds", "app_view_db_seconds_total", "counter", "Time spent in SQL"),
+            ("render_seconds", "app_view_render_seconds_total", "counter", "Time spent rendering templates"),
+            ("seconds", "app_view_seconds_total", "counter", "Total handling time"),
+            ("cache_hits", "app_view_cache_hits_total", "counter", "Cache hits"),
+            ("cache_misses", "app_view_cache_misses_total", "counter", "Cache misses"),
+            ("over_budget", "app_view_query_budget_exceeded_total", "counter", "Query budget violations"),
+        ]
+        with self._lock:
+            rows = {name: dict(row) for name, row in self._rows.items()}
+
+        lines = []
+        for key, metric, kind, help_text in metrics:
+            lines.append(f"# HELP {metric} {help_text}")
+            lines.append(f"# TYPE {metric} {kind}")
+            for name in sorted(rows):
+                value = rows[name].get(key, 0)
+                lines.append(f'{metric}{{view="{name}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    def reset(self) -> None:
+        with self._lock:
+            self._rows.clear()
+
+
+registry = _Registry()
+
+
+def query_budget(name: str) -> int:
+    budgets = getattr(settings, "QUERY_BUDGETS", {}) or {}
+    return int(budgets.get(name, getattr(settings, "QUERY_BUDGET_DEFAULT", 50)))
+
+
+def _finish(m: RequestMetrics, **extra) -> None:
+    budget = query_budget(m.name)
+    over = budget > 0 and m.queries > budget
+    registry.observe(m, over)
+
+    data = {**m.as_dict(), **extra}
+    if over:
+        logger.warning(json.dumps({"event": "query_budget_exceeded", "budget": budget, **data}))
+    else:
+        logger.info(json.dumps({"event": "view_metrics", **data}))
+
+
+# -------------------------
+# Middleware
+# -------------------------
+
+class QueryMetricsMiddleware:
+    """
+    MIDDLEWARE siyahısında ən yuxarıda olmalıdır ki, bütün sorğuları görsün.
+    """
+
+    def __init__(self, get_response):
+        if not metrics_enabled():
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        install()
+
+    def __call__(self, request):
+        for conn in connections.all(initialized_only=True):
+            _install_wrapper(conn)
+
+        m = RequestMetrics()
+        token = _current.set(m)
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+
+        match = getattr(request, "resolver_match", None)
+        m.name = (match.view_name if match else "") or "unresolved"
+
+        response["Server-Timing"] = ", ".join([
+            f'db;dur={m.db_time * 1000:.1f};desc="{m.queries} queries"',
+            f"render;dur={m.render_time * 1000:.1f}",
+            f'cache;desc="hit={m.cache_hits} miss={m.cache_misses}"',
+            f"total;dur={m.total_time * 1000:.1f}",
+        ])
+        _finish(m, method=request.method, path=request.path, status=response.status_code)
+        return response
+
+
+# -------------------------
+# Consumer wrapper
+# -------------------------
+
+def instrument_event(func):
+    """
+    Async consumer metodları üçün: connect / receive_json və s.
+    Ad: "<ConsumerClass>.<method>".
+    """
+
+    @functools.wraps(func)
+    async def wrapper(self, *args, **kwargs):
+        if not metrics_enabled():
+            return await func(self, *args, **kwargs)
+        install()
+        m = RequestMetrics(f"{type(self).__name__}.{func.__name__}")
+        token = _current.set(m)
+        try:
+            return await func(self, *args, **kwargs)
+        finally:
+            _current.reset(token)
+            _finish(m)
+
+    return wrapper
+
+
+# -------------------------
+# /metrics/ endpoint
+# -------------------------
+
+def metrics_view(request):
+    """
+    Prometheus text formatı. İcazə: DEBUG, staff user və ya
+    "Authorization: Bearer <METRICS_TOKEN>".
+    """
+    token = getattr(settings, "METRICS_TOKEN", "")
+    auth = request.headers.get("Authorization", "")
+    allowed = (
+        settings.DEBUG
+        or getattr(request.user, "is_staff", False)
+        or (token and auth == f"Bearer {token}")
+    )
+    if not allowed:
+        raise Http404()
+    return HttpResponse(registry.render(), content_type="text/plain; version=0.0.4")
@@ -53,6 +53,8 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    # ən yuxarıda: bütün view-ların sorğu / render ölçüləri (blogApp/metrics.py)
+    "blogApp.metrics.QueryMetricsMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "whitenoise.middleware.WhiteNoiseMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
@@ -65,6 +67,26 @@ MIDDLEWARE = [
 
 ROOT_URLCONF = "blogApp.urls"
 
+# Sorğu / render ölçüləri (blogApp/metrics.py); söndürüləndə heç bir hook qoyulmur.
+# Default yalnız DEBUG-da açıqdır — production-da METRICS_ENABLED=True ilə açılır
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", str(DEBUG)) == "True"
+
+# Query büdcəsi: aşılanda "blogApp.metrics" logger-ə WARNING yazılır.
+# Açar: url adı (view_name) və ya "ConsumerClass.method"; qalanları üçün default.
+QUERY_BUDGET_DEFAULT = int(os.getenv("QUERY_BUDGET_DEFAULT", "50"))
+QUERY_BUDGETS = {
+    "home": 15,
+    "post_detail": 20,
+    "student_exam_list": 20,
+    "assigned_exam_list": 20,
+    "take_exam": 30,
+    "exam_result": 25,
+    "teacher_exam_results": 25,
+    "LivePlayConsumer.receive_json": 12,
+}
+# /metrics/ (Prometheus) üçün token; boşdursa yalnız DEBUG və ya staff
+METRICS_TOKEN = os.getenv("METRICS_TOKEN", "")
+
 TEMPLATES = [
     {
         "BACKEND": "django.template.backends.django.DjangoTemplates",
@@ -86,14 +108,72 @@ WSGI_APPLICATION = "blogApp.wsgi.application"
 
 ASGI_APPLICATION = "blogApp.asgi.application"  # core = sənin project adı
 
-CHANNEL_LAYERS = {
-    "default": {
-        "BACKEND": "channels_redis.core.RedisChannelLayer",
-        "CONFIG": {
-            "hosts": [("127.0.0.1", 6379)],
+# Channel layer rejimi (CHANNEL_LAYER_MODE):
+#   redis  -> RedisChannelLayer; CHANNEL_REDIS_HOSTS-da bir neçə host varsa kanallar host-lar arasında shard olunur
+#   pubsub -> RedisPubSubChannelLayer; group_send hər kanala yox, bir dəfə publish edir (böyük otaqlar üçün)
+#   memory -> InMemoryChannelLayer; tək process deploy və testlər üçün (Redis lazım deyil)
+CHANNEL_LAYER_MODE = os.getenv("CHANNEL_LAYER_MODE", "redis")
+CHANNEL_REDIS_HOSTS = [
+    h.strip() for h in os.getenv("CHANNEL_REDIS_HOSTS", "redis://127.0.0.1:6379/0").split(",") if h.strip()
+]
+# kanal başına növbə limiti, mesajın yaşama müddəti, qrup üzvlüyünün müddəti (saniyə)
+CHANNEL_CAPACITY = int(os.getenv("CHANNEL_CAPACITY", "1000"))
+CHANNEL_EXPIRY = int(os.getenv("CHANNEL_EXPIRY", "60"))
+CHANNEL_GROUP_EXPIRY = int(os.getenv("CHANNEL_GROUP_EXPIRY", str(60 * 60 * 6)))
+
+if CHANNEL_LAYER_MODE == "memory":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels.layers.InMemoryChannelLayer",
+            "CONFIG": {
+                "capacity": CHANNEL_CAPACITY,
+                "expiry": CHANNEL_EXPIRY,
+                "group_expiry": CHANNEL_GROUP_EXPIRY,
+            },
         },
-    },
-}
+    }
+elif CHANNEL_LAYER_MODE == "pubsub":
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.pubsub.RedisPubSubChannelLayer",
+            "CONFIG": {
+                "hosts": CHANNEL_REDIS_HOSTS,
+            },
+        },
+    }
+else:
+    CHANNEL_LAYERS = {
+        "default": {
+            "BACKEND": "channels_redis.core.RedisChannelLayer",
+            "CONFIG": {
+                "hosts": CHANNEL_REDIS_HOSTS,
+                "capacity": CHANNEL_CAPACITY,
+                "expiry": CHANNEL_EXPIRY,
+                "group_expiry": CHANNEL_GROUP_EXPIRY,
+            },
+        },
+    }
+
+# Bir live sessiyaya maksimum oyunçu (0 = limitsiz)
+LIVE_MAX_PLAYERS_PER_SESSION = int(os.getenv("LIVE_MAX_PLAYERS_PER_SESSION", "0"))
+
+# Live leaderboard (Redis sorted set). Redis əlçatan deyilsə -> in-process fallback
+LIVE_LEADERBOARD_REDIS_URL = os.getenv("LIVE_LEADERBOARD_REDIS_URL", "redis://127.0.0.1:6379/1")
+
+# Session yaradılanda join QR (PNG / SVG) arxa fonda əvvəlcədən cache-lənsin (liveExam/qr.py)
+LIVE_QR_PRERENDER = os.getenv("LIVE_QR_PRERENDER", "True") == "True"
+
+# Live presence: client heartbeat intervalı, oflayn sayılma müddəti, sweeper periodu (saniyə)
+LIVE_HEARTBEAT_SECONDS = 10
+LIVE_PRESENCE_TIMEOUT_SECONDS = 30
+LIVE_PRESENCE_SWEEP_SECONDS = 5
+
+# Planlı imtahanlar (blog/exam_schedule.py, manage.py run_exam_scheduler):
+# açılışdan neçə saniyə əvvəl hazırlıq başlasın, açılışdan sonra start-lar neçə saniyəyə paylansın
+EXAM_PREWARM_LEAD_SECONDS = int(os.getenv("EXAM_PREWARM_LEAD_SECONDS", "300"))
+EXAM_START_RAMP_SECONDS = int(os.getenv("EXAM_START_RAMP_SECONDS", "60"))
+# aktivləşmədə icazəli tələbələr üçün attempt-lər əvvəlcədən hazırlansın (blog/attempt_pool.py)
+EXAM_PREWARM_ATTEMPTS = os.getenv("EXAM_PREWARM_ATTEMPTS", "True") == "True"
 
 
 # Database
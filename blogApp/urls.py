@@ -21,8 +21,11 @@ from django.urls import include
 from django.conf import settings
 from django.conf.urls.static import static
 
+from blogApp.metrics import metrics_view
+
 urlpatterns = [
     path("admin/", admin.site.urls),
+    path("metrics/", metrics_view, name="metrics"),
     path('blog/', include('blog.urls') ),
     path('', include('blog.urls') ),
     path("", include("liveExam.urls")),
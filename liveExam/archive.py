@@ -0,0 +1,154 @@
+# liveExam/archive.py
+
+"""
+Bitmiş live sessiyaların arxivləşdirilməsi.
+
+1) build_session_summary: final leaderboard + sual üzrə statistika (aggregate sorğular)
+2) archive_session: xülasəni zlib(JSON) kimi LiveSessionArchive-ə yazır
+3) archive_finished_sessions: bitməsindən (finished_at, köhnə sətirlərdə created_at)
+   retention qədər keçmiş sessiyaları arxivləyib raw sətirləri
+   (session -> players -> answers, CASCADE) silir
+
+PIN recycle (liveExam/pins.py) yalnız active_pin-i azad edir, pin sütunu dəyişmir —
+arxivə sessiyanın əsl PIN-i düşür.
+"""
+
+from __future__ import annotations
+
+import json
+import zlib
+from collections import Counter, defaultdict
+from datetime import timedelta
+from typing import Any, Dict, List
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Avg, Count, Q, Sum
+from django.utils import timezone
+
+from blog.models import ExamQuestion
+from liveExam.models import LiveAnswer, LivePlayer, LiveSession, LiveSessionArchive
+
+RETENTION_DAYS = getattr(settings, "LIVE_ARCHIVE_RETENTION_DAYS", 7)
+
+
+def _leaderboard(session: LiveSession) -> List[Dict[str, Any]]:
+    rows = (
+        LivePlayer.objects
+        .filter(session=session)
+        .annotate(
+            answered=Count("answers"),
+            correct=Count("answers", filter=Q(answers__is_correct=True)),
+        )
+        .order_by("-score", "id")
+        .values("id", "nickname", "avatar_key", "score", "streak", "answered", "correct")
+    )
+    return [{"rank": i, **row} for i, row in enumerate(rows, start=1)]
+
+
+def _question_stats(session: LiveSession) -> List[Dict[str, Any]]:
+    stats = {
+        row["question_id"]: row
+        for row in (
+            LiveAnswer.objects
+            .filter(session=session)
+            .values("question_id")
+            .annotate(
+                answered=Count("id"),
+                correct=Count("id", filter=Q(is_correct=True)),
+                avg_ms=Avg("answer_ms"),
+                points=Sum("awarded_points"),
+            )
+        )
+    }
+
+    # variant paylanması (choice_ids JSON -> Python tərəfdə sayılır)
+    choices: Dict[int, Counter] = defaultdict(Counter)
+    for qid, ids, single in (
+        LiveAnswer.objects.filter(session=session).values_list("question_id", "choice_ids", "choice_id")
+    ):
+        for cid in (ids or ([single] if single else [])):
+            choices[qid][str(cid)] += 1
+
+    order = list(session.selected_question_ids or []) or sorted(stats)
+    texts = dict(ExamQuestion.objects.filter(id__in=order).values_list("id", "text"))
+
+    out = []
+    for index, qid in enumerate(order):
+        row = stats.get(qid, {})
+        out.append({
+            "index": index,
+            "question_id": qid,
+            "text": texts.get(qid, ""),
+            "answered": row.get("answered", 0),
+            "correct": row.get("correct", 0),
+            "avg_ms": round(row["avg_ms"]) if row.get("avg_ms") is not None else None,
+            "points": row.get("points") or 0,
+            "choices": dict(choices.get(qid, {})),
+        })
+    return out
+
+
+def build_session_summary(session: LiveSession) -> Dict[str, Any]:
+    return {
+        "version": 1,
+        "session": {
+            "id": session.id,
+            "pin": session.pin,
+            "exam_id": session.exam_id,
+            "host_user_id": session.host_user_id,
+            "question_limit": session.question_limit,
+            "question_seconds": session.question_seconds,
+            "created_at": session.created_at.isoformat(),
+            "finished_at": session.finished_at.isoformat() if session.finished_at else None,
+        },
+        "leaderboard": _leaderboard(session),
+        "questions": _question_stats(session),
+    }
+
+
+def archive_session(session: LiveSession) -> LiveSessionArchive:
+    """Idempotent: eyni sessiya ikinci dəfə arxivlənəndə mövcud sətir yenilənir."""
+    summary = build_session_summary(session)
+    payload = zlib.compress(
+        json.dumps(summary, ensure_ascii=False, separators=(",", ":")).encode("utf-8"), 6,
+    )
+    archive, _ = LiveSessionArchive.objects.update_or_create(
+        session_id=session.id,
+        defaults={
+            "exam_id": session.exam_id,
+            "host_user_id": session.host_user_id,
+            "pin": session.pin,
+            "player_count": len(summary["leaderboard"]),
+            "answer_count": sum(q["answered"] for q in summary["questions"]),
+            "question_count": len(summary["questions"]),
+            "payload": payload,
+            "session_created_at": session.created_at,
+        },
+    )
+    return archive
+
+
+def archive_finished_sessions(retention_days: int = RETENTION_DAYS, now=None, limit: int = 200) -> int:
+    """
+    Retention-dan köhnə bitmiş sessiyaları arxivləyir və raw sətirləri silir.
+    Hər sessiya ayrıca transaction-dadır (yarımçıq iş qalmır). Arxivlənən sayı qaytarır.
+    """
+    now = now or timezone.now()
+    cutoff = now - timedelta(days=retention_days)
+
+    sessions = (
+        LiveSession.objects
+        .filter(state=LiveSession.STATE_FINISHED)
+        .filter(Q(finished_at__lt=cutoff) | Q(finished_at__isnull=True, created_at__lt=cutoff))
+        .order_by("id")[:limit]
+    )
+
+    done = 0
+    for session in sessions:
+        with transaction.atomic():
+            archive_session(session)
+            # answers / players CASCADE ilə silinir
+            session.delete()
+        done += 1
+    return done
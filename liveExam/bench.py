@@ -0,0 +1,219 @@
+# liveExam/bench.py
+
+"""
+Live oyun üçün yük testi köməkçiləri (management command-lar istifadə edir).
+Nəticələr konfiqurasiya olunmuş channel layer / DB ilə ölçülür:
+CHANNEL_LAYER_MODE=memory (tək process) və ya redis / pubsub.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import random
+import time
+import uuid
+from typing import Any, Dict, List, Sequence
+
+from channels.db import database_sync_to_async
+from channels.layers import get_channel_layer
+from django.db import connection
+
+
+def percentile(values: Sequence[float], p: float) -> float:
+    if not values:
+        return 0.0
+    data = sorted(values)
+    k = (len(data) - 1) * (p / 100.0)
+    lo = int(k)
+    hi = min(lo + 1, len(data) - 1)
+    return data[lo] + (data[hi] - data[lo]) * (k - lo)
+
+
+def summarize_ms(values: Sequence[float]) -> Dict[str, float]:
+    """saniyə siyahısı -> ms ilə p50 / p99 / max"""
+    return {
+        "p50_ms": round(percentile(values, 50) * 1000, 2),
+        "p99_ms": round(percentile(values, 99) * 1000, 2),
+        "max_ms": round(max(values) * 1000, 2) if values else 0.0,
+    }
+
+
+async def measure_fanout(size: int, rounds: int = 5) -> Dict[str, float]:
+    """
+    size qədər kanal bir qrupa qoşulur, hər raundda bir group_send edilir və
+    hər kanalın mesajı alma vaxtı ölçülür (consumer-siz, təmiz layer fan-out).
+    """
+    layer = get_channel_layer()
+    group = f"bench_{uuid.uuid4().hex[:12]}"
+    channels = [await layer.new_channel() for _ in range(size)]
+    for ch in channels:
+        await layer.group_add(group, ch)
+
+    latencies: List[float] = []
+    send_times: List[float] = []
+    try:
+        for r in range(rounds):
+            async def recv(ch: str, t0: float) -> None:
+                await layer.receive(ch)
+                latencies.append(time.perf_counter() - t0)
+
+            t0 = time.perf_counter()
+            waiters = [asyncio.ensure_future(recv(ch, t0)) for ch in channels]
+            await layer.group_send(group, {"type": "bench.message", "round": r})
+            send_times.append(time.perf_counter() - t0)
+            await asyncio.wait_for(asyncio.gather(*waiters), timeout=60)
+    finally:
+        for ch in channels:
+            await layer.group_discard(group, ch)
+
+    return {
+        "size": size,
+        "rounds": rounds,
+        "group_send_ms": round(sum(send_times) / len(send_times) * 1000, 2),
+        **summarize_ms(latencies),
+    }
+
+
+# -------------------------
+# Tam oyun benchmark-ı (WebsocketCommunicator ilə)
+# -------------------------
+
+class QueryCounter:
+    """connection.execute_wrappers üçün: icra olunan SQL sayını sayır."""
+
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+def _create_bench_exam(questions: int, options: int = 4):
+    from django.contrib.auth.models import Group, User
+
+    from blog.models import Exam, ExamQuestion, ExamQuestionOption
+
+    tag = uuid.uuid4().hex[:8]
+    host = User.objects.create_user(username=f"bench_host_{tag}", password=uuid.uuid4().hex)
+    group, _ = Group.objects.get_or_create(name="teacher")
+    host.groups.add(group)
+
+    exam = Exam.objects.create(author=host, title=f"Bench {tag}")
+    for i in range(questions):
+        q = ExamQuestion.objects.create(exam=exam, text=f"Bench sual {i + 1}", order=i)
+        ExamQuestionOption.objects.bulk_create([
+            ExamQuestionOption(question=q, text=f"Variant {j + 1}", is_correct=(j == 0))
+            for j in range(options)
+        ])
+    return host, exam
+
+
+async def _wait_for(comm, msg_type: str, timeout: float = 30) -> Dict[str, Any]:
+    while True:
+        msg = await comm.receive_json_from(timeout=timeout)
+        if msg.get("type") == msg_type:
+            return msg
+
+
+async def run_game_benchmark(players: int, questions: int, window: float, seed: int = 0) -> Dict[str, Any]:
+    """
+    N oyunçu live_join_enter ilə qoşulur, play socket açır; host start/reveal/next edir,
+    oyunçular hər sualda window saniyə ərzində random vaxtda cavab verir.
+    """
+    from channels.testing import WebsocketCommunicator
+    from django.test import Client
+    from django.urls import reverse
+
+    from blogApp.asgi import application
+
+    rng = random.Random(seed)
+    counter = QueryCounter()
+    # consumer-lər və view-lar eyni thread-sensitive thread-də işləyir -> counter orada
+    await database_sync_to_async(lambda: connection.execute_wrappers.append(counter))()
+
+    host, exam = await database_sync_to_async(_create_bench_exam)(questions)
+    host_client = Client()
+    await database_sync_to_async(host_client.force_login)(host)
+    resp = await database_sync_to_async(host_client.get)(
+        reverse("liveExam:create_session_slug", kwargs={"slug": exam.slug})
+    )
+    pin = resp.url.rstrip("/").split("/")[-1]
+
+    # 1) join
+    join_lat: List[float] = []
+    cookies: List[str] = []
+    for i in range(players):
+        c = Client()
+        t0 = time.perf_counter()
+        await database_sync_to_async(c.post)(
+            reverse("liveExam:join_enter", kwargs={"pin": pin}), {"nickname": f"bot{i}"}
+        )
+        join_lat.append(time.perf_counter() - t0)
+        cookies.append("; ".join(f"{k}={v.value}" for k, v in c.cookies.items()))
+
+    comms = []
+    for ck in cookies:
+        comm = WebsocketCommunicator(application, f"/ws/live/{pin}/play/", headers=[(b"cookie", ck.encode())])
+        connected, _ = await comm.connect()
+        if not connected:
+            raise RuntimeError("Play socket connect failed")
+        comms.append(comm)
+
+    ack_lat: List[float] = []
+    answer_queries = 0
+    answer_wall = 0.0
+    host_lat: Dict[str, List[float]] = {"start": [], "next": [], "reveal": []}
+
+    async def host_post(action: str, name: str, data=None):
+        t0 = time.perf_counter()
+        r = await database_sync_to_async(host_client.post)(reverse(f"liveExam:{name}", kwargs={"pin": pin}), data or {})
+        host_lat[action].append(time.perf_counter() - t0)
+        return r
+
+    async def answer(comm, q: Dict[str, Any]) -> None:
+        await asyncio.sleep(rng.uniform(0, window))
+        option = rng.choice(q["options"])
+        t0 = time.perf_counter()
+        await comm.send_json_to({
+            "type": "answer", "question_id": q["id"], "option_id": option["id"],
+            "answer_ms": int(window * 1000),
+        })
+        await _wait_for(comm, "answer_saved")
+        ack_lat.append(time.perf_counter() - t0)
+
+    try:
+        for index in range(questions):
+            if index == 0:
+                await host_post("start", "start_game", {"question_count": str(questions)})
+            else:
+                await host_post("next", "next_question")
+            published = [await _wait_for(comm, "question_published") for comm in comms]
+
+            before = counter.count
+            t0 = time.perf_counter()
+            await asyncio.gather(*[answer(comm, msg["question"]) for comm, msg in zip(comms, published)])
+            answer_wall += time.perf_counter() - t0
+            answer_queries += counter.count - before
+
+            await host_post("reveal", "end_question")
+            for comm in comms:
+                await _wait_for(comm, "reveal")
+
+        await database_sync_to_async(host_client.post)(reverse("liveExam:finish_game", kwargs={"pin": pin}))
+    finally:
+        for comm in comms:
+            await comm.disconnect()
+        await database_sync_to_async(lambda: connection.execute_wrappers.remove(counter))()
+
+    answers = len(ack_lat)
+    return {
+        "players": players,
+        "questions": questions,
+        "answers": answers,
+        "join": summarize_ms(join_lat),
+        "answer_ack": summarize_ms(ack_lat),
+        "queries_per_answer": round(answer_queries / answers, 2) if answers else 0.0,
+        "answers_per_sec": round(answers / answer_wall, 1) if answer_wall else 0.0,
+        "host": {k: summarize_ms(v) for k, v in host_lat.items() if v},
+    }
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+import asyncio
 from typing import Any, Dict, List, Tuple
 
 from channels.db import database_sync_to_async
@@ -9,7 +10,11 @@ from channels.generic.websocket import AsyncJsonWebsocketConsumer
 from django.core import signing
 from django.utils import timezone
 
+from blogApp.metrics import instrument_event
 from liveExam.models import LiveSession, LivePlayer, LiveAnswer
+from liveExam.leaderboard import get_leaderboard
+from liveExam.lobby import DELTA_TYPES, lobby_snapshot
+from liveExam.presence import ensure_sweeper, registry as presence
 from blog.models import ExamQuestion, ExamQuestionOption  # import yolunu öz proyektinə uyğun saxla
 
 # ⚠️ consumers içindən views import eləmə (circular risk).
@@ -17,21 +22,76 @@ PLAYER_COOKIE_NAME = "live_player_token"
 PLAYER_TOKEN_SALT = "liveExam.player"
 
 
+def _read_player_token(scope, pin: str) -> Tuple[bool, Any]:
+    """
+    Cookie-dəki player token-i yoxlayır.
+    (True, payload) və ya (False, error_message) qaytarır.
+    """
+    cookies = scope.get("cookies") or {}
+    token = cookies.get(PLAYER_COOKIE_NAME)
+
+    if not token:
+        return False, "No token"
+
+    try:
+        payload = signing.loads(token, salt=PLAYER_TOKEN_SALT, max_age=60 * 60 * 6)
+    except Exception:
+        return False, "Bad token"
+
+    if str(payload.get("pin")) != str(pin):
+        return False, "Pin mismatch"
+
+    return True, payload
+
+
+class PresenceMixin:
+    """
+    Player socket-ləri üçün presence:
+    connect -> online, {"type": "heartbeat"} -> last_seen, disconnect -> offline.
+    DB-yə sweeper toplu yazır (liveExam.presence).
+    """
+
+    player_id = None
+
+    def _presence_connect(self):
+        ensure_sweeper()
+        ok, payload = _read_player_token(self.scope, self.pin)
+        if ok and payload.get("player_id"):
+            self.player_id = int(payload["player_id"])
+            presence.connect(self.pin, self.player_id)
+
+    def _presence_heartbeat(self):
+        if self.player_id:
+            presence.heartbeat(self.pin, self.player_id)
+
+    def _presence_disconnect(self):
+        if self.player_id:
+            presence.disconnect(self.pin, self.player_id)
+
+
 # -------------------------
 # Lobby consumer
 # -------------------------
 
-class LiveLobbyConsumer(AsyncJsonWebsocketConsumer):
+class LiveLobbyConsumer(PresenceMixin, AsyncJsonWebsocketConsumer):
     """
     Wait room / lobby websocket:
-    - connect olanda hazırkı players listini göndərir
-    - view tərəfdən group_send gələndə realtime update edir
+    - connect olanda lobby_state snapshot göndərir (seq ilə)
+    - sonra yalnız player_joined / player_left / player_updated delta-ları gəlir;
+      qısa pəncərədə yığılıb bir "lobby_batch" frame kimi göndərilir
+    - client seq boşluğu görsə {"type": "snapshot"} göndərir -> yeni snapshot
     Group: live_<pin>_lobby
     """
 
+    # join burst-ləri bu müddətdə birləşdirilir (saniyə)
+    COALESCE_SECONDS = 0.25
+
+    @instrument_event
     async def connect(self):
         self.pin = self.scope["url_route"]["kwargs"]["pin"]
         self.group_name = f"live_{self.pin}_lobby"
+        self._pending: List[Dict[str, Any]] = []
+        self._flush_handle = None
 
         if not await self._session_exists(self.pin):
             await self.close()
@@ -39,42 +99,72 @@ class LiveLobbyConsumer(AsyncJsonWebsocketConsumer):
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
         await self.accept()
+        self._presence_connect()
 
         # ilk açılan kimi state göndər
         state = await self._get_lobby_state(self.pin)
         await self.send_json(state)
 
     async def disconnect(self, close_code):
+        self._presence_disconnect()
+        if getattr(self, "_flush_handle", None):
+            self._flush_handle.cancel()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
 
+    @instrument_event
+    async def receive_json(self, data, **kwargs):
+        msg_type = (data or {}).get("type")
+        if msg_type == "heartbeat":
+            self._presence_heartbeat()
+        elif msg_type == "snapshot":
+            # client seq boşluğu gördü -> tam vəziyyəti yenidən göndər
+            self._pending = []
+            await self.send_json(await self._get_lobby_state(self.pin))
+
     async def lobby_event(self, event):
         # view -> group_send(..., {"type":"lobby_event","data":{...}})
         data = event.get("data") or {}
+
+        if data.get("type") in DELTA_TYPES:
+            self._pending.append(data)
+            if self._flush_handle is None:
+                loop = asyncio.get_running_loop()
+                self._flush_handle = loop.call_later(
+                    self.COALESCE_SECONDS, lambda: asyncio.ensure_future(self._flush_pending())
+                )
+            return
+
+        # digər event-lər (game_started və s.) dərhal; sıra pozulmasın deyə əvvəl buffer
+        await self._flush_pending()
         await self.send_json(data)
 
+    async def _flush_pending(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        if not self._pending:
+            return
+        events, self._pending = self._pending, []
+        if len(events) == 1:
+            await self.send_json(events[0])
+        else:
+            await self.send_json({"type": "lobby_batch", "events": events})
+
     @database_sync_to_async
     def _session_exists(self, pin: str) -> bool:
         return LiveSession.objects.filter(pin=pin).exists()
 
     @database_sync_to_async
     def _get_lobby_state(self, pin: str) -> dict:
-        session = LiveSession.objects.get(pin=pin)
-        players = list(
-            session.players.order_by("-created_at")
-            .values("id", "nickname", "avatar_key")[:50]
-        )
-        return {
-            "type": "lobby_state",
-            "count": session.players.count(),
-            "players": players,
-        }
+        session = LiveSession.objects.by_pin(pin).get()
+        return lobby_snapshot(session)
 
 
 # -------------------------
 # Play consumer
 # -------------------------
 
-class LivePlayConsumer(AsyncJsonWebsocketConsumer):
+class LivePlayConsumer(PresenceMixin, AsyncJsonWebsocketConsumer):
     """
     Oyun websocket:
     - client 'answer' göndərir
@@ -84,40 +174,46 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
     Group: live_<pin>_play
     """
 
+    @instrument_event
     async def connect(self):
         self.pin = self.scope["url_route"]["kwargs"]["pin"]
         self.group_name = f"live_{self.pin}_play"
+        self.player_group_name = None
 
         if not await self._session_exists(self.pin):
             await self.close()
             return
 
         await self.channel_layer.group_add(self.group_name, self.channel_name)
+
+        # player-ə şəxsi mesajlar (reveal-də rank/streak) üçün ayrıca qrup.
+        # Host-un token-i yoxdur -> yalnız ümumi qrupda qalır.
+        self._presence_connect()
+        if self.player_id:
+            self.player_group_name = f"live_{self.pin}_player_{self.player_id}"
+            await self.channel_layer.group_add(self.player_group_name, self.channel_name)
+
         await self.accept()
 
     async def disconnect(self, close_code):
+        self._presence_disconnect()
         await self.channel_layer.group_discard(self.group_name, self.channel_name)
+        if getattr(self, "player_group_name", None):
+            await self.channel_layer.group_discard(self.player_group_name, self.channel_name)
 
+    @instrument_event
     async def receive_json(self, data, **kwargs):
-        if (data or {}).get("type") != "answer":
+        msg_type = (data or {}).get("type")
+        if msg_type == "heartbeat":
+            self._presence_heartbeat()
             return
-
-        # 1) token
-        cookies = self.scope.get("cookies") or {}
-        token = cookies.get(PLAYER_COOKIE_NAME)
-
-        if not token:
-            await self.send_json({"type": "error", "message": "No token"})
+        if msg_type != "answer":
             return
 
-        try:
-            payload = signing.loads(token, salt=PLAYER_TOKEN_SALT, max_age=60 * 60 * 6)
-        except Exception:
-            await self.send_json({"type": "error", "message": "Bad token"})
-            return
-
-        if str(payload.get("pin")) != str(self.pin):
-            await self.send_json({"type": "error", "message": "Pin mismatch"})
+        # 1) token
+        ok, payload = _read_player_token(self.scope, self.pin)
+        if not ok:
+            await self.send_json({"type": "error", "message": payload})
             return
 
         # 2) parse payload
@@ -142,6 +238,7 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
             return
 
         await self.send_json({"type": "answer_saved", **result})
+        self._presence_heartbeat()
 
         # 4) progress -> group (host auto-reveal üçün)
         prog = await self._get_answer_progress(self.pin, question_id)
@@ -186,8 +283,9 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
 
     @database_sync_to_async
     def _get_answer_progress(self, pin: str, question_id: int) -> dict:
-        session = LiveSession.objects.get(pin=pin)
-        total_players = LivePlayer.objects.filter(session=session).count()
+        session = LiveSession.objects.by_pin(pin).get()
+        # yalnız onlayn oyunçular (presence sweeper yeniləyir) -> auto-reveal gecikməsin
+        total_players = LivePlayer.objects.filter(session=session, is_connected=True).count()
 
         # distinct player count (daha doğru)
         answered_count = (
@@ -208,7 +306,7 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
     def _save_answer_and_score(self, pin, player_id, client_id, question_id, option_ids, answer_ms):
         # session
         try:
-            session = LiveSession.objects.get(pin=pin)
+            session = LiveSession.objects.by_pin(pin).get()
         except LiveSession.DoesNotExist:
             return False, "Session not found"
 
@@ -292,6 +390,9 @@ class LivePlayConsumer(AsyncJsonWebsocketConsumer):
         player.last_seen = timezone.now()
         player.save(update_fields=["score", "last_seen"])
 
+        # leaderboard: O(log n) rank update
+        get_leaderboard(session).set_score(player.id, player.score)
+
         return True, {
             "is_correct": is_perfect,
             "fraction": round(float(fraction), 4),
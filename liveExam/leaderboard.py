@@ -0,0 +1,486 @@
+# liveExam/leaderboard.py
+
+"""
+Live sessiya üçün leaderboard (reytinq cədvəli).
+
+Hər sessiyanın öz sorted set-i var (Redis ZSET):
+- score yeniləmə / oyunçunun öz yeri: O(log n)
+- top-K: O(log n + K)
+- suallar arası yer dəyişməsi (rank delta): commit_ranks()
+
+Redis varsa (settings.LIVE_LEADERBOARD_REDIS_URL) -> Redis ZSET,
+yoxdursa və ya oyun zamanı xəta verirsə -> process daxilində sıralı siyahı
+(bisect) fallback. Fallback-da yer axtarışı O(log n), amma yeniləmə siyahıya
+yerləşdirmədir (O(n)) — bir sessiyanın yüzlərlə oyunçusu üçün kifayətdir.
+
+DİQQƏT: fallback yalnız bir process üçündür. Bir neçə worker (gunicorn/daphne)
+olanda hər biri öz siyahısını saxlayır və reytinqlər fərqli görünə bilər —
+production-da Redis lazımdır.
+
+Redis xətası hər çağırışda tutulur: xəbərdarlıq log-lanır, Redis
+REDIS_RETRY_SECONDS müddətinə "söndürülür" və əməliyyat fallback-da
+(lazım olsa DB-dən qurularaq) icra olunur.
+Struktur itəndə (restart, Redis flush) DB-dəki LivePlayer-lərdən yenidən qurulur.
+"""
+
+from __future__ import annotations
+
+import bisect
+import json
+import logging
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from django.conf import settings
+
+try:
+    import redis
+except Exception:  # redis paketi yoxdursa -> yalnız memory fallback
+    redis = None
+
+logger = logging.getLogger(__name__)
+
+# Redis key-lərinin ömrü (player token-i ilə eyni: 6 saat)
+KEY_TTL_SECONDS = 60 * 60 * 6
+# Redis xəta verəndən sonra bu müddət ərzində fallback işlədilir
+REDIS_RETRY_SECONDS = 30
+
+
+def _member(player_id: int) -> str:
+    # Eyni bal olanda ZRANGE member-ləri leksik sıralayır:
+    # sıfırla doldurulmuş id => əvvəl qoşulan yuxarıda (created_at sırası kimi)
+    return f"{int(player_id):012d}"
+
+
+def _entry(player_id: int, meta: Dict[str, Any], score: int, rank: int) -> Dict[str, Any]:
+    return {
+        "player_id": int(player_id),
+        "nickname": meta.get("nickname", ""),
+        "avatar_key": meta.get("avatar_key", "avatar_1"),
+        "score": int(score),
+        "rank": int(rank),
+    }
+
+
+# -------------------------
+# In-process fallback
+# -------------------------
+
+class MemoryLeaderboard:
+    """
+    Sıralı siyahı: (-score, player_id) açarları.
+    bisect ilə axtarış O(log n); yeniləmə = köhnə açarı sil + insort,
+    siyahıda sürüşmə səbəbindən O(n). Yalnız bu process-də görünür.
+    """
+
+    _boards: Dict[int, "MemoryLeaderboard"] = {}
+    _boards_lock = threading.Lock()
+
+    def __init__(self, session_id: int):
+        self.session_id = int(session_id)
+        self._lock = threading.Lock()
+        self._order: List[tuple] = []
+        self._scores: Dict[int, int] = {}
+        self._meta: Dict[int, Dict[str, Any]] = {}
+        self._prev_ranks: Dict[int, int] = {}
+        self._ready = False
+
+    @classmethod
+    def for_session(cls, session_id: int) -> "MemoryLeaderboard":
+        with cls._boards_lock:
+            board = cls._boards.get(int(session_id))
+            if board is None:
+                board = cls(session_id)
+                cls._boards[int(session_id)] = board
+            return board
+
+    # --- state ---
+
+    def exists(self) -> bool:
+        return self._ready
+
+    def clear(self) -> None:
+        with self._lock:
+            self._order = []
+            self._scores = {}
+            self._meta = {}
+            self._prev_ranks = {}
+            self._ready = False
+        with self._boards_lock:
+            self._boards.pop(self.session_id, None)
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        with self._lock:
+            self._scores = {}
+            self._meta = {}
+            self._prev_ranks = {}
+            for r in rows:
+                pid = int(r["id"])
+                self._scores[pid] = int(r.get("score") or 0)
+                self._meta[pid] = {"nickname": r.get("nickname", ""), "avatar_key": r.get("avatar_key", "avatar_1")}
+            self._order = sorted((-s, pid) for pid, s in self._scores.items())
+            self._ready = True
+
+    # --- writes ---
+
+    def add_player(self, player_id: int, nickname: str, avatar_key: str, score: int = 0) -> None:
+        with self._lock:
+            pid = int(player_id)
+            self._meta[pid] = {"nickname": nickname, "avatar_key": avatar_key}
+            if pid not in self._scores:
+                self._scores[pid] = int(score)
+                bisect.insort(self._order, (-int(score), pid))
+
+    def set_score(self, player_id: int, score: int) -> None:
+        with self._lock:
+            pid = int(player_id)
+            old = self._scores.get(pid)
+            if old is not None:
+                i = bisect.bisect_left(self._order, (-old, pid))
+                if i < len(self._order) and self._order[i] == (-old, pid):
+                    del self._order[i]
+            self._scores[pid] = int(score)
+            bisect.insort(self._order, (-int(score), pid))
+
+    # --- reads ---
+
+    def rank(self, player_id: int) -> Optional[int]:
+        pid = int(player_id)
+        with self._lock:
+            score = self._scores.get(pid)
+            if score is None:
+                return None
+            return bisect.bisect_left(self._order, (-score, pid)) + 1
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        with self._lock:
+            head = self._order[: max(0, int(limit))]
+            return [_entry(pid, self._meta.get(pid, {}), -neg, i + 1) for i, (neg, pid) in enumerate(head)]
+
+    def entries(self, player_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        out: Dict[int, Dict[str, Any]] = {}
+        with self._lock:
+            for pid in player_ids:
+                pid = int(pid)
+                score = self._scores.get(pid)
+                if score is None:
+                    continue
+                r = bisect.bisect_left(self._order, (-score, pid)) + 1
+                out[pid] = _entry(pid, self._meta.get(pid, {}), score, r)
+        return out
+
+    def commit_ranks(self) -> Dict[int, Dict[str, int]]:
+        """
+        Hazırkı yerləri əvvəlki snapshot ilə müqayisə edir və yeni snapshot saxlayır.
+        delta > 0 => oyunçu yuxarı qalxıb.
+        Qaytarır: {player_id: {"rank", "prev_rank", "delta", "score"}}
+        """
+        with self._lock:
+            current = {}
+            out = {}
+            for i, (neg, pid) in enumerate(self._order):
+                r = i + 1
+                prev = self._prev_ranks.get(pid, r)
+                out[pid] = {"rank": r, "prev_rank": prev, "delta": prev - r, "score": -neg}
+                current[pid] = r
+            self._prev_ranks = current
+            return out
+
+
+# -------------------------
+# Redis sorted set
+# -------------------------
+
+class RedisLeaderboard:
+    """
+    Key-lər:
+      live:lb:<session_id>:z     -> ZSET (member=player_id, score=-score)
+      live:lb:<session_id>:meta  -> HASH (player_id -> {"nickname","avatar_key"})
+      live:lb:<session_id>:prev  -> HASH (player_id -> əvvəlki rank)
+    Mənfi score ilə ZRANGE artan sıra = yüksək baldan aşağı.
+    """
+
+    def __init__(self, client, session_id: int):
+        self.client = client
+        self.session_id = int(session_id)
+        base = f"live:lb:{self.session_id}"
+        self.z_key = f"{base}:z"
+        self.meta_key = f"{base}:meta"
+        self.prev_key = f"{base}:prev"
+
+    def _touch(self, pipe) -> None:
+        for k in (self.z_key, self.meta_key, self.prev_key):
+            pipe.expire(k, KEY_TTL_SECONDS)
+
+    # --- state ---
+
+    def exists(self) -> bool:
+        return bool(self.client.exists(self.meta_key))
+
+    def clear(self) -> None:
+        self.client.delete(self.z_key, self.meta_key, self.prev_key)
+
+    def load(self, rows: Iterable[Dict[str, Any]]) -> None:
+        scores: Dict[str, float] = {}
+        meta: Dict[str, str] = {}
+        for r in rows:
+            m = _member(r["id"])
+            scores[m] = -float(r.get("score") or 0)
+            meta[m] = json.dumps({"nickname": r.get("nickname", ""), "avatar_key": r.get("avatar_key", "avatar_1")})
+
+        pipe = self.client.pipeline()
+        pipe.delete(self.z_key, self.meta_key, self.prev_key)
+        if scores:
+            pipe.zadd(self.z_key, scores)
+        # boş sessiya da "qurulmuş" sayılsın deyə meta həmişə yazılır
+        meta["_"] = "{}"
+        pipe.hset(self.meta_key, mapping=meta)
+        self._touch(pipe)
+        pipe.execute()
+
+    # --- writes ---
+
+    def add_player(self, player_id: int, nickname: str, avatar_key: str, score: int = 0) -> None:
+        m = _member(player_id)
+        pipe = self.client.pipeline()
+        pipe.zadd(self.z_key, {m: -float(score)}, nx=True)
+        pipe.hset(self.meta_key, m, json.dumps({"nickname": nickname, "avatar_key": avatar_key}))
+        self._touch(pipe)
+        pipe.execute()
+
+    def set_score(self, player_id: int, score: int) -> None:
+        self.client.zadd(self.z_key, {_member(player_id): -float(score)})
+
+    # --- reads ---
+
+    def rank(self, player_id: int) -> Optional[int]:
+        r = self.client.zrank(self.z_key, _member(player_id))
+        return None if r is None else int(r) + 1
+
+    def _metas(self, members: List[str]) -> List[Dict[str, Any]]:
+        if not members:
+            return []
+        raw = self.client.hmget(self.meta_key, members)
+        return [json.loads(x) if x else {} for x in raw]
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        limit = max(0, int(limit))
+        if not limit:
+            return []
+        rows = self.client.zrange(self.z_key, 0, limit - 1, withscores=True)
+        members = [m.decode() if isinstance(m, bytes) else m for m, _ in rows]
+        metas = self._metas(members)
+        return [
+            _entry(int(m), meta, -int(s), i + 1)
+            for i, ((_, s), m, meta) in enumerate(zip(rows, members, metas))
+        ]
+
+    def entries(self, player_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        ids = [int(x) for x in player_ids]
+        if not ids:
+            return {}
+        members = [_member(pid) for pid in ids]
+        pipe = self.client.pipeline()
+        for m in members:
+            pipe.zscore(self.z_key, m)
+            pipe.zrank(self.z_key, m)
+        res = pipe.execute()
+        metas = self._metas(members)
+
+        out: Dict[int, Dict[str, Any]] = {}
+        for i, pid in enumerate(ids):
+            score, rank = res[2 * i], res[2 * i + 1]
+            if score is None or rank is None:
+                continue
+            out[pid] = _entry(pid, metas[i], -int(score), int(rank) + 1)
+        return out
+
+    def commit_ranks(self) -> Dict[int, Dict[str, int]]:
+        rows = self.client.zrange(self.z_key, 0, -1, withscores=True)
+        prev_raw = self.client.hgetall(self.prev_key)
+        prev = {
+            (k.decode() if isinstance(k, bytes) else k): int(v)
+            for k, v in prev_raw.items()
+        }
+
+        out: Dict[int, Dict[str, int]] = {}
+        snapshot: Dict[str, int] = {}
+        for i, (m, s) in enumerate(rows):
+            m = m.decode() if isinstance(m, bytes) else m
+            r = i + 1
+            p = prev.get(m, r)
+            out[int(m)] = {"rank": r, "prev_rank": p, "delta": p - r, "score": -int(s)}
+            snapshot[m] = r
+
+        if snapshot:
+            pipe = self.client.pipeline()
+            pipe.delete(self.prev_key)
+            pipe.hset(self.prev_key, mapping=snapshot)
+            self._touch(pipe)
+            pipe.execute()
+        return out
+
+
+# -------------------------
+# Factory
+# -------------------------
+
+_redis_client = None
+_redis_checked_at: Optional[float] = None
+_redis_lock = threading.Lock()
+# Redis kəsilib qayıdanda artır: kəsilmə zamanı ballar yalnız DB-yə və
+# fallback-a yazılıb, ona görə hər sessiya Redis-də bir dəfə DB-dən yenidən qurulur
+_redis_generation = 0
+_redis_down = False
+_synced_generation: Dict[int, int] = {}
+
+
+def _redis_errors() -> tuple:
+    return (redis.RedisError,) if redis is not None else ()
+
+
+def _mark_redis_down(exc: Exception) -> None:
+    """Növbəti REDIS_RETRY_SECONDS ərzində Redis-ə müraciət olunmur."""
+    global _redis_client, _redis_checked_at, _redis_down
+    logger.warning("leaderboard redis unavailable, using in-process fallback: %s", exc)
+    if not _redis_down:
+        # əvvəlki kəsilmədən qalmış fallback-lar köhnədir — DB-dən yenidən qurulsun
+        with MemoryLeaderboard._boards_lock:
+            MemoryLeaderboard._boards.clear()
+    with _redis_lock:
+        _redis_client = None
+        _redis_checked_at = time.monotonic()
+        _redis_down = True
+
+
+def _get_redis_client():
+    """
+    Redis client-i yoxlayır (ping). Əlçatan deyilsə None -> memory fallback;
+    REDIS_RETRY_SECONDS sonra yenidən yoxlanılır.
+    """
+    global _redis_client, _redis_checked_at, _redis_generation, _redis_down
+    checked_at = _redis_checked_at
+    if checked_at is not None and (_redis_client is not None or time.monotonic() - checked_at < REDIS_RETRY_SECONDS):
+        return _redis_client
+
+    with _redis_lock:
+        if _redis_checked_at is not checked_at:
+            return _redis_client
+
+        url = getattr(settings, "LIVE_LEADERBOARD_REDIS_URL", "") or ""
+        client = None
+        if url and redis is not None:
+            try:
+                client = redis.Redis.from_url(url, socket_connect_timeout=0.5, socket_timeout=1)
+                client.ping()
+            except Exception:
+                client = None
+
+        if client is not None and _redis_down:
+            _redis_generation += 1
+            _redis_down = False
+        _redis_client = client
+        _redis_checked_at = time.monotonic()
+        return _redis_client
+
+
+class ResilientLeaderboard:
+    """
+    RedisLeaderboard üzərində qoruyucu: hər metod redis.RedisError verəndə
+    log-lanır və eyni əməliyyat memory fallback-da icra olunur (fallback
+    boşdursa DB-dən qurulur). Oyun Redis kəsilsə də davam edir.
+    """
+
+    def __init__(self, primary: RedisLeaderboard, session):
+        self.primary = primary
+        self.session = session
+
+    def _fallback(self) -> MemoryLeaderboard:
+        board = MemoryLeaderboard.for_session(self.session.id)
+        if not board.exists():
+            board.load(_player_rows(self.session))
+        return board
+
+    def _call(self, name: str, *args, **kwargs):
+        # kəsilmə artıq qeydə alınıbsa hər çağırışda timeout gözlənilmir
+        if not _redis_down:
+            try:
+                return getattr(self.primary, name)(*args, **kwargs)
+            except _redis_errors() as exc:
+                _mark_redis_down(exc)
+        if name in ("load", "clear"):
+            return getattr(MemoryLeaderboard.for_session(self.session.id), name)(*args, **kwargs)
+        return getattr(self._fallback(), name)(*args, **kwargs)
+
+    def exists(self) -> bool:
+        return self._call("exists")
+
+    def clear(self) -> None:
+        return self._call("clear")
+
+    def load(self, rows) -> None:
+        return self._call("load", rows)
+
+    def add_player(self, player_id: int, nickname: str, avatar_key: str, score: int = 0) -> None:
+        return self._call("add_player", player_id, nickname, avatar_key, score)
+
+    def set_score(self, player_id: int, score: int) -> None:
+        return self._call("set_score", player_id, score)
+
+    def rank(self, player_id: int) -> Optional[int]:
+        return self._call("rank", player_id)
+
+    def top(self, limit: int = 10) -> List[Dict[str, Any]]:
+        return self._call("top", limit)
+
+    def entries(self, player_ids: Iterable[int]) -> Dict[int, Dict[str, Any]]:
+        # generator iki dəfə oxuna bilsin (Redis yarıda yıxılsa)
+        return self._call("entries", list(player_ids))
+
+    def commit_ranks(self) -> Dict[int, Dict[str, int]]:
+        return self._call("commit_ranks")
+
+
+def _player_rows(session):
+    return list(session.players.values("id", "nickname", "avatar_key", "score"))
+
+
+def _board_for(session):
+    client = _get_redis_client()
+    if client is not None:
+        return ResilientLeaderboard(RedisLeaderboard(client, session.id), session)
+    return MemoryLeaderboard.for_session(session.id)
+
+
+def rebuild_leaderboard(session):
+    """
+    Recovery: leaderboard-u DB-dəki LivePlayer score-larından yenidən qurur.
+    """
+    board = _board_for(session)
+    board.load(_player_rows(session))
+    return board
+
+
+def get_leaderboard(session):
+    """
+    Sessiyanın leaderboard-u. Yoxdursa (restart / TTL / flush) DB-dən qurulur.
+    """
+    board = _board_for(session)
+    if isinstance(board, ResilientLeaderboard):
+        if _synced_generation.get(session.id, 0) != _redis_generation or not board.exists():
+            # Redis yenidən əsas mənbədir: fallback atılır, ZSET DB-dən qurulur
+            MemoryLeaderboard.for_session(session.id).clear()
+            board.load(_player_rows(session))
+            _synced_generation[session.id] = _redis_generation
+        return board
+    if not board.exists():
+        board.load(_player_rows(session))
+    return board
+
+
+def drop_leaderboard(session) -> None:
+    _board_for(session).clear()
+    # Redis kəsiləndə yaranmış fallback da qalmasın
+    MemoryLeaderboard.for_session(session.id).clear()
+    _synced_generation.pop(session.id, None)
@@ -0,0 +1,122 @@
+# liveExam/lobby.py
+
+"""
+Lobby (wait room + host lobby) üçün incremental update-lər.
+
+Hər join-də bütün player siyahısını göndərmək əvəzinə:
+- player_joined / player_left delta event-ləri (seq nömrəsi ilə);
+  artıq lobby-də olan oyunçu nickname/avatar dəyişəndə player_updated
+- socket açılanda (və ya client seq boşluğu görəndə) bir dəfə lobby_state snapshot
+Consumer delta-ları qısa pəncərədə yığıb bir frame kimi göndərir (join burst coalescing).
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Any, Dict, Iterable, List
+
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from django.db import transaction
+from django.db.models import F
+
+from liveExam.models import LiveSession, LivePlayer
+
+SNAPSHOT_LIMIT = 50
+
+DELTA_TYPES = ("player_joined", "player_left", "player_updated")
+
+
+def next_lobby_seq(session_id: int, n: int = 1) -> int:
+    """
+    Sessiyanın lobby seq-ini atomik olaraq n qədər artırır (bütün process-lər üçün ortaq).
+    Son nömrəni qaytarır: ayrılmış aralıq = (son - n + 1) .. son.
+    """
+    with transaction.atomic():
+        LiveSession.objects.filter(pk=session_id).update(lobby_seq=F("lobby_seq") + n)
+        return LiveSession.objects.filter(pk=session_id).values_list("lobby_seq", flat=True).first() or 0
+
+
+def connected_count(session_id: int) -> int:
+    return LivePlayer.objects.filter(session_id=session_id, is_connected=True).count()
+
+
+def lobby_snapshot(session: LiveSession, limit: int = SNAPSHOT_LIMIT) -> Dict[str, Any]:
+    """
+    Tam vəziyyət. seq players-dan ƏVVƏL oxunur: seq <= snapshot.seq olan bütün
+    dəyişikliklər artıq siyahıda görünür, sonrakılar isə delta kimi gələcək.
+    """
+    seq = LiveSession.objects.filter(pk=session.pk).values_list("lobby_seq", flat=True).first() or 0
+    players = list(
+        session.players.filter(is_connected=True)
+        .order_by("-created_at")
+        .values("id", "nickname", "avatar_key")[:limit]
+    )
+    return {
+        "type": "lobby_state",
+        "seq": seq,
+        "count": connected_count(session.pk),
+        "players": players,
+    }
+
+
+def _send(pin: str, events: List[Dict[str, Any]]) -> None:
+    layer = get_channel_layer()
+    send = async_to_sync(layer.group_send)
+    for data in events:
+        send(f"live_{pin}_lobby", {"type": "lobby_event", "data": data})
+
+
+def _broadcast_player(session: LiveSession, player: LivePlayer, event_type: str) -> None:
+    seq = next_lobby_seq(session.pk)
+    _send(session.pin, [{
+        "type": event_type,
+        "seq": seq,
+        "count": connected_count(session.pk),
+        "player": {"id": player.id, "nickname": player.nickname, "avatar_key": player.avatar_key},
+    }])
+
+
+def broadcast_player_joined(session: LiveSession, player: LivePlayer) -> None:
+    """Yeni oyunçu və ya oflayn olub geri qayıdan (lobby siyahısına əlavə olunur)."""
+    _broadcast_player(session, player, "player_joined")
+
+
+def broadcast_player_updated(session: LiveSession, player: LivePlayer) -> None:
+    """Artıq lobby-də olan oyunçu nickname / avatar dəyişib (yeri dəyişmir)."""
+    _broadcast_player(session, player, "player_updated")
+
+
+def broadcast_presence_changes(joined: Iterable[Dict[str, Any]], left: Iterable[Dict[str, Any]]) -> None:
+    """
+    Presence sweeper-dən: yenidən qoşulan və çıxan oyunçular (sessiyaya görə qruplaşdırılır).
+    Sətirlər: {"id", "session_id", "session__pin", ...} (+ joined üçün nickname, avatar_key).
+    """
+    by_session: Dict[int, Dict[str, Any]] = defaultdict(lambda: {"pin": None, "joined": [], "left": []})
+    for row in joined:
+        item = by_session[row["session_id"]]
+        item["pin"] = row["session__pin"]
+        item["joined"].append(row)
+    for row in left:
+        item = by_session[row["session_id"]]
+        item["pin"] = row["session__pin"]
+        item["left"].append(row)
+
+    for session_id, item in by_session.items():
+        events: List[Dict[str, Any]] = []
+        for row in item["joined"]:
+            events.append({
+                "type": "player_joined",
+                "player": {"id": row["id"], "nickname": row["nickname"], "avatar_key": row["avatar_key"]},
+            })
+        for row in item["left"]:
+            events.append({"type": "player_left", "player_id": row["id"]})
+        if not events:
+            continue
+
+        last = next_lobby_seq(session_id, n=len(events))
+        count = connected_count(session_id)
+        for i, ev in enumerate(events):
+            ev["seq"] = last - len(events) + 1 + i
+            ev["count"] = count
+        _send(item["pin"], events)
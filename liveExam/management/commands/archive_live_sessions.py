@@ -0,0 +1,20 @@
+from django.core.management.base import BaseCommand
+
+from liveExam.archive import RETENTION_DAYS, archive_finished_sessions
+
+
+class Command(BaseCommand):
+    help = "Köhnə bitmiş live sessiyaları xülasəyə çevirir və raw sətirləri silir (cron ilə işlədilə bilər)."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--days", type=int, default=RETENTION_DAYS, help="Retention (gün)")
+        parser.add_argument("--batch", type=int, default=200, help="Bir dövrədə neçə sessiya")
+
+    def handle(self, *args, **options):
+        total = 0
+        while True:
+            n = archive_finished_sessions(retention_days=options["days"], limit=options["batch"])
+            total += n
+            if n < options["batch"]:
+                break
+        self.stdout.write(self.style.SUCCESS(f"Archived sessions: {total}"))
@@ -0,0 +1,30 @@
+import asyncio
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from liveExam.bench import measure_fanout
+
+
+class Command(BaseCommand):
+    help = "Channel layer group_send fan-out gecikməsini otaq ölçüsünə görə ölçür."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sizes", default="10,100,500,1000", help="Vergüllə otaq ölçüləri")
+        parser.add_argument("--rounds", type=int, default=5)
+
+    def handle(self, *args, **options):
+        sizes = [int(x) for x in options["sizes"].split(",") if x.strip()]
+        backend = settings.CHANNEL_LAYERS["default"]["BACKEND"]
+        self.stdout.write(f"Layer: {backend}")
+        self.stdout.write(f"{'size':>6} {'send ms':>9} {'p50 ms':>9} {'p99 ms':>9} {'max ms':>9}")
+
+        async def run():
+            for size in sizes:
+                row = await measure_fanout(size, options["rounds"])
+                self.stdout.write(
+                    f"{row['size']:>6} {row['group_send_ms']:>9} {row['p50_ms']:>9} "
+                    f"{row['p99_ms']:>9} {row['max_ms']:>9}"
+                )
+
+        asyncio.run(run())
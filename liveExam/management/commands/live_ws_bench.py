@@ -0,0 +1,56 @@
+import asyncio
+import json
+
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test.utils import override_settings
+
+from liveExam.bench import run_game_benchmark
+
+
+class Command(BaseCommand):
+    help = (
+        "LivePlayConsumer yük testi: N oyunçu qoşulur, cavab verir, host oyunu idarə edir. "
+        "Ayrıca test DB-də (SQLite və ya Postgres) və in-memory channel layer ilə işləyir."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--players", type=int, default=50)
+        parser.add_argument("--questions", type=int, default=3)
+        parser.add_argument("--window", type=float, default=2.0, help="Cavab pəncərəsi (saniyə)")
+        parser.add_argument("--seed", type=int, default=0)
+        parser.add_argument("--json", action="store_true", help="Nəticəni JSON kimi çap et")
+
+    def handle(self, *args, **options):
+        # real DB-yə toxunmamaq üçün test DB (manage.py test kimi)
+        old_name = connection.settings_dict["NAME"]
+        connection.creation.create_test_db(verbosity=0, autoclobber=True)
+        try:
+            with override_settings(
+                ALLOWED_HOSTS=["*"],
+                # hər cavab bütün play qrupuna answer_progress göndərir -> növbə N-ə qədər dolur
+                CHANNEL_LAYERS={"default": {
+                    "BACKEND": "channels.layers.InMemoryChannelLayer",
+                    "CONFIG": {"capacity": max(100, options["players"] * 4)},
+                }},
+            ):
+                result = asyncio.run(run_game_benchmark(
+                    players=options["players"],
+                    questions=options["questions"],
+                    window=options["window"],
+                    seed=options["seed"],
+                ))
+        finally:
+            connection.creation.destroy_test_db(old_name, verbosity=0)
+
+        if options["json"]:
+            self.stdout.write(json.dumps(result, indent=2))
+            return
+
+        self.stdout.write(f"DB: {connection.vendor}  players={result['players']}  questions={result['questions']}")
+        self.stdout.write(f"join          {result['join']}")
+        self.stdout.write(f"answer ack    {result['answer_ack']}")
+        self.stdout.write(f"queries/answer {result['queries_per_answer']}")
+        self.stdout.write(f"answers/sec   {result['answers_per_sec']}")
+        for action, row in result["host"].items():
+            self.stdout.write(f"host {action:<8} {row}")
@@ -0,0 +1,11 @@
+from django.core.management.base import BaseCommand
+
+from liveExam.pins import recycle_expired_pins
+
+
+class Command(BaseCommand):
+    help = "Müddəti keçmiş live sessiyaların PIN-lərini azad edir (cron ilə işlədilə bilər)."
+
+    def handle(self, *args, **options):
+        n = recycle_expired_pins()
+        self.stdout.write(self.style.SUCCESS(f"Recycled PINs: {n}"))
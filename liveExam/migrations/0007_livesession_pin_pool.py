@@ -0,0 +1,18 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0006_livesession_lobby_seq"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="livesession",
+            name="pin",
+            field=models.CharField(blank=True, db_index=True, max_length=16, unique=True),
+        ),
+    ]
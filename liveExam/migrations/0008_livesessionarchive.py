@@ -0,0 +1,49 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:23
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("blog", "0021_alter_exam_random_question_count"),
+        ("liveExam", "0007_livesession_pin_pool"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="LiveSessionArchive",
+            fields=[
+                ("id", models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name="ID")),
+                ("session_id", models.PositiveIntegerField(unique=True)),
+                ("pin", models.CharField(blank=True, max_length=16)),
+                ("player_count", models.PositiveIntegerField(default=0)),
+                ("answer_count", models.PositiveIntegerField(default=0)),
+                ("question_count", models.PositiveIntegerField(default=0)),
+                ("payload", models.BinaryField()),
+                ("session_created_at", models.DateTimeField()),
+                ("archived_at", models.DateTimeField(auto_now_add=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name="liveanswer",
+            index=models.Index(fields=["session", "question_id"], name="liveans_session_question_idx"),
+        ),
+        migrations.AddField(
+            model_name="livesessionarchive",
+            name="exam",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="live_archives", to="blog.exam"),
+        ),
+        migrations.AddField(
+            model_name="livesessionarchive",
+            name="host_user",
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name="live_archives", to=settings.AUTH_USER_MODEL),
+        ),
+        migrations.AddIndex(
+            model_name="livesessionarchive",
+            index=models.Index(fields=["exam", "session_created_at"], name="livearch_exam_created_idx"),
+        ),
+    ]
@@ -0,0 +1,29 @@
+# Generated by Django 5.2.8 on 2026-10-19 12:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0008_livesessionarchive"),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="liveanswer",
+            name="liveans_session_question_idx",
+        ),
+        migrations.AddIndex(
+            model_name="liveanswer",
+            index=models.Index(fields=["session", "question_id", "player"], name="liveans_session_q_player_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="liveplayer",
+            index=models.Index(
+                condition=models.Q(("is_connected", True)),
+                fields=["session"],
+                name="liveplayer_session_online_idx",
+            ),
+        ),
+    ]
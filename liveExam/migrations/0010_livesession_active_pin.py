@@ -0,0 +1,39 @@
+# Generated by Django 5.2.8 on 2026-10-19 13:51
+
+from django.db import migrations, models
+
+
+def reserve_existing_pins(apps, schema_editor):
+    # recycle olunmamış ("x<id>" olmayan) PIN-lər rezervasiyada qalır;
+    # bitmiş köhnə sessiyaları növbəti recycle created_at-a görə azad edir
+    LiveSession = apps.get_model("liveExam", "LiveSession")
+    sessions = LiveSession.objects.exclude(pin__startswith="x").exclude(pin="")
+    for session in sessions.only("id", "pin").iterator():
+        if len(session.pin) == 6 and session.pin.isdigit():
+            LiveSession.objects.filter(id=session.id).update(active_pin=session.pin)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("liveExam", "0009_hot_path_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="livesession",
+            name="active_pin",
+            field=models.CharField(blank=True, editable=False, max_length=6, null=True, unique=True),
+        ),
+        migrations.AddField(
+            model_name="livesession",
+            name="finished_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AlterField(
+            model_name="livesession",
+            name="pin",
+            field=models.CharField(blank=True, db_index=True, max_length=16),
+        ),
+        migrations.RunPython(reserve_existing_pins, migrations.RunPython.noop),
+    ]
@@ -1,15 +1,28 @@
+import json
 import random
 import string
-from django.db import models
+import zlib
+from django.db import IntegrityError, models, transaction
 from django.utils import timezone
 
 from blog.models import Exam, ExamQuestion  
+from liveExam.pins import MAX_PIN_ATTEMPTS, PinSpaceExhausted, random_pin
 
 
 def generate_pin():
+    # köhnə migration-lar üçün saxlanılır; yeni PIN-lər LiveSession.save-də ayrılır
     return "".join(random.choices(string.digits, k=6))
 
 
+class LiveSessionQuerySet(models.QuerySet):
+    def by_pin(self, pin):
+        """
+        PIN recycle-dan sonra təkrar istifadə oluna bilər: ən yeni sessiya
+        (PIN-i hazırda tutan varsa, həmişə odur).
+        """
+        return self.filter(pin=pin).order_by("-id")[:1]
+
+
 class LiveSession(models.Model):
     STATE_LOBBY = "lobby"
     STATE_QUESTION = "question"
@@ -26,7 +39,10 @@ class LiveSession(models.Model):
     exam = models.ForeignKey(Exam, on_delete=models.CASCADE, related_name="live_sessions")
     host_user = models.ForeignKey("auth.User", on_delete=models.CASCADE, related_name="hosted_live_sessions")
 
-    pin = models.CharField(max_length=6, unique=True, default=generate_pin, db_index=True)
+    # linklərdəki PIN, dəyişmir; recycle-dan sonra başqa sessiyada təkrarlana bilər
+    pin = models.CharField(max_length=16, blank=True, db_index=True)
+    # PIN-in rezervasiyası: tutulduğu müddətdə = pin, recycle olunanda NULL (bax: liveExam/pins.py)
+    active_pin = models.CharField(max_length=6, unique=True, null=True, blank=True, editable=False)
     state = models.CharField(max_length=12, choices=STATE_CHOICES, default=STATE_LOBBY)
 
     is_locked = models.BooleanField(default=False)
@@ -36,6 +52,8 @@ class LiveSession(models.Model):
     question_ends_at = models.DateTimeField(null=True, blank=True)
 
     created_at = models.DateTimeField(auto_now_add=True)
+    # PIN recycle və arxiv bu vaxta görə (köhnə sətirlərdə boşdur)
+    finished_at = models.DateTimeField(null=True, blank=True)
     
     current_index = models.PositiveIntegerField(default=0)
 
@@ -53,19 +71,35 @@ class LiveSession(models.Model):
     # ✅ Random seçilən sualların ID-ləri (order burada saxlanır)
     selected_question_ids = models.JSONField(default=list, blank=True)
 
-    def _ensure_unique_pin(self):
-        tries = 0
-        while LiveSession.objects.filter(pin=self.pin).exists():
-            self.pin = generate_pin()
-            tries += 1
-            if tries > 10:
-                raise RuntimeError("PIN generate failed")
+    # Lobby delta event-lərinin ardıcıllıq nömrəsi (player_joined / player_left)
+    lobby_seq = models.PositiveIntegerField(default=0)
+
+    objects = LiveSessionQuerySet.as_manager()
 
     def save(self, *args, **kwargs):
-        if not self.pin:
-            self.pin = generate_pin()
-        self._ensure_unique_pin()
-        super().save(*args, **kwargs)
+        # PIN yalnız yeni sessiyada ayrılır (update-lərdə toxunulmur)
+        if not self._state.adding:
+            return super().save(*args, **kwargs)
+
+        explicit = bool(self.pin)
+        for _ in range(MAX_PIN_ATTEMPTS):
+            if not explicit:
+                self.pin = random_pin()
+            self.active_pin = self.pin
+            try:
+                # savepoint: active_pin unique index-i rezervasiyadır, PIN tutulubsa yenidən cəhd
+                with transaction.atomic():
+                    return super().save(*args, **kwargs)
+            except IntegrityError:
+                # PIN toqquşması deyilsə (və ya PIN əl ilə verilibsə) -> olduğu kimi
+                if explicit or not LiveSession.objects.filter(active_pin=self.pin).exists():
+                    raise
+        raise PinSpaceExhausted("PIN allocation failed")
+
+    def mark_finished(self):
+        self.state = self.STATE_FINISHED
+        self.finished_at = timezone.now()
+        self.save(update_fields=["state", "finished_at"])
 
     def join_url_path(self):
         return f"/live/join/{self.pin}/"
@@ -102,6 +136,14 @@ class LivePlayer(models.Model):
             models.UniqueConstraint(fields=["session", "client_id"], name="uniq_player_per_session_client")
         ]
         unique_together = [("session", "client_id")]
+        indexes = [
+            # onlayn oyunçu sayı (lobby / answer progress) — partial
+            models.Index(
+                fields=["session"],
+                condition=models.Q(is_connected=True),
+                name="liveplayer_session_online_idx",
+            ),
+        ]
 
     def __str__(self):
         return f"{self.nickname} ({self.session.pin})"
@@ -127,3 +169,42 @@ class LiveAnswer(models.Model):
 
     class Meta:
         unique_together = [("session", "player", "question_id")]
+        indexes = [
+            # _get_answer_progress: distinct player sayı index-only; analytics (session + question_id) prefiksi
+            models.Index(fields=["session", "question_id", "player"], name="liveans_session_q_player_idx"),
+        ]
+
+
+class LiveSessionArchive(models.Model):
+    """
+    Bitmiş sessiyanın sıxılmış xülasəsi (final leaderboard + sual statistikası).
+    Raw LiveSession / LivePlayer / LiveAnswer sətirləri retention-dan sonra silinir,
+    bu cədvəldə isə sessiya başına 1 sətir qalır (bax: liveExam/archive.py).
+    """
+
+    session_id = models.PositiveIntegerField(unique=True)
+    exam = models.ForeignKey(Exam, on_delete=models.SET_NULL, null=True, blank=True, related_name="live_archives")
+    host_user = models.ForeignKey("auth.User", on_delete=models.SET_NULL, null=True, blank=True, related_name="live_archives")
+
+    pin = models.CharField(max_length=16, blank=True)
+    player_count = models.PositiveIntegerField(default=0)
+    answer_count = models.PositiveIntegerField(default=0)
+    question_count = models.PositiveIntegerField(default=0)
+
+    # zlib(JSON) — summary property ilə oxunur
+    payload = models.BinaryField()
+
+    session_created_at = models.DateTimeField()
+    archived_at = models.DateTimeField(auto_now_add=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["exam", "session_created_at"], name="livearch_exam_created_idx"),
+        ]
+
+    def __str__(self):
+        return f"Archive #{self.session_id} ({self.pin})"
+
+    @property
+    def summary(self) -> dict:
+        return json.loads(zlib.decompress(bytes(self.payload)).decode("utf-8"))
@@ -0,0 +1,77 @@
+# liveExam/pins.py
+
+"""
+LiveSession PIN ayırma.
+
+- 6 rəqəmli PIN yalnız aktiv (və yaxın vaxtda bitmiş) sessiyalar arasında unikal olmalıdır.
+  Bunu LiveSession.active_pin (nullable, unique) təmin edir; pin sütunu isə sessiyanın
+  linklərində (join / host / nəticə) dəyişmədən qalır.
+- Ayırma: random PIN seçilir və active_pin ilə birlikdə insert olunur. Unique index
+  atomik rezervasiyadır — PIN tutulubsa IntegrityError, save() yeni PIN ilə yenidən
+  cəhd edir. İstifadədə olan PIN-lər yaddaşa oxunmur (doluluq aşağı olduğu üçün
+  gözlənilən O(1)).
+- Recycle: finished_at-dan RECYCLE_FINISHED_HOURS keçmiş sessiyaların active_pin-i
+  NULL olur (bir toplu UPDATE), PIN yenidən ayrıla bilər. PIN təkrar istifadə
+  olunanda köhnə linklər ən yeni sessiyaya gedir (LiveSession.objects.by_pin).
+"""
+
+from __future__ import annotations
+
+import random
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+PIN_LENGTH = 6
+PIN_SPACE = 10 ** PIN_LENGTH
+# toqquşmada neçə dəfə yeni PIN seçilsin (boşluq çox dolubsa PinSpaceExhausted)
+MAX_PIN_ATTEMPTS = 32
+
+# bitmiş sessiyanın PIN-i bitmədən bu qədər saat sonra azad olur (nəticə linkləri bu müddətdə işləyir)
+RECYCLE_FINISHED_HOURS = getattr(settings, "LIVE_PIN_RECYCLE_FINISHED_HOURS", 6)
+# heç bitirilməmiş (tərk edilmiş) sessiyalar bu qədər saat sonra bağlanır
+RECYCLE_ABANDONED_HOURS = getattr(settings, "LIVE_PIN_RECYCLE_ABANDONED_HOURS", 24)
+
+_rng = random.SystemRandom()
+
+
+class PinSpaceExhausted(RuntimeError):
+    pass
+
+
+def is_live_pin(pin: str) -> bool:
+    return len(pin) == PIN_LENGTH and pin.isdigit()
+
+
+def random_pin() -> str:
+    return f"{_rng.randrange(PIN_SPACE):0{PIN_LENGTH}d}"
+
+
+def recycle_expired_pins(now=None) -> int:
+    """
+    Müddəti keçmiş sessiyaların PIN-ini azad edir (active_pin = NULL).
+    Tərk edilmiş sessiyalar eyni zamanda finished olur. Azad olunan PIN sayını qaytarır.
+    """
+    from liveExam.models import LiveSession
+
+    now = now or timezone.now()
+    finished_cutoff = now - timedelta(hours=RECYCLE_FINISHED_HOURS)
+    abandoned_cutoff = now - timedelta(hours=RECYCLE_ABANDONED_HOURS)
+    holding = LiveSession.objects.filter(active_pin__isnull=False)
+
+    abandoned = (
+        holding
+        .exclude(state=LiveSession.STATE_FINISHED)
+        .filter(created_at__lt=abandoned_cutoff)
+        .update(state=LiveSession.STATE_FINISHED, finished_at=now, active_pin=None)
+    )
+    finished = (
+        holding
+        .filter(state=LiveSession.STATE_FINISHED)
+        # finished_at-sız köhnə sətirlər üçün created_at
+        .filter(Q(finished_at__lt=finished_cutoff) | Q(finished_at__isnull=True, created_at__lt=finished_cutoff))
+        .update(active_pin=None)
+    )
+    return abandoned + finished
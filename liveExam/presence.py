@@ -0,0 +1,190 @@
+# liveExam/presence.py
+
+"""
+Player presence (onlayn / oflayn) izləmə.
+
+- Consumer-lər connect / heartbeat / disconnect zamanı bu registry-ə yazır (yaddaşda, DB-siz).
+- Sweeper (asyncio task, hər process-də bir dənə) periodik olaraq
+  LivePlayer.is_connected / last_seen sahələrini toplu UPDATE ilə yeniləyir.
+- Heartbeat-i timeout müddətində gəlməyən oyunçular oflayn sayılır
+  (socket açıq qalsa belə, məs: yarımçıq TCP bağlantısı).
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+import threading
+import time
+from collections import defaultdict
+from datetime import timedelta
+from typing import Dict, Optional, Set, Tuple
+
+from django.conf import settings
+from django.utils import timezone
+
+logger = logging.getLogger(__name__)
+
+# Client heartbeat intervalı (JS-də də eyni dəyər istifadə olunur)
+HEARTBEAT_SECONDS = getattr(settings, "LIVE_HEARTBEAT_SECONDS", 10)
+# Bu qədər heartbeat gəlməsə -> oflayn
+PRESENCE_TIMEOUT_SECONDS = getattr(settings, "LIVE_PRESENCE_TIMEOUT_SECONDS", 30)
+# Sweeper nə qədər tez-tez DB-yə yazsın
+SWEEP_INTERVAL_SECONDS = getattr(settings, "LIVE_PRESENCE_SWEEP_SECONDS", 5)
+
+
+class PresenceRegistry:
+    """
+    Sessiya (pin) üzrə: player_id -> açıq socket sayı + son heartbeat vaxtı.
+    Player eyni anda lobby və play socket-də ola bilər, ona görə sayğac saxlanır.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._sockets: Dict[str, Dict[int, int]] = defaultdict(dict)
+        self._seen: Dict[str, Dict[int, float]] = defaultdict(dict)
+        self._left: Set[int] = set()
+
+    def connect(self, pin: str, player_id: int) -> None:
+        with self._lock:
+            pid = int(player_id)
+            socks = self._sockets[pin]
+            socks[pid] = socks.get(pid, 0) + 1
+            self._seen[pin][pid] = time.monotonic()
+            self._left.discard(pid)
+
+    def heartbeat(self, pin: str, player_id: int) -> None:
+        with self._lock:
+            pid = int(player_id)
+            if pid in self._sockets.get(pin, {}):
+                self._seen[pin][pid] = time.monotonic()
+
+    def disconnect(self, pin: str, player_id: int) -> None:
+        with self._lock:
+            pid = int(player_id)
+            socks = self._sockets.get(pin, {})
+            left = socks.get(pid, 0) - 1
+            if left > 0:
+                socks[pid] = left
+                return
+            socks.pop(pid, None)
+            self._seen.get(pin, {}).pop(pid, None)
+            self._left.add(pid)
+            if not socks:
+                self._sockets.pop(pin, None)
+                self._seen.pop(pin, None)
+
+    def connected_count(self, pin: str) -> int:
+        """Bu process-də həmin sessiyaya bağlı player sayı."""
+        with self._lock:
+            return len(self._sockets.get(pin, {}))
+
+    def drain(self, timeout: float = PRESENCE_TIMEOUT_SECONDS) -> Tuple[Set[int], Set[int]]:
+        """
+        Sweeper üçün: (alive_ids, left_ids).
+        alive = socket-i açıq və heartbeat-i timeout daxilində olanlar.
+        left  = son sweep-dən bəri bütün socket-lərini bağlayanlar.
+        """
+        now = time.monotonic()
+        with self._lock:
+            alive: Set[int] = set()
+            for seen in self._seen.values():
+                for pid, ts in seen.items():
+                    if now - ts <= timeout:
+                        alive.add(pid)
+            left = self._left - alive
+            self._left = set()
+        return alive, left
+
+
+registry = PresenceRegistry()
+
+
+def flush_presence(now=None) -> Dict[str, int]:
+    """
+    Registry-ni DB-yə yazır (3 toplu UPDATE):
+    1) bu process-də canlı olanlar -> is_connected=True, last_seen=now
+    2) çıxanlar -> is_connected=False
+    3) last_seen timeout-dan köhnədirsə (başqa process / crash) -> is_connected=False
+    """
+    from liveExam.lobby import broadcast_presence_changes
+    from liveExam.models import LivePlayer, LiveSession
+
+    now = now or timezone.now()
+    alive, left = registry.drain()
+
+    # lobby-yə delta göndərmək üçün yalnız vəziyyəti DƏYİŞƏN oyunçuları oxuyuruq
+    rejoined: list = []
+    updated_alive = 0
+    if alive:
+        rejoined = list(
+            LivePlayer.objects
+            .filter(id__in=alive, is_connected=False)
+            .values("id", "session_id", "session__pin", "nickname", "avatar_key")
+        )
+        updated_alive = LivePlayer.objects.filter(id__in=alive).update(is_connected=True, last_seen=now)
+
+    gone: list = []
+    if left:
+        gone = list(
+            LivePlayer.objects
+            .filter(id__in=left, is_connected=True)
+            .values("id", "session_id", "session__pin")
+        )
+        if gone:
+            LivePlayer.objects.filter(id__in=[g["id"] for g in gone]).update(is_connected=False, last_seen=now)
+
+    cutoff = now - timedelta(seconds=PRESENCE_TIMEOUT_SECONDS)
+    stale = list(
+        LivePlayer.objects
+        .filter(is_connected=True, last_seen__lt=cutoff)
+        .exclude(session__state=LiveSession.STATE_FINISHED)
+        .values("id", "session_id", "session__pin")
+    )
+    if stale:
+        LivePlayer.objects.filter(id__in=[g["id"] for g in stale]).update(is_connected=False)
+
+    if rejoined or gone or stale:
+        broadcast_presence_changes(joined=rejoined, left=gone + stale)
+
+    return {"alive": updated_alive, "left": len(gone), "stale": len(stale)}
+
+
+# -------------------------
+# Sweeper task (process başına bir dənə)
+# -------------------------
+
+_sweeper_task: Optional[asyncio.Task] = None
+
+
+# PIN recycle də eyni loop-da, amma seyrək işləyir (bax: liveExam/pins.py)
+PIN_RECYCLE_INTERVAL_SECONDS = getattr(settings, "LIVE_PIN_RECYCLE_INTERVAL_SECONDS", 60 * 10)
+
+
+async def _sweeper_loop() -> None:
+    from channels.db import database_sync_to_async
+    from liveExam.pins import recycle_expired_pins
+
+    last_recycle = 0.0
+    while True:
+        await asyncio.sleep(SWEEP_INTERVAL_SECONDS)
+        try:
+            await database_sync_to_async(flush_presence)()
+            if time.monotonic() - last_recycle >= PIN_RECYCLE_INTERVAL_SECONDS:
+                last_recycle = time.monotonic()
+                await database_sync_to_async(recycle_expired_pins)()
+        except Exception:
+            # sweeper ölməməlidir; növbəti dövrədə yenidən cəhd edəcək
+            logger.exception("presence sweep failed")
+
+
+def ensure_sweeper() -> None:
+    """
+    Consumer connect-də çağırılır: bu event loop-da sweeper yoxdursa başladır.
+    """
+    global _sweeper_task
+    loop = asyncio.get_running_loop()
+    task = _sweeper_task
+    if task is not None and not task.done() and task.get_loop() is loop:
+        return
+    _sweeper_task = loop.create_task(_sweeper_loop())
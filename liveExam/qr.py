@@ -0,0 +1,105 @@
+# liveExam/qr.py
+
+"""
+Join URL üçün QR şəkli (PNG / SVG) — keşlənmiş.
+
+QR məzmunu yalnız join URL-dən asılıdır, ona görə baytlar URL-in hash-i ilə
+Django cache-də saxlanır. Host ekranı / proyektor təkrar soruşanda
+qrcode.make + PNG encode yenidən işləmir. ETag da eyni hash-dən çıxır.
+
+Session yaradılanda şəkillər commit-dən sonra ayrıca thread-də əvvəlcədən
+hazırlanır (LIVE_QR_PRERENDER) — host-un kliki render-i gözləmir.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import io
+import logging
+import threading
+from typing import Tuple
+
+import qrcode
+import qrcode.image.svg
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.utils.cache import parse_etags
+
+from blogApp.metrics import record_cache
+
+logger = logging.getLogger(__name__)
+
+QR_CACHE_SECONDS = getattr(settings, "LIVE_QR_CACHE_SECONDS", 60 * 60 * 24)
+
+CONTENT_TYPES = {
+    "png": "image/png",
+    "svg": "image/svg+xml",
+}
+
+
+def _url_hash(join_url: str) -> str:
+    return hashlib.sha1(join_url.encode("utf-8")).hexdigest()
+
+
+def qr_etag(join_url: str, fmt: str) -> str:
+    return f'"qr-{fmt}-{_url_hash(join_url)[:20]}"'
+
+
+def etag_matches(etag: str, if_none_match: str) -> bool:
+    """If-None-Match müqayisəsi: "*" və ya siyahıdakı tag (zəif müqayisə, W/ nəzərə alınmır)."""
+    if not if_none_match:
+        return False
+    etags = parse_etags(if_none_match)
+    if "*" in etags:
+        return True
+    return any(tag.removeprefix("W/") == etag for tag in etags)
+
+
+def _render(join_url: str, fmt: str) -> bytes:
+    buf = io.BytesIO()
+    if fmt == "svg":
+        img = qrcode.make(join_url, image_factory=qrcode.image.svg.SvgPathImage)
+        img.save(buf)
+    else:
+        img = qrcode.make(join_url)
+        img.save(buf, format="PNG")
+    return buf.getvalue()
+
+
+def get_qr(join_url: str, fmt: str = "png") -> Tuple[bytes, str]:
+    """
+    (baytlar, etag). Cache-də yoxdursa render edib yazır.
+    """
+    if fmt not in CONTENT_TYPES:
+        raise ValueError(f"Unsupported QR format: {fmt}")
+
+    key = f"live:qr:{fmt}:{_url_hash(join_url)}"
+    data = cache.get(key)
+    record_cache(data is not None)
+    if data is None:
+        data = _render(join_url, fmt)
+        cache.set(key, data, QR_CACHE_SECONDS)
+    return data, qr_etag(join_url, fmt)
+
+
+def prerender_qr(join_url: str) -> None:
+    """Host lobby açılana qədər şəkillər cache-də hazır olur."""
+    for fmt in CONTENT_TYPES:
+        get_qr(join_url, fmt)
+
+
+def prerender_enabled() -> bool:
+    return getattr(settings, "LIVE_QR_PRERENDER", True)
+
+
+def schedule_prerender(join_url: str) -> None:
+    """Commit-dən sonra ayrıca thread-də (request render-i gözləmir)."""
+
+    def run():
+        try:
+            prerender_qr(join_url)
+        except Exception:
+            logger.exception("QR prerender failed for %s", join_url)
+
+    transaction.on_commit(lambda: threading.Thread(target=run, daemon=True).start())
@@ -196,30 +196,68 @@ const AVATARS = {
   lobbyWs.onclose = () => log("Lobby WS closed", "debug");
   lobbyWs.onerror = () => log("Lobby WS error", "error", { force: true });
   
+  // Lobby vəziyyəti: snapshot + seq nömrəli delta-lar
+  const lobby = { players: new Map(), seq: 0, count: 0 };
+
+  function renderLobbyPlayers() {
+    if (els.playersCount) els.playersCount.textContent = lobby.count || 0;
+
+    if (els.playersList) {
+      els.playersList.innerHTML = "";
+      lobby.players.forEach(p => {
+        const div = document.createElement("div");
+        div.className = "player-chip";
+
+        const emoji = AVATARS[p.avatar_key] || "👤";
+
+        div.innerHTML = `
+          <span class="player-avatar">${emoji}</span>
+          <div class="player-name">${p.nickname}</div>
+        `;
+        els.playersList.appendChild(div);
+      });
+    }
+  }
+
+  function applyLobbyDeltas(events) {
+    for (const ev of events) {
+      if (ev.seq <= lobby.seq) continue;
+      if (ev.seq > lobby.seq + 1) {
+        log(`Lobby seq gap: ${lobby.seq} -> ${ev.seq}, snapshot istənilir`, "debug");
+        lobbyWs.send(JSON.stringify({ type: "snapshot" }));
+        break;
+      }
+      lobby.seq = ev.seq;
+      if (ev.type === "player_joined" && ev.player) {
+        lobby.players.delete(ev.player.id);
+        lobby.players = new Map([[ev.player.id, ev.player], ...lobby.players]);
+      } else if (ev.type === "player_updated" && ev.player) {
+        // yerində yenilə (sıra dəyişmir)
+        if (lobby.players.has(ev.player.id)) lobby.players.set(ev.player.id, ev.player);
+      } else if (ev.type === "player_left") {
+        lobby.players.delete(ev.player_id);
+      }
+      if (ev.count != null) lobby.count = ev.count;
+    }
+    renderLobbyPlayers();
+  }
+
   lobbyWs.onmessage = (e) => {
     const data = JSON.parse(e.data);
     log(`Lobby msg: ${data.type}`, "debug");
   
     if (data.type === "lobby_state") {
-        if (els.playersCount) els.playersCount.textContent = data.count || 0;
-      
-        if (els.playersList) {
-          els.playersList.innerHTML = "";
-          (data.players || []).forEach(p => {
-            const div = document.createElement("div");
-            div.className = "player-chip";
-      
-            const emoji = AVATARS[p.avatar_key] || "👤";
-      
-            div.innerHTML = `
-              <span class="player-avatar">${emoji}</span>
-              <div class="player-name">${p.nickname}</div>
-            `;
-            els.playersList.appendChild(div);
-          });
-        }
-      }
-      
+      lobby.players = new Map((data.players || []).map(p => [p.id, p]));
+      lobby.seq = data.seq || 0;
+      lobby.count = data.count || 0;
+      renderLobbyPlayers();
+    }
+    else if (data.type === "lobby_batch") {
+      applyLobbyDeltas(data.events || []);
+    }
+    else if (data.type === "player_joined" || data.type === "player_left" || data.type === "player_updated") {
+      applyLobbyDeltas([data]);
+    }
   
     // istəsən: game_started redirect kimi mesajları da burada log edə bilərsən
   };
@@ -273,9 +311,16 @@ const AVATARS = {
       log("Oyun bitdi", "info", { force: true });
     }
   
-    // əlavə debug event: answer_progress (istəsən burada izləyərsən)
+    // answer_progress: total_players yalnız onlayn oyunçulardır
     else if (msg.type === "answer_progress") {
       log(`Progress: ${msg.answered_count}/${msg.total_players}`, "debug");
+
+      // Auto Reveal (hamı cavab veribsə vaxtın bitməsini gözləmə)
+      if (els.autoMode?.checked && state === "question" && msg.total_players > 0 && msg.answered_count >= msg.total_players) {
+        if (autoRevealTimer) clearTimeout(autoRevealTimer);
+        autoRevealTimer = null;
+        els.revealBtn?.click();
+      }
     }
   };
   
@@ -262,6 +262,22 @@ function renderReveal(msg){
     metaLine.textContent = "Növbəti sual hazırlanır...";
 }
 
+// Reveal-dən sonra server hər oyunçuya öz nəticəsini göndərir (rank / delta / streak)
+function renderMyResult(msg){
+    const parts = [];
+    if (msg.rank) {
+        let delta = "";
+        if (msg.rank_delta > 0) delta = ` ▲${msg.rank_delta}`;
+        else if (msg.rank_delta < 0) delta = ` ▼${Math.abs(msg.rank_delta)}`;
+        parts.push(`🏅 Yer: ${msg.rank} / ${msg.total_players}${delta}`);
+    }
+    if (msg.answered) parts.push(`+${msg.awarded_points}`);
+    parts.push(`Bal: ${msg.score}`);
+    if (msg.streak > 1) parts.push(`🔥 ${msg.streak}`);
+
+    metaLine.textContent = parts.join(" · ");
+}
+
 function renderFinished(msg){
     clearTimer();
     stopAnswerUI();
@@ -303,6 +319,14 @@ playWs.onopen = async () => {
 playWs.onclose = () => setConn(false);
 playWs.onerror = () => setConn(false);
 
+// Presence heartbeat (server 30 saniyə heartbeat almasa oflayn sayır)
+const HEARTBEAT_MS = 10000;
+setInterval(() => {
+    if (playWs.readyState === WebSocket.OPEN) {
+        try { playWs.send(JSON.stringify({ type: "heartbeat" })); } catch(e) {}
+    }
+}, HEARTBEAT_MS);
+
 playWs.onmessage = (e) => {
     const msg = JSON.parse(e.data);
 
@@ -321,6 +345,11 @@ playWs.onmessage = (e) => {
         return;
     }
 
+    if (msg.type === "my_result") {
+        renderMyResult(msg);
+        return;
+    }
+
     if (msg.type === "finished") {
         renderFinished(msg);
         return;
@@ -22,13 +22,15 @@ const myEmoji = AVATARS[myKey] || '👤';
 if(els.myAvatar) els.myAvatar.textContent = myEmoji;
 
 // 2. Oyunçuları Render Et
-function renderPlayers(players) {
-    const arr = Array.isArray(players) ? players : [];
-    if(els.count) els.count.textContent = arr.length;
+// Lobby vəziyyəti: id -> player (server snapshot + player_joined/player_left delta-ları)
+const lobby = { players: new Map(), seq: 0, count: 0 };
+
+function renderPlayers() {
+    if(els.count) els.count.textContent = lobby.count;
 
     if(els.list) {
         els.list.innerHTML = "";
-        arr.forEach(p => {
+        lobby.players.forEach(p => {
             // Özümüzü siyahıda göstərmirik (artıq yuxarıda böyük şəkildə var)
             if (p.nickname === CONFIG.myNickname) return; 
 
@@ -41,10 +43,47 @@ function renderPlayers(players) {
     }
 }
 
+function applySnapshot(msg) {
+    lobby.players = new Map((msg.players || []).map(p => [p.id, p]));
+    lobby.seq = msg.seq || 0;
+    lobby.count = msg.count != null ? msg.count : lobby.players.size;
+    renderPlayers();
+}
+
+// true qaytarırsa -> seq boşluğu var, snapshot lazımdır
+function applyDelta(ev) {
+    if (ev.seq <= lobby.seq) return false;          // köhnə / təkrar
+    if (ev.seq > lobby.seq + 1) return true;        // nəsə itib
+    lobby.seq = ev.seq;
+    if (ev.type === "player_joined" && ev.player) {
+        lobby.players.delete(ev.player.id);
+        // yeni gələn yuxarıda
+        lobby.players = new Map([[ev.player.id, ev.player], ...lobby.players]);
+    } else if (ev.type === "player_updated" && ev.player) {
+        // yerində yenilə (sıra dəyişmir)
+        if (lobby.players.has(ev.player.id)) lobby.players.set(ev.player.id, ev.player);
+    } else if (ev.type === "player_left") {
+        lobby.players.delete(ev.player_id);
+    }
+    if (ev.count != null) lobby.count = ev.count;
+    return false;
+}
+
+function applyDeltas(events) {
+    let gap = false;
+    for (const ev of events) {
+        if (applyDelta(ev)) { gap = true; break; }
+    }
+    renderPlayers();
+    if (gap && socket && socket.readyState === WebSocket.OPEN) {
+        socket.send(JSON.stringify({ type: "snapshot" }));
+    }
+}
+
 // İlkin yükləmə
 try {
     const initial = JSON.parse(document.getElementById("initialPlayers").textContent || "[]");
-    renderPlayers(initial);
+    applySnapshot({ players: initial, seq: 0, count: initial.length });
 } catch (e) {
     console.error("Initial parsing error", e);
 }
@@ -58,6 +97,14 @@ function wsUrl() {
 let socket = null;
 let reconnectTimer = null;
 
+// Presence heartbeat (server 30 saniyə heartbeat almasa oflayn sayır)
+const HEARTBEAT_MS = 10000;
+setInterval(() => {
+    if (socket && socket.readyState === WebSocket.OPEN) {
+        try { socket.send(JSON.stringify({ type: "heartbeat" })); } catch (_) {}
+    }
+}, HEARTBEAT_MS);
+
 function connectWs() {
     if (reconnectTimer) clearTimeout(reconnectTimer);
 
@@ -83,9 +130,13 @@ function connectWs() {
                 return;
             }
 
-            // LOBBY UPDATE -> Siyahını yenilə
+            // LOBBY UPDATE -> snapshot və ya delta
             if (payload.type === "lobby_state" && Array.isArray(payload.players)) {
-                renderPlayers(payload.players);
+                applySnapshot(payload);
+            } else if (payload.type === "lobby_batch") {
+                applyDeltas(payload.events || []);
+            } else if (payload.type === "player_joined" || payload.type === "player_left" || payload.type === "player_updated") {
+                applyDeltas([payload]);
             }
         } catch (_) {}
     };
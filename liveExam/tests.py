@@ -1,3 +1,549 @@
-from django.test import TestCase
+import asyncio
+from datetime import timedelta
+from unittest import mock
 
-# Create your tests here.
+import qrcode
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.contrib.auth.models import Group, User
+from django.core.cache import cache
+from django.db import IntegrityError, transaction
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from blog.models import Exam, ExamQuestion
+from liveExam import archive, bench, leaderboard, lobby, pins, presence, qr
+from liveExam.consumers import LiveLobbyConsumer
+from liveExam.leaderboard import MemoryLeaderboard, RedisLeaderboard, ResilientLeaderboard
+from liveExam.models import LiveAnswer, LivePlayer, LiveSession, LiveSessionArchive
+from liveExam.presence import PresenceRegistry
+from liveExam.views import _apply_streaks, _build_personal_results
+
+
+class LiveTestMixin:
+    """Sessiya + oyunçular üçün kiçik fixture-lar."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.host = User.objects.create_user("host")
+        cls.exam = Exam.objects.create(author=cls.host, title="Live", slug="live-exam", exam_type="test")
+
+    def make_session(self, **kwargs):
+        return LiveSession.objects.create(exam=self.exam, host_user=self.host, **kwargs)
+
+    def make_player(self, session, nickname, score=0, **kwargs):
+        return LivePlayer.objects.create(
+            session=session, nickname=nickname, client_id=f"c-{nickname}", score=score, **kwargs
+        )
+
+
+class _BrokenRedis:
+    """Hər əmrdə bağlantı xətası verən client (Redis oyun ortasında düşüb)."""
+
+    def __getattr__(self, name):
+        def fail(*args, **kwargs):
+            raise leaderboard.redis.ConnectionError("redis down")
+        return fail
+
+
+class MemoryLeaderboardTests(TestCase):
+
+    def setUp(self):
+        self.board = MemoryLeaderboard(1)
+        self.board.load([
+            {"id": 1, "nickname": "a", "score": 10},
+            {"id": 2, "nickname": "b", "score": 30},
+            {"id": 3, "nickname": "c", "score": 10},
+        ])
+
+    def test_ranking_and_ties(self):
+        # eyni balda əvvəl qoşulan (kiçik id) yuxarıda
+        self.assertEqual([r["player_id"] for r in self.board.top(3)], [2, 1, 3])
+        self.assertEqual(self.board.rank(3), 3)
+        self.assertIsNone(self.board.rank(99))
+
+        self.board.set_score(3, 50)
+        self.assertEqual(self.board.rank(3), 1)
+        self.assertEqual(self.board.entries([1, 99]), {1: {
+            "player_id": 1, "nickname": "a", "avatar_key": "avatar_1", "score": 10, "rank": 3,
+        }})
+
+        self.board.add_player(4, "d", "avatar_2")
+        self.board.add_player(4, "d", "avatar_2", score=100)  # təkrar join balı dəyişmir
+        self.assertEqual(self.board.rank(4), 4)
+
+    def test_commit_ranks_delta(self):
+        first = self.board.commit_ranks()
+        self.assertEqual(first[1]["delta"], 0)
+        self.board.set_score(3, 100)
+        changes = self.board.commit_ranks()
+        self.assertEqual((changes[3]["prev_rank"], changes[3]["rank"], changes[3]["delta"]), (3, 1, 2))
+        self.assertEqual(changes[2]["delta"], -1)
+
+
+class LeaderboardFallbackTests(LiveTestMixin, TestCase):
+
+    def setUp(self):
+        self.addCleanup(MemoryLeaderboard._boards.clear)
+        for name, value in (("_redis_client", None), ("_redis_checked_at", None), ("_redis_down", False)):
+            patcher = mock.patch.object(leaderboard, name, value)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    @override_settings(LIVE_LEADERBOARD_REDIS_URL="")
+    def test_without_redis_rebuilds_from_db(self):
+        session = self.make_session()
+        self.make_player(session, "a", score=5)
+        self.make_player(session, "b", score=9)
+
+        board = leaderboard.get_leaderboard(session)
+        self.assertIsInstance(board, MemoryLeaderboard)
+        self.assertEqual([r["nickname"] for r in board.top()], ["b", "a"])
+
+    def test_redis_error_mid_game_falls_back(self):
+        session = self.make_session()
+        a = self.make_player(session, "a", score=5)
+        self.make_player(session, "b", score=9)
+        board = ResilientLeaderboard(RedisLeaderboard(_BrokenRedis(), session.id), session)
+
+        with self.assertLogs("liveExam.leaderboard", "WARNING"):
+            board.set_score(a.id, 20)
+        self.assertEqual(board.rank(a.id), 1)
+        self.assertEqual([r["nickname"] for r in board.top()], ["a", "b"])
+
+        # Redis bir müddət yoxlanılmır -> birbaşa memory board
+        self.assertIsNone(leaderboard._get_redis_client())
+        self.assertIsInstance(leaderboard.get_leaderboard(session), MemoryLeaderboard)
+
+
+class RevealPersonalResultTests(LiveTestMixin, TestCase):
+
+    def test_streaks_and_personal_results(self):
+        session = self.make_session()
+        a = self.make_player(session, "a", score=300, streak=2)
+        b = self.make_player(session, "b", score=100, streak=4)
+        c = self.make_player(session, "c", score=200)
+        answers = [
+            {"player_id": a.id, "is_correct": True, "awarded_points": 300},
+            {"player_id": b.id, "is_correct": False, "awarded_points": 0},
+        ]
+
+        streaks = _apply_streaks(session, answers)
+        self.assertEqual(streaks, {a.id: 3, b.id: 0, c.id: 0})
+        self.assertEqual(
+            dict(session.players.values_list("id", "streak")), {a.id: 3, b.id: 0, c.id: 0},
+        )
+
+        board = MemoryLeaderboard(session.id)
+        board.load(session.players.values("id", "nickname", "avatar_key", "score"))
+        board.commit_ranks()
+        board.set_score(b.id, 400)
+        results = _build_personal_results(7, answers, board.commit_ranks(), streaks)
+
+        self.assertEqual(results[a.id]["awarded_points"], 300)
+        self.assertEqual((results[a.id]["rank"], results[a.id]["rank_delta"]), (2, -1))
+        self.assertEqual((results[b.id]["rank"], results[b.id]["rank_delta"], results[b.id]["score"]), (1, 2, 400))
+        self.assertFalse(results[c.id]["answered"])
+        self.assertEqual(results[c.id]["total_players"], 3)
+
+
+class PresenceTests(LiveTestMixin, TestCase):
+
+    def test_registry_counts_sockets_and_timeout(self):
+        reg = PresenceRegistry()
+        reg.connect("111111", 1)
+        reg.connect("111111", 1)  # lobby + play socket
+        reg.connect("111111", 2)
+        reg.disconnect("111111", 1)
+        self.assertEqual(reg.connected_count("111111"), 2)
+
+        reg.disconnect("111111", 2)
+        alive, left = reg.drain()
+        self.assertEqual((alive, left), ({1}, {2}))
+        # left yalnız bir dəfə qaytarılır
+        self.assertEqual(reg.drain(), ({1}, set()))
+        # heartbeat gəlməyən oyunçu canlı sayılmır
+        self.assertEqual(reg.drain(timeout=-1), (set(), set()))
+
+    def test_flush_updates_players_and_broadcasts_changes(self):
+        session = self.make_session()
+        back = self.make_player(session, "back", is_connected=False)
+        gone = self.make_player(session, "gone")
+        stale = self.make_player(session, "stale")
+        LivePlayer.objects.filter(id=stale.id).update(last_seen=timezone.now() - timedelta(minutes=5))
+
+        reg = PresenceRegistry()
+        reg.connect(session.pin, back.id)
+        reg.connect(session.pin, gone.id)
+        reg.disconnect(session.pin, gone.id)
+
+        with mock.patch.object(presence, "registry", reg), \
+                mock.patch("liveExam.lobby.broadcast_presence_changes") as broadcast:
+            stats = presence.flush_presence()
+
+        self.assertEqual(stats, {"alive": 1, "left": 1, "stale": 1})
+        self.assertEqual(
+            dict(session.players.values_list("nickname", "is_connected")),
+            {"back": True, "gone": False, "stale": False},
+        )
+        kwargs = broadcast.call_args.kwargs
+        self.assertEqual([p["id"] for p in kwargs["joined"]], [back.id])
+        self.assertEqual({p["id"] for p in kwargs["left"]}, {gone.id, stale.id})
+
+    def test_sweeper_logs_failures_and_keeps_running(self):
+        calls = []
+
+        def broken_flush():
+            calls.append(1)
+            raise RuntimeError("db down")
+
+        async def run_briefly():
+            task = asyncio.ensure_future(presence._sweeper_loop())
+            while len(calls) < 2:
+                await asyncio.sleep(0.01)
+            task.cancel()
+
+        with mock.patch.object(presence, "SWEEP_INTERVAL_SECONDS", 0), \
+                mock.patch.object(presence, "flush_presence", broken_flush), \
+                self.assertLogs("liveExam.presence", "ERROR") as logs:
+            asyncio.run(asyncio.wait_for(run_briefly(), 5))
+        self.assertIn("presence sweep failed", logs.output[0])
+
+
+@override_settings(LIVE_LEADERBOARD_REDIS_URL="")
+class LobbyDeltaTests(LiveTestMixin, TestCase):
+
+    def setUp(self):
+        self.addCleanup(MemoryLeaderboard._boards.clear)
+
+    def test_seq_is_shared_and_contiguous(self):
+        session = self.make_session()
+        other = self.make_session()
+        self.assertEqual(lobby.next_lobby_seq(session.id), 1)
+        self.assertEqual(lobby.next_lobby_seq(session.id, n=3), 4)
+
+        rows = [{"id": i, "session_id": session.id, "session__pin": session.pin} for i in (7, 8)]
+        joined = [{"id": 9, "session_id": other.id, "session__pin": other.pin, "nickname": "n", "avatar_key": "a"}]
+        with mock.patch.object(lobby, "_send") as send:
+            lobby.broadcast_presence_changes(joined=joined, left=rows)
+
+        sent = {call.args[0]: call.args[1] for call in send.call_args_list}
+        self.assertEqual([(e["type"], e["seq"]) for e in sent[session.pin]], [("player_left", 5), ("player_left", 6)])
+        self.assertEqual([(e["type"], e["seq"]) for e in sent[other.pin]], [("player_joined", 1)])
+        self.assertEqual(lobby.lobby_snapshot(session)["seq"], 6)
+
+    def test_rejoin_does_not_repeat_joined_delta(self):
+        session = self.make_session()
+        url = reverse("liveExam:join_enter", args=[session.pin])
+        self.client.cookies["live_client_id"] = "client-1"
+
+        def join(nickname="Ali", avatar="avatar_1"):
+            with mock.patch("liveExam.views.broadcast_player_joined") as joined, \
+                    mock.patch("liveExam.views.broadcast_player_updated") as updated:
+                response = self.client.post(url, {"nickname": nickname, "avatar_key": avatar})
+            self.assertEqual(response.status_code, 200)
+            return joined.call_count, updated.call_count
+
+        self.assertEqual(join(), (1, 0))
+        # reload / reconnect: lobby-də heç nə dəyişmir
+        self.assertEqual(join(), (0, 0))
+        self.assertEqual(join(nickname="Veli"), (0, 1))
+        # oflayn olub geri qayıdan yenidən siyahıya düşür
+        session.players.update(is_connected=False)
+        self.assertEqual(join(nickname="Veli"), (1, 0))
+        self.assertEqual(session.players.count(), 1)
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class LobbyConsumerTests(LiveTestMixin, TransactionTestCase):
+
+    def setUp(self):
+        self.host = User.objects.create_user("host")
+        self.exam = Exam.objects.create(author=self.host, title="Live", slug="live-exam", exam_type="test")
+
+    def test_snapshot_then_coalesced_deltas_and_resync(self):
+        session = self.make_session()
+        self.make_player(session, "a")
+
+        async def scenario():
+            communicator = WebsocketCommunicator(LiveLobbyConsumer.as_asgi(), f"/ws/live/{session.pin}/lobby/")
+            communicator.scope["url_route"] = {"kwargs": {"pin": session.pin}}
+            connected, _ = await communicator.connect()
+            self.assertTrue(connected)
+
+            state = await communicator.receive_json_from()
+            self.assertEqual((state["type"], state["seq"], state["count"]), ("lobby_state", 0, 1))
+
+            layer = get_channel_layer()
+            for seq in (1, 2, 3):
+                await layer.group_send(f"live_{session.pin}_lobby", {
+                    "type": "lobby_event",
+                    "data": {"type": "player_left", "seq": seq, "player_id": seq},
+                })
+            # join burst bir frame kimi gəlir
+            batch = await communicator.receive_json_from(timeout=2)
+            self.assertEqual(batch["type"], "lobby_batch")
+            self.assertEqual([e["seq"] for e in batch["events"]], [1, 2, 3])
+
+            # client seq boşluğu gördü -> snapshot
+            await communicator.send_json_to({"type": "snapshot"})
+            self.assertEqual((await communicator.receive_json_from())["type"], "lobby_state")
+            await communicator.disconnect()
+
+        with mock.patch("liveExam.consumers.ensure_sweeper"):
+            async_to_sync(scenario)()
+
+
+@override_settings(LAN_HOST="")
+class QrTests(LiveTestMixin, TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.session = self.make_session()
+        self.join_url = f"http://testserver{self.session.join_url_path()}"
+
+    def test_rendered_once_then_cached(self):
+        with mock.patch("liveExam.qr.qrcode.make", wraps=qrcode.make) as make:
+            first, etag = qr.get_qr(self.join_url, "png")
+            second, _ = qr.get_qr(self.join_url, "png")
+        self.assertEqual(make.call_count, 1)
+        self.assertEqual(first, second)
+        self.assertTrue(first.startswith(b"\x89PNG"))
+        self.assertNotEqual(etag, qr.qr_etag(self.join_url, "svg"))
+
+    def test_svg_response_and_conditional_get(self):
+        url = reverse("liveExam:qr_svg", kwargs={"pin": self.session.pin})
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/svg+xml")
+        self.assertIn(b"<svg", response.content)
+        etag = response["ETag"]
+        self.assertEqual(etag, qr.qr_etag(self.join_url, "svg"))
+        for part in ("public", "max-age=86400", "immutable"):
+            self.assertIn(part, response["Cache-Control"])
+
+        for header in (etag, f'"other", W/{etag}', "*"):
+            with self.subTest(header):
+                response = self.client.get(url, HTTP_IF_NONE_MATCH=header)
+                self.assertEqual(response.status_code, 304)
+                self.assertEqual(response["ETag"], etag)
+        # tag-in bir hissəsi və ya başqa tag uyğun gəlmir
+        for header in (f'"x{etag.strip(chr(34))}"', f"{etag[:-2]}\"", '"other"'):
+            with self.subTest(header):
+                self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=header).status_code, 200)
+
+    def test_create_session_prerenders_after_commit(self):
+        self.host.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        self.client.force_login(self.host)
+        url = reverse("liveExam:create_session_slug", kwargs={"slug": self.exam.slug})
+        with mock.patch("liveExam.qr.prerender_qr") as prerender, \
+                mock.patch("liveExam.qr.threading.Thread", side_effect=_InlineThread):
+            with self.captureOnCommitCallbacks() as callbacks:
+                response = self.client.get(url)
+            # request özü render etmir
+            prerender.assert_not_called()
+            for callback in callbacks:
+                callback()
+
+        session = LiveSession.objects.latest("id")
+        self.assertRedirects(response, reverse("liveExam:host_lobby", kwargs={"pin": session.pin}), fetch_redirect_response=False)
+        prerender.assert_called_once_with(f"http://testserver{session.join_url_path()}")
+
+        with override_settings(LIVE_QR_PRERENDER=False), self.captureOnCommitCallbacks() as callbacks:
+            self.client.get(url)
+        self.assertEqual(callbacks, [])
+
+
+class _InlineThread:
+    """threading.Thread əvəzi: start() hədəfi dərhal işlədir."""
+
+    def __init__(self, target, daemon=None):
+        self.target = target
+
+    def start(self):
+        self.target()
+
+
+class PinAllocationTests(LiveTestMixin, TestCase):
+
+    def test_allocation_reserves_pin(self):
+        session = self.make_session()
+        self.assertTrue(pins.is_live_pin(session.pin))
+        self.assertEqual(session.active_pin, session.pin)
+        # əl ilə verilmiş, hazırda tutulmuş PIN qəbul olunmur
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            self.make_session(pin=session.pin)
+
+    def test_collision_retries_with_new_pin(self):
+        first = self.make_session()
+        with mock.patch("liveExam.models.random_pin", side_effect=[first.pin, "654321"]) as draw:
+            second = self.make_session()
+        self.assertEqual((second.pin, second.active_pin), ("654321", "654321"))
+        self.assertEqual(draw.call_count, 2)
+
+        with mock.patch("liveExam.models.random_pin", return_value=first.pin), \
+                self.assertRaises(pins.PinSpaceExhausted):
+            self.make_session()
+
+    def test_recycle_by_finish_time_keeps_pin(self):
+        now = timezone.now()
+        long_game = self.make_session(state=LiveSession.STATE_FINISHED)
+        finished_old = self.make_session(state=LiveSession.STATE_FINISHED)
+        legacy = self.make_session(state=LiveSession.STATE_FINISHED)
+        abandoned = self.make_session()
+        active = self.make_session()
+        old = now - timedelta(hours=pins.RECYCLE_ABANDONED_HOURS + 1)
+        LiveSession.objects.filter(id__in=[long_game.id, finished_old.id, legacy.id, abandoned.id]).update(created_at=old)
+        # uzun oyun: çoxdan başlayıb, amma indicə bitib
+        LiveSession.objects.filter(id=long_game.id).update(finished_at=now - timedelta(minutes=5))
+        LiveSession.objects.filter(id=finished_old.id).update(
+            finished_at=now - timedelta(hours=pins.RECYCLE_FINISHED_HOURS + 1)
+        )
+
+        self.assertEqual(pins.recycle_expired_pins(now), 3)
+        rows = {s.id: s for s in LiveSession.objects.all()}
+        self.assertEqual(rows[long_game.id].active_pin, long_game.pin)
+        self.assertEqual(rows[active.id].active_pin, active.pin)
+        for session in (finished_old, legacy, abandoned):
+            # PIN sütunu dəyişmir, yalnız rezervasiya azad olur
+            self.assertEqual((rows[session.id].pin, rows[session.id].active_pin), (session.pin, None))
+        self.assertEqual(rows[abandoned.id].state, LiveSession.STATE_FINISHED)
+        self.assertEqual(rows[abandoned.id].finished_at, now)
+        self.assertEqual(pins.recycle_expired_pins(now), 0)
+
+        # köhnə sessiyanın linki PIN təkrar istifadə olunana qədər işləyir
+        self.host.groups.add(Group.objects.get_or_create(name="teacher")[0])
+        self.client.force_login(self.host)
+        lobby = reverse("liveExam:host_lobby", kwargs={"pin": finished_old.pin})
+        self.assertEqual(self.client.get(lobby).context["session"].id, finished_old.id)
+        reused = self.make_session(pin=finished_old.pin)
+        self.assertEqual(reused.active_pin, finished_old.pin)
+        self.assertEqual(self.client.get(lobby).context["session"].id, reused.id)
+
+    @override_settings(
+        CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+        LIVE_LEADERBOARD_REDIS_URL="",
+    )
+    def test_finish_records_time(self):
+        session = self.make_session()
+        self.client.force_login(self.host)
+        response = self.client.post(reverse("liveExam:host_finish", kwargs={"pin": session.pin}))
+        self.assertEqual(response.status_code, 200)
+        session.refresh_from_db()
+        self.assertEqual(session.state, LiveSession.STATE_FINISHED)
+        self.assertIsNotNone(session.finished_at)
+
+
+class ArchiveTests(LiveTestMixin, TestCase):
+
+    def setUp(self):
+        self.q1 = ExamQuestion.objects.create(exam=self.exam, text="Birinci", order=1)
+        self.q2 = ExamQuestion.objects.create(exam=self.exam, text="İkinci", order=2)
+        self.session = self.make_session(
+            state=LiveSession.STATE_FINISHED, selected_question_ids=[self.q2.id, self.q1.id],
+        )
+        a = self.make_player(self.session, "a", score=900)
+        b = self.make_player(self.session, "b", score=1500)
+        LiveAnswer.objects.create(session=self.session, player=a, question_id=self.q2.id, choice_ids=[7],
+                                  is_correct=True, answer_ms=1000, awarded_points=900)
+        LiveAnswer.objects.create(session=self.session, player=b, question_id=self.q2.id, choice_ids=[7, 8],
+                                  answer_ms=3000)
+        # köhnə single format
+        LiveAnswer.objects.create(session=self.session, player=b, question_id=self.q1.id, choice_id=5,
+                                  is_correct=True, answer_ms=500, awarded_points=1500)
+
+    def test_summary_round_trip(self):
+        row = archive.archive_session(self.session)
+        row.refresh_from_db()
+        self.assertEqual((row.player_count, row.answer_count, row.question_count), (2, 3, 2))
+
+        summary = row.summary
+        self.assertEqual([(p["rank"], p["nickname"], p["correct"]) for p in summary["leaderboard"]],
+                         [(1, "b", 1), (2, "a", 1)])
+        first, second = summary["questions"]
+        # sıra selected_question_ids-dəndir
+        self.assertEqual((first["question_id"], first["text"]), (self.q2.id, "İkinci"))
+        self.assertEqual((first["answered"], first["correct"], first["avg_ms"]), (2, 1, 2000))
+        self.assertEqual(first["choices"], {"7": 2, "8": 1})
+        self.assertEqual(second["choices"], {"5": 1})
+
+        # təkrar arxivləmə yeni sətir yaratmır
+        archive.archive_session(self.session)
+        self.assertEqual(LiveSessionArchive.objects.count(), 1)
+
+    def test_finished_sessions_archived_after_retention(self):
+        now = timezone.now()
+        recent = self.make_session(state=LiveSession.STATE_FINISHED)
+        LiveSession.objects.filter(id=self.session.id).update(created_at=now - timedelta(days=archive.RETENTION_DAYS + 1))
+
+        self.assertEqual(archive.archive_finished_sessions(now=now), 1)
+        self.assertFalse(LiveSession.objects.filter(id=self.session.id).exists())
+        self.assertFalse(LiveAnswer.objects.filter(session_id=self.session.id).exists())
+        self.assertTrue(LiveSession.objects.filter(id=recent.id).exists())
+        self.assertEqual(LiveSessionArchive.objects.get().session_id, self.session.id)
+
+    def test_retention_counts_from_finish_time(self):
+        now = timezone.now()
+        LiveSession.objects.filter(id=self.session.id).update(
+            created_at=now - timedelta(days=archive.RETENTION_DAYS + 2),
+            finished_at=now - timedelta(days=1),
+        )
+        self.assertEqual(archive.archive_finished_sessions(now=now), 0)
+        self.assertEqual(archive.archive_finished_sessions(now=now + timedelta(days=archive.RETENTION_DAYS)), 1)
+
+    def test_archive_after_pin_recycled_and_reused(self):
+        now = timezone.now()
+        pin = self.session.pin
+        finished_at = now - timedelta(days=archive.RETENTION_DAYS + 1)
+        LiveSession.objects.filter(id=self.session.id).update(finished_at=finished_at)
+        self.assertEqual(pins.recycle_expired_pins(now), 1)
+        # PIN artıq başqa sessiyadadır
+        self.make_session(pin=pin)
+
+        self.assertEqual(archive.archive_finished_sessions(now=now), 1)
+        row = LiveSessionArchive.objects.get(session_id=self.session.id)
+        self.assertEqual(row.pin, pin)
+        self.assertEqual(row.summary["session"]["pin"], pin)
+        self.assertEqual(row.summary["session"]["finished_at"], finished_at.isoformat())
+
+
+@override_settings(CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}})
+class ChannelLayerTests(LiveTestMixin, TestCase):
+
+    def test_percentile_and_summary(self):
+        self.assertEqual(bench.percentile([], 99), 0.0)
+        self.assertEqual(bench.percentile([1, 2, 3, 4, 5], 50), 3)
+        self.assertAlmostEqual(bench.percentile([0, 10], 99), 9.9)
+        self.assertEqual(bench.summarize_ms([0.001, 0.002, 0.004]), {"p50_ms": 2.0, "p99_ms": 3.96, "max_ms": 4.0})
+
+    def test_fanout_reaches_every_channel(self):
+        row = async_to_sync(bench.measure_fanout)(25, rounds=2)
+        self.assertEqual((row["size"], row["rounds"]), (25, 2))
+        self.assertLessEqual(row["p50_ms"], row["max_ms"])
+
+    @override_settings(LIVE_MAX_PLAYERS_PER_SESSION=2)
+    def test_join_rejected_when_room_full(self):
+        session = self.make_session()
+        self.make_player(session, "a")
+        self.make_player(session, "b")
+        response = self.client.post(reverse("liveExam:join_enter", args=[session.pin]), {"nickname": "c"})
+        self.assertEqual(response.status_code, 403)
+        self.assertEqual(session.players.count(), 2)
+
+
+@override_settings(
+    ALLOWED_HOSTS=["*"],
+    CHANNEL_LAYERS={"default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}},
+    LIVE_LEADERBOARD_REDIS_URL="",
+)
+class GameBenchmarkTests(TransactionTestCase):
+
+    def test_small_game_runs_end_to_end(self):
+        with mock.patch("liveExam.consumers.ensure_sweeper"):
+            result = async_to_sync(bench.run_game_benchmark)(players=3, questions=2, window=0.05)
+        self.assertEqual(result["answers"], 6)
+        self.assertGreater(result["queries_per_answer"], 0)
+        self.assertEqual(set(result["host"]), {"start", "next", "reveal"})
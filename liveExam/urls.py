@@ -24,6 +24,7 @@ urlpatterns = [
     
     # QR image
     path("live/qr/<str:pin>.png", views.live_qr_png, name="qr_png"),
+    path("live/qr/<str:pin>.svg", views.live_qr_svg, name="qr_svg"),
     
     #Game flow endpoints
     path("live/state/<str:pin>/", views.live_state_json, name="state_json"),
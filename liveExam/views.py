@@ -1,8 +1,7 @@
 from __future__ import annotations
-import io
+import asyncio
 import re
 import uuid
-import qrcode
 import random
 import hashlib
 
@@ -12,10 +11,12 @@ import hashlib
 from django.contrib.auth.decorators import login_required
 from django.core import signing
 from django.conf import settings
-from django.http import Http404, HttpResponse, JsonResponse
+from django.db.models import F
+from django.http import Http404, HttpResponse, HttpResponseNotModified, JsonResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.cache import patch_cache_control
 from django.views.decorators.http import require_POST
 from typing import Any, Dict, List, Optional, Tuple
 
@@ -24,6 +25,9 @@ from channels.layers import get_channel_layer
 
 from liveExam.models import LiveSession, LivePlayer, LiveAnswer
 from liveExam.constants import AVATAR_EMOJI
+from liveExam.leaderboard import get_leaderboard, rebuild_leaderboard, drop_leaderboard
+from liveExam.lobby import broadcast_player_joined, broadcast_player_updated
+from liveExam.qr import CONTENT_TYPES as QR_CONTENT_TYPES, etag_matches, get_qr, prerender_enabled, schedule_prerender
 from blog.models import Exam, ExamQuestion, ExamQuestionOption
 
 
@@ -58,6 +62,14 @@ def _clean_nickname(name: str) -> str:
     return name[:32]
 
 
+def _join_url(request, session: LiveSession) -> str:
+    """
+    QR və host ekranında göstərilən tam join URL (LAN_HOST varsa ondan istifadə olunur).
+    """
+    host = getattr(settings, "LAN_HOST", None) or request.get_host()
+    return f"http://{host}{session.join_url_path()}"
+
+
 def _get_client_id(request) -> str:
     """
     client_id cookie yoxdursa yenisini qaytarır (uuid hex).
@@ -86,43 +98,95 @@ def _broadcast(pin: str, payload: dict, group_suffix: str) -> None:
     )
 
 
+def _player_group(pin: str, player_id: int) -> str:
+    # LivePlayConsumer token-dən player-i tanıyanda bu qrupa qoşulur
+    return f"live_{pin}_player_{int(player_id)}"
+
+
+def _send_personal(pin: str, messages: Dict[int, Dict[str, Any]]) -> None:
+    """
+    Hər player-ə öz mesajı (play_event). group_send-lər paralel gedir,
+    belə ki 1000 nəfərlik otaq üçün də bir neçə round-trip vaxtı çəkir.
+    """
+    if not messages:
+        return
+    layer = get_channel_layer()
+
+    async def _send_all():
+        await asyncio.gather(*[
+            layer.group_send(_player_group(pin, pid), {"type": "play_event", "data": data})
+            for pid, data in messages.items()
+        ])
+
+    async_to_sync(_send_all)()
+
+
 # ------------------------
 # Serializers
 # ------------------------
 
 def _serialize_players(session: LiveSession, limit: int = 50) -> List[Dict[str, Any]]:
     return list(
-        session.players.order_by("-created_at")
+        session.players.filter(is_connected=True)
+        .order_by("-created_at")
         .values("id", "nickname", "avatar_key")[:limit]
     )
 
 
-def _serialize_top(session: LiveSession, limit: int = 10) -> List[Dict[str, Any]]:
-    return list(
-        session.players.order_by("-score", "created_at")
-        .values("nickname", "avatar_key", "score")[:limit]
+def _serialize_top(session: LiveSession, limit: int = 10, rank_changes: Optional[Dict[int, Dict[str, int]]] = None) -> List[Dict[str, Any]]:
+    """
+    Top-K leaderboard-dan gəlir (DB-də ORDER BY etmirik).
+    rank_changes verilsə (reveal), hər sətrə "delta" da əlavə olunur.
+    """
+    out: List[Dict[str, Any]] = []
+    for row in get_leaderboard(session).top(limit):
+        item = {
+            "nickname": row["nickname"],
+            "avatar_key": row["avatar_key"],
+            "score": row["score"],
+            "rank": row["rank"],
+        }
+        if rank_changes is not None:
+            item["delta"] = rank_changes.get(row["player_id"], {}).get("delta", 0)
+        out.append(item)
+    return out
+
+
+def _get_question_answers(session: LiveSession, question_id: int, limit: Optional[int] = None) -> List[Dict[str, Any]]:
+    qs = (
+        LiveAnswer.objects
+        .filter(session=session, question_id=question_id)
+        .order_by("-awarded_points", "-created_at")
+        .values("player_id", "is_correct", "awarded_points")
     )
+    return list(qs[:limit] if limit else qs)
 
 
-def _serialize_question_results(session: LiveSession, question_id: int, limit: int = 50) -> List[Dict[str, Any]]:
+def _serialize_question_results(
+    session: LiveSession,
+    question_id: int,
+    limit: int = 50,
+    answers: Optional[List[Dict[str, Any]]] = None,
+) -> List[Dict[str, Any]]:
     """
     Reveal zamanı: bu sual üzrə kim nə qədər bal aldı, total score nədir.
+    Player join etmirik: nickname/avatar/score leaderboard-dan götürülür.
+    answers verilsə (artıq oxunubsa) təkrar query edilmir.
     """
-    answers = (
-        LiveAnswer.objects
-        .filter(session=session, question_id=question_id)
-        .select_related("player")
-        .order_by("-awarded_points", "-created_at")
-    )[:limit]
+    if answers is None:
+        answers = _get_question_answers(session, question_id, limit=limit)
+    answers = answers[:limit]
+    players = get_leaderboard(session).entries(a["player_id"] for a in answers)
 
     out: List[Dict[str, Any]] = []
     for a in answers:
+        p = players.get(a["player_id"], {})
         out.append({
-            "nickname": a.player.nickname,
-            "avatar_key": a.player.avatar_key,
-            "is_correct": bool(a.is_correct),
-            "awarded_points": _safe_int(a.awarded_points, 0),
-            "total_score": _safe_int(a.player.score, 0),
+            "nickname": p.get("nickname", ""),
+            "avatar_key": p.get("avatar_key", "avatar_1"),
+            "is_correct": bool(a["is_correct"]),
+            "awarded_points": _safe_int(a["awarded_points"], 0),
+            "total_score": _safe_int(p.get("score"), 0),
         })
     return out
 
@@ -392,6 +456,53 @@ def _build_reveal_payload(session: LiveSession, question_id: int) -> Dict[str, A
     }
 
 
+def _apply_streaks(session: LiveSession, answers: List[Dict[str, Any]]) -> Dict[int, int]:
+    """
+    Reveal-də streak yenilənir: düz (perfect) cavab verən +1, qalanlar 0.
+    2 UPDATE ilə bütün sessiya; yeni dəyərlər geri qaytarılır.
+    """
+    correct_ids = {a["player_id"] for a in answers if a["is_correct"]}
+
+    streaks: Dict[int, int] = {}
+    for pid, streak in session.players.values_list("id", "streak"):
+        streaks[pid] = _safe_int(streak, 0) + 1 if pid in correct_ids else 0
+
+    LivePlayer.objects.filter(session=session, id__in=correct_ids).update(streak=F("streak") + 1)
+    LivePlayer.objects.filter(session=session).exclude(id__in=correct_ids).exclude(streak=0).update(streak=0)
+    return streaks
+
+
+def _build_personal_results(
+    question_id: int,
+    answers: List[Dict[str, Any]],
+    rank_changes: Dict[int, Dict[str, int]],
+    streaks: Dict[int, int],
+) -> Dict[int, Dict[str, Any]]:
+    """
+    Hər player üçün yığcam reveal mesajı (bir keçiddə):
+    aldığı bal, ümumi bal, yeri, yer dəyişməsi və streak.
+    """
+    by_player = {a["player_id"]: a for a in answers}
+    total = len(rank_changes)
+
+    out: Dict[int, Dict[str, Any]] = {}
+    for pid, rc in rank_changes.items():
+        a = by_player.get(pid)
+        out[pid] = {
+            "type": "my_result",
+            "question_id": question_id,
+            "answered": a is not None,
+            "is_correct": bool(a and a["is_correct"]),
+            "awarded_points": _safe_int(a["awarded_points"], 0) if a else 0,
+            "score": rc["score"],
+            "rank": rc["rank"],
+            "rank_delta": rc["delta"],
+            "streak": streaks.get(pid, 0),
+            "total_players": total,
+        }
+    return out
+
+
 # ------------------------
 # Multi scoring helper (consumer üçün)
 # ------------------------
@@ -444,12 +555,17 @@ def live_create_session_by_slug(request, slug):
         raise Http404("Only exam author can host live session.")
 
     session = LiveSession.objects.create(exam=exam, host_user=request.user)
+
+    # host lobby açılanda QR artıq cache-də olsun (arxa fonda)
+    if prerender_enabled():
+        schedule_prerender(_join_url(request, session))
+
     return redirect("liveExam:host_lobby", pin=session.pin)
 
 
 @login_required
 def live_host_lobby(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
 
     if session.host_user != request.user:
         raise Http404("Not allowed.")
@@ -457,8 +573,7 @@ def live_host_lobby(request, pin):
     # join_url = request.build_absolute_uri(
     #     reverse("liveExam:join_page", kwargs={"pin": session.pin})
     # )
-    host = getattr(settings, "LAN_HOST", None) or request.get_host()
-    join_url = f"http://{host}{reverse('liveExam:join_page', kwargs={'pin': session.pin})}"
+    join_url = _join_url(request, session)
 
     context = {
         "session": session,
@@ -475,14 +590,14 @@ def live_host_lobby(request, pin):
 # Player join / wait / screen
 # ------------------------
 def live_join_page(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     context = {"session": session, "avatars": AVATAR_KEYS}
     return render(request, "liveExam/join.html", context)
 
 
 @require_POST
 def live_join_enter(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
 
     if session.is_locked:
         return JsonResponse({"ok": False, "message": "Lobby kilidlənib."}, status=403)
@@ -499,13 +614,23 @@ def live_join_enter(request, pin):
     now = timezone.now()
 
     player = LivePlayer.objects.filter(session=session, client_id=client_id).first()
+    # lobby delta: yeni / geri qayıdan -> joined, yalnız profil dəyişibsə -> updated,
+    # eyni oyunçunun təkrar girişi (reload, reconnect) -> heç nə
+    lobby_event = "joined"
     if player:
+        if player.is_connected:
+            changed = (player.nickname, player.avatar_key) != (nickname, avatar_key)
+            lobby_event = "updated" if changed else None
         player.nickname = nickname
         player.avatar_key = avatar_key
         player.is_connected = True
         player.last_seen = now
         player.save(update_fields=["nickname", "avatar_key", "is_connected", "last_seen"])
     else:
+        max_players = getattr(settings, "LIVE_MAX_PLAYERS_PER_SESSION", 0)
+        if max_players and session.players.count() >= max_players:
+            return JsonResponse({"ok": False, "message": "Otaq doludur."}, status=403)
+
         player = LivePlayer.objects.create(
             session=session,
             client_id=client_id,
@@ -515,17 +640,18 @@ def live_join_enter(request, pin):
             last_seen=now,
         )
 
+    get_leaderboard(session).add_player(player.id, player.nickname, player.avatar_key, player.score)
+
     token = signing.dumps(
         {"pin": session.pin, "player_id": player.id, "client_id": client_id},
         salt=PLAYER_TOKEN_SALT,
     )
 
-    # lobby-yə realtime update
-    _broadcast(session.pin, {
-        "type": "lobby_state",
-        "count": session.players.count(),
-        "players": _serialize_players(session),
-    }, "lobby")
+    # lobby-yə realtime update: yalnız delta (tam siyahı yox)
+    if lobby_event == "joined":
+        broadcast_player_joined(session, player)
+    elif lobby_event == "updated":
+        broadcast_player_updated(session, player)
 
     wait_url = reverse("liveExam:wait_room", kwargs={"pin": session.pin})
     resp = JsonResponse({"ok": True, "redirect": wait_url})
@@ -537,7 +663,7 @@ def live_join_enter(request, pin):
 
 
 # def live_qr_png(request, pin):
-#     session = get_object_or_404(LiveSession, pin=pin)
+#     session = get_object_or_404(LiveSession.objects.by_pin(pin))
 #     join_url = request.build_absolute_uri(
 #         reverse("liveExam:join_page", kwargs={"pin": session.pin})
 #     )
@@ -547,21 +673,27 @@ def live_join_enter(request, pin):
 #     img.save(buf, format="PNG")
 #     return HttpResponse(buf.getvalue(), content_type="image/png")
 
-def live_qr_png(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+def live_qr_png(request, pin, fmt="png"):
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
 
-    host = getattr(settings, "LAN_HOST", None) or request.get_host()
-    join_url = f"http://{host}{session.join_url_path()}"
+    join_url = _join_url(request, session)
+    data, etag = get_qr(join_url, fmt)
+
+    # şəkil URL-ə görə dəyişmir -> brauzer/proxy uzun müddət saxlaya bilər
+    if etag_matches(etag, request.headers.get("If-None-Match", "")):
+        resp = HttpResponseNotModified()
+    else:
+        resp = HttpResponse(data, content_type=QR_CONTENT_TYPES[fmt])
+    resp["ETag"] = etag
+    patch_cache_control(resp, public=True, max_age=60 * 60 * 24, immutable=True)
+    return resp
 
-    img = qrcode.make(join_url)
-    buf = io.BytesIO()
-    img.save(buf, format="PNG")
-    buf.seek(0)
 
-    return HttpResponse(buf.getvalue(), content_type="image/png")
+def live_qr_svg(request, pin):
+    return live_qr_png(request, pin, fmt="svg")
 
 def live_wait_room(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
 
     players = _serialize_players(session)
     return render(
@@ -576,7 +708,7 @@ def live_wait_room(request, pin):
 
 
 def live_player_screen(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
 
     token = request.COOKIES.get(PLAYER_COOKIE_NAME)
     if not token:
@@ -587,7 +719,7 @@ def live_player_screen(request, pin):
 
 # ✅ NEW: cari state-i HTTP ilə almaq (late join / miss olunan WS üçün)
 def live_state_json(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     total = _get_total_questions(session)
 
     data = {
@@ -648,7 +780,7 @@ def live_state_json(request, pin):
 @require_POST
 @login_required
 def host_start_game(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     if session.host_user_id != request.user.id:
         raise Http404()
 
@@ -698,6 +830,9 @@ def host_start_game(request, pin):
         "question_started_at", "question_ends_at",
     ])
 
+    # leaderboard-u DB-dən təmiz qur (rank delta-lar bu oyundan başlasın)
+    rebuild_leaderboard(session)
+
     # 4) Wait room-da olan player-ları player_screen-ə yönləndir
     _broadcast(pin, {
         "type": "game_started",
@@ -729,7 +864,7 @@ def host_start_game(request, pin):
 @require_POST
 @login_required
 def host_next_question(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     if session.host_user_id != request.user.id:
         raise Http404()
 
@@ -744,10 +879,10 @@ def host_next_question(request, pin):
     eq = _get_question_by_index(session, idx)
     if eq is None:
         # sual qurtardı -> finished
-        session.state = LiveSession.STATE_FINISHED
-        session.save(update_fields=["state"])
+        session.mark_finished()
 
         _broadcast(pin, {"type": "finished", "top": _serialize_top(session, limit=50)}, "play")
+        drop_leaderboard(session)
         return JsonResponse({"ok": True, "finished": True})
 
     payload, now, ends = _build_question_payload(session=session, eq=eq, idx=idx, total=total)
@@ -765,7 +900,7 @@ def host_next_question(request, pin):
 @require_POST
 @login_required
 def host_reveal(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     if session.host_user_id != request.user.id:
         raise Http404()
 
@@ -781,37 +916,51 @@ def host_reveal(request, pin):
         .values_list("id", flat=True)
     )
 
+    # təkrar reveal (double click / auto + manual) streak və delta-ları pozmasın
+    first_reveal = session.state != LiveSession.STATE_REVEAL
+
     session.state = LiveSession.STATE_REVEAL
     session.save(update_fields=["state"])
 
+    # bu sual üzrə bütün cavablar bir dəfə oxunur (results + personal mesajlar)
+    answers = _get_question_answers(session, eq.id)
+
+    board = get_leaderboard(session)
+    rank_changes = board.commit_ranks() if first_reveal else None
+
     payload = {
         "type": "reveal",
         "question_id": eq.id,
         "correct_option_ids": correct_ids,
-        "results": _serialize_question_results(session, eq.id, limit=50),
-        "top": _serialize_top(session, limit=10),
+        "results": _serialize_question_results(session, eq.id, limit=50, answers=answers),
+        "top": _serialize_top(session, limit=10, rank_changes=rank_changes),
         "revealed_at": timezone.now().isoformat(),
     }
     _broadcast(pin, payload, "play")
 
+    # hər player-ə öz nəticəsi (rank, delta, streak) -> state_json poll lazım deyil
+    if first_reveal:
+        streaks = _apply_streaks(session, answers)
+        _send_personal(pin, _build_personal_results(eq.id, answers, rank_changes, streaks))
+
     return JsonResponse({"ok": True, "question_id": eq.id})
 
 
 @require_POST
 @login_required
 def host_finish(request, pin):
-    session = get_object_or_404(LiveSession, pin=pin)
+    session = get_object_or_404(LiveSession.objects.by_pin(pin))
     if session.host_user_id != request.user.id:
         raise Http404()
 
-    session.state = LiveSession.STATE_FINISHED
-    session.save(update_fields=["state"])
+    session.mark_finished()
 
     payload = {
         "type": "finished",
         "top": _serialize_top(session, limit=50),
-        "finished_at": timezone.now().isoformat(),
+        "finished_at": session.finished_at.isoformat(),
     }
     _broadcast(pin, payload, "play")
+    drop_leaderboard(session)
 
     return JsonResponse({"ok": True})
\ No newline at end of file